@@ -0,0 +1,118 @@
+"""
+Endpoints administrativos
+=========================
+Rotas sob ``/admin``, protegidas pelo token definido em ``ADMIN_TOKEN``
+(enviado em ``Authorization: Bearer <token>`` ou ``X-Admin-Token``).
+Sem ``ADMIN_TOKEN`` configurado, as rotas ficam desabilitadas.
+"""
+import asyncio
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from consumo import contador_consumo
+from gemini_service import gemini_service
+from perfilador import AmostragemEmAndamento, amostrador, formatar_colapsado, perfis_requisicao
+
+
+def token_admin_valido(authorization: Optional[str], x_admin_token: Optional[str]) -> bool:
+    """Confere o token administrativo enviado pelo cliente"""
+    esperado = os.getenv("ADMIN_TOKEN")
+    if not esperado:
+        return False
+    enviado = x_admin_token
+    if not enviado and authorization and authorization.lower().startswith("bearer "):
+        enviado = authorization[7:].strip()
+    return bool(enviado) and hmac.compare_digest(enviado.encode(), esperado.encode())
+
+
+async def exigir_admin(
+    authorization: Optional[str] = Header(default=None),
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    """Dependência que bloqueia o acesso sem token administrativo"""
+    if not os.getenv("ADMIN_TOKEN"):
+        raise HTTPException(status_code=403, detail="Endpoints administrativos desabilitados")
+    if not token_admin_valido(authorization, x_admin_token):
+        raise HTTPException(status_code=401, detail="Token administrativo inválido")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(exigir_admin)])
+
+
+@router.get(
+    "/consumo",
+    summary="Consumo de tokens do Gemini",
+    description="Tokens e custo estimado agregados por modelo/chave e por versão do catálogo"
+)
+async def consumo_gemini():
+    """Retorna o consumo de tokens do Gemini desde a inicialização"""
+    return contador_consumo.resumo()
+
+
+@router.post(
+    "/catalogo/recarregar",
+    summary="Recarregar o catálogo",
+    description="Relê o catálogo publicado (perfumes.json e snapshot) sem reiniciar a API"
+)
+async def recarregar_catalogo():
+    """
+    Troca o catálogo em memória pelo publicado no disco (ver `publicar.py`).
+    
+    Requisições em andamento terminam com o catálogo anterior; cursores de
+    paginação e ETags antigos deixam de valer quando a versão muda.
+    """
+    try:
+        return await asyncio.to_thread(gemini_service.recarregar_catalogo)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=500, detail=f"Falha ao recarregar o catálogo: {e}")
+
+
+@router.get(
+    "/perfil",
+    response_class=PlainTextResponse,
+    summary="Perfil de CPU por amostragem",
+    description="Amostra as pilhas de todas as threads e retorna no formato collapsed (flamegraph)"
+)
+async def perfil_amostragem(
+    segundos: float = Query(10, gt=0, le=60),
+    intervalo_ms: float = Query(5, ge=1, le=100)
+):
+    """
+    Amostra o processo por alguns segundos.
+    
+    A saída (`thread;quadro;...;quadro contagem`) pode ser aberta no
+    speedscope ou convertida com `flamegraph.pl`.
+    """
+    try:
+        pilhas = await asyncio.to_thread(amostrador.amostrar, segundos, intervalo_ms / 1000)
+    except AmostragemEmAndamento as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(formatar_colapsado(pilhas))
+
+
+@router.get(
+    "/perfil/requisicoes",
+    summary="Requisições perfiladas",
+    description="IDs das últimas requisições perfiladas com o cabeçalho X-Perfil"
+)
+async def perfis_disponiveis():
+    """Lista os IDs com perfil disponível (mais recentes primeiro)"""
+    return {"request_ids": perfis_requisicao.ids()}
+
+
+@router.get(
+    "/perfil/requisicoes/{request_id}",
+    response_class=PlainTextResponse,
+    summary="Perfil de uma requisição",
+    description="Relatório do cProfile de uma requisição enviada com X-Perfil: 1"
+)
+async def perfil_requisicao(request_id: str):
+    """Retorna o relatório do cProfile (ordenado por tempo acumulado)"""
+    relatorio = perfis_requisicao.obter(request_id)
+    if relatorio is None:
+        raise HTTPException(status_code=404, detail=f"Perfil da requisição '{request_id}' não encontrado")
+    return PlainTextResponse(relatorio)
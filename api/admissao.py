@@ -0,0 +1,161 @@
+"""
+Controle de admissão de /quiz/recommend
+=======================================
+Protege a latência de quem já foi admitido quando o Gemini fica lento:
+
+- limite de recomendações simultâneas com fila de espera limitada; sem vaga
+  (fila cheia ou espera esgotada) a resposta é ``503`` imediato, ou a
+  recomendação por regras se ``ADMISSAO_DEGRADAR=true``;
+- limite de taxa por cliente (token bucket por IP ou por um cabeçalho);
+  excedido, a resposta é ``429``.
+
+Ambas as recusas trazem ``Retry-After``.
+
+Variáveis de ambiente:
+- ``ADMISSAO_CONCORRENCIA``: recomendações simultâneas (padrão: 32)
+- ``ADMISSAO_FILA``: requisições aguardando vaga (padrão: 64)
+- ``ADMISSAO_ESPERA_MAX``: espera máxima por vaga em segundos (padrão: 10)
+- ``ADMISSAO_DEGRADAR``: ``true`` para usar o fallback em vez do 503 (padrão: false)
+- ``LIMITE_TAXA``: requisições por segundo por cliente; 0 desabilita (padrão: 0)
+- ``LIMITE_TAXA_RAJADA``: tamanho do balde (padrão: 5)
+- ``LIMITE_TAXA_CHAVE``: ``ip`` (padrão) ou o nome de um cabeçalho
+  (ex.: ``x-forwarded-for`` atrás de proxy)
+"""
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from fastapi import Request
+
+from metricas import ADMISSAO, ADMISSAO_FILA
+
+
+class AdmissaoRecusada(Exception):
+    """Requisição recusada pelo controle de admissão"""
+
+    def __init__(self, status_code: int, retry_after: int, motivo: str):
+        super().__init__(motivo)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LimitadorTaxa:
+    """Token bucket por cliente"""
+
+    def __init__(self, taxa: float, rajada: float, max_clientes: int = 10000):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.max_clientes = max_clientes
+        # chave -> [tokens, instante da última atualização]
+        self.baldes: Dict[str, List[float]] = {}
+
+    def consumir(self, chave: str, agora: Optional[float] = None) -> float:
+        """Consome um token; retorna 0 se permitido ou os segundos até o próximo"""
+        agora = time.monotonic() if agora is None else agora
+        balde = self.baldes.get(chave)
+        if balde is None:
+            if len(self.baldes) >= self.max_clientes:
+                self._limpar(agora)
+            balde = self.baldes[chave] = [self.rajada, agora]
+
+        tokens = min(self.rajada, balde[0] + (agora - balde[1]) * self.taxa)
+        balde[1] = agora
+        if tokens >= 1:
+            balde[0] = tokens - 1
+            return 0.0
+        balde[0] = tokens
+        return (1 - tokens) / self.taxa
+
+    def _limpar(self, agora: float):
+        """Descarta baldes já cheios (clientes inativos)"""
+        self.baldes = {
+            chave: balde for chave, balde in self.baldes.items()
+            if balde[0] + (agora - balde[1]) * self.taxa < self.rajada
+        }
+        if len(self.baldes) >= self.max_clientes:
+            self.baldes.clear()
+
+
+class ControleAdmissao:
+    """Limite de concorrência com fila e limite de taxa por cliente"""
+
+    def __init__(self):
+        self.limite = int(os.getenv("ADMISSAO_CONCORRENCIA", "32"))
+        self.fila_max = int(os.getenv("ADMISSAO_FILA", "64"))
+        self.espera_max = float(os.getenv("ADMISSAO_ESPERA_MAX", "10"))
+        self.degradar = os.getenv("ADMISSAO_DEGRADAR", "false").lower() == "true"
+
+        taxa = float(os.getenv("LIMITE_TAXA", "0"))
+        self.limitador_taxa = LimitadorTaxa(taxa, float(os.getenv("LIMITE_TAXA_RAJADA", "5"))) if taxa > 0 else None
+        self.chave_taxa = os.getenv("LIMITE_TAXA_CHAVE", "ip").lower()
+
+        self._vagas = asyncio.Semaphore(self.limite)
+        self.aguardando = 0
+        # Média móvel da duração de uma recomendação, usada no Retry-After
+        self.duracao_media = 1.0
+
+    def chave_cliente(self, request: Request) -> str:
+        """Identifica o cliente pelo IP ou pelo cabeçalho configurado"""
+        if self.chave_taxa != "ip":
+            valor = request.headers.get(self.chave_taxa)
+            if valor:
+                # X-Forwarded-For: o primeiro endereço é o do cliente
+                return valor.split(",")[0].strip()
+        return request.client.host if request.client else "desconhecido"
+
+    def verificar_taxa(self, request: Request):
+        """Aplica o limite de taxa do cliente (AdmissaoRecusada 429)"""
+        if self.limitador_taxa is None:
+            return
+        espera = self.limitador_taxa.consumir(self.chave_cliente(request))
+        if espera:
+            ADMISSAO.labels("recusada_taxa").inc()
+            raise AdmissaoRecusada(429, math.ceil(espera), "Limite de requisições excedido")
+
+    def _retry_after(self) -> int:
+        """Estimativa de quando uma vaga deve abrir"""
+        return min(60, max(1, math.ceil(self.duracao_media * (self.aguardando + 1) / self.limite)))
+
+    def _recusar_capacidade(self, motivo: str) -> AdmissaoRecusada:
+        ADMISSAO.labels("recusada_capacidade").inc()
+        return AdmissaoRecusada(503, self._retry_after(), motivo)
+
+    async def _obter_vaga(self):
+        """Ocupa uma vaga, aguardando na fila se necessário (AdmissaoRecusada 503)"""
+        if not self._vagas.locked():
+            await self._vagas.acquire()
+            ADMISSAO.labels("admitida").inc()
+            return
+
+        if self.aguardando >= self.fila_max:
+            raise self._recusar_capacidade("Servidor sobrecarregado")
+
+        self.aguardando += 1
+        ADMISSAO_FILA.inc()
+        try:
+            await asyncio.wait_for(self._vagas.acquire(), self.espera_max)
+        except asyncio.TimeoutError:
+            raise self._recusar_capacidade("Tempo de espera por vaga esgotado")
+        finally:
+            self.aguardando -= 1
+            ADMISSAO_FILA.dec()
+        ADMISSAO.labels("admitida_apos_fila").inc()
+
+    @asynccontextmanager
+    async def admitir(self, request: Request):
+        """Admite a requisição (limite de taxa e vaga) pelo tempo do bloco"""
+        self.verificar_taxa(request)
+        await self._obter_vaga()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._vagas.release()
+            self.duracao_media = 0.9 * self.duracao_media + 0.1 * (time.perf_counter() - inicio)
+
+
+# Instância global
+controle_admissao = ControleAdmissao()
@@ -0,0 +1,158 @@
+"""
+Ciclo de vida do cache de contexto do Gemini
+============================================
+Percorre, sem rede, as transições do ``CacheContexto`` contra o cliente
+falso (``gemini_fake.ClienteGeminiFake``) com um relógio controlado:
+
+1. criação na primeira recomendação;
+2. reaproveitamento enquanto o TTL está longe do fim;
+3. renovação (extensão do TTL) dentro da margem, sem recriar;
+4. expiração no servidor: a renovação falha e o cache é recriado;
+5. catálogo novo: cache recriado e o anterior removido;
+6. falha na criação: prompt inline até passar a espera.
+
+Em cada etapa confere o nome do cache, as criações e a contagem de tokens
+(``cached_content_token_count`` = bloco do catálogo; sem cache, tudo vai no
+prompt). Termina com código 1 na primeira transição incorreta.
+
+Uso:
+    python bench/cache_contexto.py
+    python bench/cache_contexto.py --ttl 600 --margem 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+RAIZ_API = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ_API))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["GEMINI_CACHE_CONTEXTO"] = "true"
+
+from bench.inicializacao import CATALOGO_PADRAO  # noqa: E402
+from cache_contexto import CacheContexto  # noqa: E402
+from gemini_fake import ClienteGeminiFake, _tokens  # noqa: E402
+
+MODELO = "gemini-2.5-flash"
+PERGUNTA = "Gênero: masculino\nOcasião: noite\nIntensidade: intensa"
+
+
+class Relogio:
+    """Relógio controlado, compartilhado pelo cache e pelo cliente falso"""
+
+    def __init__(self, inicio: float = 1_700_000_000.0):
+        self.agora = inicio
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float):
+        self.agora += segundos
+
+
+def bloco_catalogo(nomes) -> str:
+    linhas = "\n".join(f"{i}. {nome}" for i, nome in enumerate(nomes, 1))
+    return f"Você é um consultor de perfumes.\n\nCATÁLOGO:\n{linhas}\n\nResponda em JSON."
+
+
+def conferir(condicao: bool, descricao: str):
+    print(f"  {'✓' if condicao else '✗'} {descricao}")
+    if not condicao:
+        sys.exit(1)
+
+
+async def conferir_tokens(cliente: ClienteGeminiFake, nome, conteudo: str):
+    """Tokens do cache na resposta quando há cache; tudo no prompt quando não há"""
+    config = {"cached_content": nome} if nome else {"system_instruction": conteudo}
+    resposta = await cliente.aio.models.generate_content(model=MODELO, contents=PERGUNTA, config=config)
+    uso = resposta.usage_metadata
+    if nome:
+        conferir(uso.cached_content_token_count == _tokens(conteudo)
+                 and uso.prompt_token_count == _tokens(conteudo) + _tokens(PERGUNTA),
+                 f"tokens: {uso.cached_content_token_count} do cache de {uso.prompt_token_count} no prompt")
+    else:
+        conferir(uso.cached_content_token_count is None
+                 and uso.prompt_token_count == _tokens(conteudo + PERGUNTA),
+                 f"tokens: nenhum do cache, {uso.prompt_token_count} no prompt")
+
+
+async def executar(ttl: int, margem: int, espera_falha: int):
+    relogio = Relogio()
+    cliente = ClienteGeminiFake(relogio)
+    cache = CacheContexto(MODELO, ttl_segundos=ttl, margem_renovacao=margem,
+                          espera_apos_falha=espera_falha, relogio=relogio)
+    margem = cache.margem_renovacao
+    nomes = [p["nome"] for p in json.loads(CATALOGO_PADRAO.read_text(encoding="utf-8"))]
+    cache.definir_conteudo(bloco_catalogo(nomes))
+
+    print("1. criação")
+    primeiro = await cache.obter_nome(cliente)
+    conferir(primeiro is not None and cliente.caches.criados == 1, f"criado {primeiro}")
+    await conferir_tokens(cliente, primeiro, cache.conteudo)
+
+    print("2. reaproveitamento")
+    relogio.avancar(ttl - margem - 1)
+    conferir(await cache.obter_nome(cliente) == primeiro and cliente.caches.criados == 1,
+             f"{primeiro} reaproveitado {ttl - margem - 1}s depois")
+
+    print("3. renovação antes do fim do TTL")
+    relogio.avancar(2)
+    expira_antes = cliente.caches.itens[primeiro]["expira_em"]
+    conferir(await cache.obter_nome(cliente) == primeiro and cliente.caches.criados == 1,
+             "mesmo cache, sem nova criação")
+    expira_depois = cliente.caches.itens[primeiro]["expira_em"]
+    conferir(expira_depois == relogio() + ttl and expira_depois > expira_antes,
+             f"TTL estendido em {expira_depois - expira_antes:.0f}s")
+    await conferir_tokens(cliente, primeiro, cache.conteudo)
+
+    print("4. expiração no servidor")
+    relogio.avancar(ttl + 1)
+    segundo = await cache.obter_nome(cliente)
+    conferir(segundo not in (None, primeiro) and cliente.caches.criados == 2
+             and primeiro not in cliente.caches.itens, f"recriado como {segundo}")
+    await conferir_tokens(cliente, segundo, cache.conteudo)
+
+    print("5. catálogo novo")
+    cache.definir_conteudo(bloco_catalogo(nomes[:10]))
+    terceiro = await cache.obter_nome(cliente)
+    conferir(terceiro not in (None, segundo) and cliente.caches.criados == 3,
+             f"recriado como {terceiro}")
+    conferir(segundo not in cliente.caches.itens and list(cliente.caches.itens) == [terceiro],
+             "cache do catálogo anterior removido")
+    await conferir_tokens(cliente, terceiro, cache.conteudo)
+
+    print("6. falha na criação")
+    criar = cliente.caches.create
+
+    def falhar(*args, **kwargs):
+        raise RuntimeError("indisponível")
+
+    cliente.caches.create = falhar
+    cache.definir_conteudo(bloco_catalogo(nomes[:5]))
+    conferir(await cache.obter_nome(cliente) is None, "sem cache: prompt inline")
+    await conferir_tokens(cliente, None, cache.conteudo)
+    cliente.caches.create = criar
+    relogio.avancar(espera_falha - 1)
+    conferir(await cache.obter_nome(cliente) is None and cliente.caches.criados == 3,
+             f"sem nova tentativa antes de {espera_falha}s")
+    relogio.avancar(1)
+    quarto = await cache.obter_nome(cliente)
+    conferir(quarto is not None and cliente.caches.criados == 4, f"nova tentativa cria {quarto}")
+
+    print("✓ Todas as transições conferem")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere o ciclo de vida do cache de contexto")
+    parser.add_argument("--ttl", type=int, default=3600, help="TTL do cache (s)")
+    parser.add_argument("--margem", type=int, default=300, help="Margem de renovação (s)")
+    parser.add_argument("--espera-falha", type=int, default=600, help="Espera após falha na criação (s)")
+    args = parser.parse_args()
+    asyncio.run(executar(args.ttl, args.margem, args.espera_falha))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Teste de carga da API
+=====================
+Sobe o servidor falso do Gemini (``gemini_servidor_fake``) e a API em um
+processo separado, apontada para ele, e dispara requisições concorrentes
+contra ``/quiz/recommend``, ``/quiz/questions`` e ``/perfumes``. Roda sem
+rede e gera um relatório JSON para acompanhar regressões.
+
+Para cada cenário são medidos RPS, latência (média, p50, p95, p99, máx.) e
+o detalhamento de erros por status HTTP ou exceção; em ``recommend`` também
+a origem das recomendações (Gemini ou fallback por regras).
+
+Uso:
+    python bench/carga.py --requisicoes 500 --concorrencia 20 --saida relatorio.json
+    python bench/carga.py --latencia lognormal:800,0.4 --erros 429:0.02,timeout:0.01
+    python bench/carga.py --sem-gemini              # apenas o fallback por regras
+    python bench/carga.py --url http://localhost:8000 --cenarios perfumes
+    python bench/carga.py --base relatorio.json     # compara e falha se regredir
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+
+RAIZ_API = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ_API))
+
+from bench.gemini_servidor_fake import carregar_respostas, criar_app  # noqa: E402
+from catalogo import CAMPOS_PUBLICOS  # noqa: E402
+from models import (  # noqa: E402
+    FaixaPreco,
+    FamiliaOlfativa,
+    Estacao,
+    Genero,
+    Intensidade,
+    Ocasiao,
+    Personalidade,
+)
+
+MENSAGEM_GEMINI = "Recomendações geradas com Gemini AI!"
+
+# A API descarta GEMINI_API_KEY do ambiente fora do Docker (main.py); o
+# lançador define a chave depois do import, antes do startup
+LANCADOR_API = """
+import os, sys, uvicorn
+import main
+os.environ["GEMINI_API_KEY"] = os.environ.get("CARGA_GEMINI_API_KEY", "")
+uvicorn.run(main.app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+# ============ CENÁRIOS ============
+
+def _respostas_quiz(rng: random.Random) -> Dict:
+    """Respostas aleatórias (válidas) do quiz"""
+    respostas = {
+        campo: rng.choice(list(enum)).value
+        for campo, enum in (
+            ("genero", Genero),
+            ("ocasiao", Ocasiao),
+            ("estacao", Estacao),
+            ("intensidade", Intensidade),
+            ("familia_olfativa", FamiliaOlfativa),
+            ("personalidade", Personalidade),
+            ("faixa_preco", FaixaPreco),
+        )
+    }
+    if rng.random() < 0.3:
+        respostas["notas_preferidas"] = rng.sample(["baunilha", "rosa", "oud", "bergamota", "âmbar"], 2)
+    return respostas
+
+
+def _listagem(rng: random.Random) -> Dict:
+    """Parâmetros variados de /perfumes"""
+    parametros = {"limit": rng.choice([10, 20, 50]), "offset": rng.choice([0, 0, 10, 20])}
+    if rng.random() < 0.5:
+        parametros["categoria"] = rng.choice(["masculinos", "femininos", "compartilhaveis"])
+    if rng.random() < 0.5:
+        parametros["fields"] = ",".join(rng.sample(CAMPOS_PUBLICOS, 3))
+    return parametros
+
+
+# nome -> função que monta os argumentos de httpx.AsyncClient.request
+CENARIOS: Dict[str, Callable[[random.Random], Dict]] = {
+    "recommend": lambda rng: {"method": "POST", "url": "/quiz/recommend", "json": _respostas_quiz(rng)},
+    "questions": lambda rng: {"method": "GET", "url": "/quiz/questions"},
+    "perfumes": lambda rng: {"method": "GET", "url": "/perfumes", "params": _listagem(rng)},
+}
+
+
+# ============ EXECUÇÃO ============
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    """Percentil por interpolação linear (lista já ordenada)"""
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+async def _requisitar(cliente: httpx.AsyncClient, argumentos: Dict) -> Tuple[float, str, Optional[str]]:
+    """Executa uma requisição: (latência em ms, resultado, origem da recomendação)"""
+    inicio = time.perf_counter()
+    try:
+        resposta = await cliente.request(**argumentos)
+    except httpx.HTTPError as e:
+        return (time.perf_counter() - inicio) * 1000, type(e).__name__, None
+    latencia = (time.perf_counter() - inicio) * 1000
+
+    origem = None
+    if resposta.status_code == 200 and argumentos["url"] == "/quiz/recommend":
+        origem = "gemini" if resposta.json().get("mensagem") == MENSAGEM_GEMINI else "fallback"
+    return latencia, str(resposta.status_code), origem
+
+
+async def executar_cenario(
+    cliente: httpx.AsyncClient,
+    nome: str,
+    requisicoes: int,
+    concorrencia: int,
+    aquecimento: int,
+    semente: int
+) -> Dict:
+    """Dispara ``requisicoes`` com ``concorrencia`` workers e resume os resultados"""
+    rng = random.Random(f"{semente}:{nome}")
+    montar = CENARIOS[nome]
+
+    for _ in range(aquecimento):
+        await _requisitar(cliente, montar(rng))
+
+    fila = [montar(rng) for _ in range(requisicoes)]
+    latencias: List[float] = []
+    por_resultado: Dict[str, List[float]] = {}
+    resultados = Counter()
+    origens = Counter()
+
+    async def worker():
+        while fila:
+            latencia, resultado, origem = await _requisitar(cliente, fila.pop())
+            latencias.append(latencia)
+            por_resultado.setdefault(origem or resultado, []).append(latencia)
+            resultados[resultado] += 1
+            if origem:
+                origens[origem] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    ordenadas = sorted(latencias)
+    resumo = {
+        "requisicoes": requisicoes,
+        "concorrencia": concorrencia,
+        "duracao_s": round(duracao, 3),
+        "rps": round(requisicoes / duracao, 1),
+        "sucesso": resultados.get("200", 0) + resultados.get("304", 0),
+        "erros": {r: n for r, n in sorted(resultados.items()) if r not in ("200", "304")},
+        "latencia_ms": {
+            "media": round(statistics.fmean(ordenadas), 2),
+            "p50": round(_percentil(ordenadas, 50), 2),
+            "p95": round(_percentil(ordenadas, 95), 2),
+            "p99": round(_percentil(ordenadas, 99), 2),
+            "max": round(ordenadas[-1], 2),
+        },
+    }
+    if origens:
+        resumo["origem"] = dict(origens)
+    if len(por_resultado) > 1:
+        resumo["latencia_por_resultado_ms"] = {
+            chave: {"p50": round(_percentil(sorted(valores), 50), 2), "p95": round(_percentil(sorted(valores), 95), 2)}
+            for chave, valores in sorted(por_resultado.items())
+        }
+    return resumo
+
+
+# ============ SERVIDORES ============
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_gemini_fake(args) -> Tuple[uvicorn.Server, str]:
+    """Servidor falso do Gemini em uma thread"""
+    porta = _porta_livre()
+    app = criar_app(
+        latencia=args.latencia,
+        erros=args.erros,
+        respostas=carregar_respostas(args.respostas) if args.respostas else None,
+        semente=args.semente,
+        timeout_s=args.timeout_gemini_s
+    )
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=porta, log_level="warning"))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+    return servidor, f"http://127.0.0.1:{porta}"
+
+
+def iniciar_api(url_gemini: Optional[str], args) -> Tuple[subprocess.Popen, str]:
+    """API em um processo separado, aguardando o /health"""
+    porta = _porta_livre()
+    env = dict(os.environ, PYTHONPATH=str(RAIZ_API), LOG_LEVEL="WARNING", GEMINI_FAKE="false")
+    if url_gemini:
+        env.update(CARGA_GEMINI_API_KEY="chave-carga", GEMINI_BASE_URL=url_gemini,
+                   GEMINI_TIMEOUT_LEITURA=str(args.timeout_gemini_s / 2))
+    processo = subprocess.Popen([sys.executable, "-c", LANCADOR_API, str(porta)], cwd=RAIZ_API, env=env)
+
+    url = f"http://127.0.0.1:{porta}"
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("A API terminou durante a inicialização")
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return processo, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("A API não respondeu ao /health em 30 s")
+
+
+# ============ RELATÓRIO ============
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ_API,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(relatorio: Dict):
+    print(f"\n{'cenário':<10} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'máx':>9}  erros / origem")
+    for nome, r in relatorio["cenarios"].items():
+        lat = r["latencia_ms"]
+        detalhes = ", ".join(f"{k}={v}" for k, v in {**r["erros"], **r.get("origem", {})}.items())
+        print(f"{nome:<10} {r['rps']:>8.1f} {lat['p50']:>7.1f}ms {lat['p95']:>7.1f}ms "
+              f"{lat['p99']:>7.1f}ms {lat['max']:>7.1f}ms  {detalhes or '-'}")
+        for chave, valores in r.get("latencia_por_resultado_ms", {}).items():
+            print(f"  └ {chave:<16} p50 {valores['p50']:>7.1f}ms  p95 {valores['p95']:>7.1f}ms")
+    if relatorio.get("gemini_fake"):
+        print(f"\nServidor Gemini falso: {relatorio['gemini_fake']}")
+
+
+def comparar(relatorio: Dict, base: Dict, tolerancia: float) -> List[str]:
+    """Regressões de RPS ou p95 acima da tolerância (em %) em relação à base"""
+    regressoes = []
+    print(f"\nComparação com {base.get('commit') or 'base'} ({base.get('gerado_em')}):")
+    for nome, atual in relatorio["cenarios"].items():
+        anterior = base.get("cenarios", {}).get(nome)
+        if not anterior:
+            continue
+        delta_rps = (atual["rps"] / anterior["rps"] - 1) * 100
+        delta_p95 = (atual["latencia_ms"]["p95"] / anterior["latencia_ms"]["p95"] - 1) * 100
+        print(f"  {nome:<10} rps {delta_rps:+6.1f}%   p95 {delta_p95:+6.1f}%")
+        if delta_rps < -tolerancia:
+            regressoes.append(f"{nome}: RPS {delta_rps:+.1f}%")
+        if delta_p95 > tolerancia:
+            regressoes.append(f"{nome}: p95 {delta_p95:+.1f}%")
+    return regressoes
+
+
+async def executar(args, url: str) -> Dict:
+    limites = httpx.Limits(max_connections=args.concorrencia, max_keepalive_connections=args.concorrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=args.timeout_s) as cliente:
+        return {
+            nome: await executar_cenario(
+                cliente, nome, args.requisicoes, args.concorrencia, args.aquecimento, args.semente
+            )
+            for nome in args.cenarios
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API do quiz")
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--requisicoes", type=int, default=500, help="requisições por cenário")
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--aquecimento", type=int, default=20, help="requisições descartadas por cenário")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="timeout do cliente de carga")
+    parser.add_argument("--url", help="API já em execução (não sobe API nem Gemini falso)")
+    parser.add_argument("--sem-gemini", action="store_true", help="API sem Gemini (fallback por regras)")
+    parser.add_argument("--latencia", default="lognormal:400,0.3", help="latência do Gemini falso")
+    parser.add_argument("--erros", help="falhas do Gemini falso (ex.: 429:0.02,timeout:0.01)")
+    parser.add_argument("--respostas", type=Path, help="JSONL de respostas prontas do Gemini falso")
+    parser.add_argument("--timeout-gemini-s", type=float, default=10.0,
+                        help="espera das falhas 'timeout' (a API usa metade como timeout de leitura)")
+    parser.add_argument("--saida", type=Path, help="grava o relatório JSON")
+    parser.add_argument("--base", type=Path, help="relatório anterior para comparação")
+    parser.add_argument("--tolerancia", type=float, default=10.0, help="regressão tolerada em %%")
+    args = parser.parse_args()
+
+    servidor_gemini = processo_api = None
+    url_gemini = None
+    try:
+        if args.url:
+            url = args.url.rstrip("/")
+        else:
+            if not args.sem_gemini:
+                servidor_gemini, url_gemini = iniciar_gemini_fake(args)
+            processo_api, url = iniciar_api(url_gemini, args)
+
+        cenarios = asyncio.run(executar(args, url))
+        estatisticas_gemini = httpx.get(f"{url_gemini}/_estatisticas").json() if url_gemini else None
+    finally:
+        if processo_api:
+            processo_api.terminate()
+            processo_api.wait()
+        if servidor_gemini:
+            servidor_gemini.should_exit = True
+
+    relatorio = {
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "configuracao": {
+            "url": args.url,
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+            "aquecimento": args.aquecimento,
+            "semente": args.semente,
+            "gemini": None if (args.url or args.sem_gemini) else {
+                "latencia": args.latencia,
+                "erros": args.erros,
+                "respostas": str(args.respostas) if args.respostas else None,
+            },
+        },
+        "gemini_fake": estatisticas_gemini,
+        "cenarios": cenarios,
+    }
+    imprimir(relatorio)
+
+    if args.saida:
+        args.saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Relatório gravado em {args.saida}")
+
+    if args.base:
+        regressoes = comparar(relatorio, json.loads(args.base.read_text(encoding="utf-8")), args.tolerancia)
+        if regressoes:
+            print("✗ Regressões: " + "; ".join(regressoes))
+            sys.exit(1)
+        print("✓ Sem regressões acima da tolerância")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Servidor HTTP que imita a API do Gemini
+=======================================
+Expõe as rotas da API REST do Gemini usadas pela aplicação
+(``generateContent``, ``models.get`` e ``cachedContents``), respondendo com o
+cliente falso de ``gemini_fake``. Serve para medir o transporte HTTP e rodar
+testes de carga sem rede.
+
+O ``generateContent`` pode simular:
+- latência com distribuição configurável (``--latencia``):
+  ``fixa:300``, ``uniforme:100,500``, ``normal:300,50``,
+  ``lognormal:300,0.5`` (mediana e sigma) ou ``exponencial:300`` (média);
+- falhas com taxas configuráveis (``--erros``): códigos HTTP
+  (``429:0.05,500:0.01``), ``timeout`` (não responde dentro do prazo),
+  ``json_invalido`` (texto fora do formato) e ``vazio`` (sem candidatos);
+- respostas prontas (``--respostas``): arquivo JSONL com um objeto de
+  recomendação por linha, servidos em rodízio no lugar do cliente falso.
+
+``GET /_estatisticas`` retorna as contagens de respostas por resultado.
+
+Uso:
+    python bench/gemini_servidor_fake.py --porta 8555 --latencia-ms 300
+    python bench/gemini_servidor_fake.py --latencia lognormal:800,0.4 --erros 429:0.02,timeout:0.01
+    python bench/gemini_servidor_fake.py --certfile cert.pem --keyfile key.pem
+
+Aponte a API para ele com ``GEMINI_BASE_URL=http://127.0.0.1:8555``.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.genai import errors  # noqa: E402
+
+from gemini_fake import ClienteGeminiFake  # noqa: E402
+
+# Falhas simuladas que não são códigos HTTP
+FALHAS_ESPECIAIS = ("timeout", "json_invalido", "vazio")
+
+# Status da API do Gemini para os códigos de erro simulados
+STATUS_ERRO = {
+    400: "INVALID_ARGUMENT",
+    403: "PERMISSION_DENIED",
+    404: "NOT_FOUND",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED",
+}
+
+
+def distribuicao_latencia(especificacao: str, rng: random.Random) -> Callable[[], float]:
+    """Sorteador de latência (em segundos) a partir de ``tipo:parametros`` em ms"""
+    tipo, _, parametros = especificacao.partition(":")
+    valores = [float(v) for v in parametros.split(",") if v]
+    if tipo == "fixa":
+        return lambda: valores[0] / 1000
+    if tipo == "uniforme":
+        return lambda: rng.uniform(valores[0], valores[1]) / 1000
+    if tipo == "normal":
+        return lambda: max(0.0, rng.gauss(valores[0], valores[1])) / 1000
+    if tipo == "lognormal":
+        mu = math.log(valores[0])
+        return lambda: rng.lognormvariate(mu, valores[1]) / 1000
+    if tipo == "exponencial":
+        return lambda: rng.expovariate(1 / valores[0]) / 1000
+    raise ValueError(f"Distribuição de latência desconhecida: {tipo}")
+
+
+def taxas_erro(especificacao: Optional[str]) -> Dict[str, float]:
+    """Converte ``429:0.05,timeout:0.01`` em {falha: probabilidade}"""
+    taxas = {}
+    for item in filter(None, (especificacao or "").split(",")):
+        falha, _, taxa = item.partition(":")
+        if falha not in FALHAS_ESPECIAIS and not falha.isdigit():
+            raise ValueError(f"Falha desconhecida: {falha}")
+        taxas[falha] = float(taxa)
+    if sum(taxas.values()) > 1:
+        raise ValueError("A soma das taxas de erro passa de 1")
+    return taxas
+
+
+def carregar_respostas(caminho: Path) -> List[str]:
+    """Respostas prontas (uma recomendação JSON por linha)"""
+    linhas = caminho.read_text(encoding="utf-8").splitlines()
+    return [json.dumps(json.loads(linha), ensure_ascii=False) for linha in linhas if linha.strip()]
+
+
+def _texto(conteudo) -> str:
+    """Concatena o texto de um Content (ou lista de Contents) da API REST"""
+    if not conteudo:
+        return ""
+    if isinstance(conteudo, dict):
+        conteudo = [conteudo]
+    return "".join(
+        parte.get("text", "")
+        for item in conteudo
+        for parte in item.get("parts", [])
+    )
+
+
+def _json(modelo) -> dict:
+    return modelo.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+def _erro(e: errors.APIError) -> JSONResponse:
+    return JSONResponse(e.details, status_code=e.code)
+
+
+def criar_app(
+    latencia_ms: float = 0.0,
+    latencia: Optional[str] = None,
+    erros: Optional[str] = None,
+    respostas: Optional[List[str]] = None,
+    semente: Optional[int] = None,
+    timeout_s: float = 120.0
+) -> Starlette:
+    """Aplicação Starlette com as rotas do Gemini"""
+    cliente = ClienteGeminiFake()
+    rng = random.Random(semente)
+    sortear_atraso = distribuicao_latencia(latencia or f"fixa:{latencia_ms}", rng)
+    taxas = taxas_erro(erros)
+    prontas = itertools.cycle(respostas) if respostas else None
+    estatisticas = Counter()
+
+    def sortear_falha() -> Optional[str]:
+        sorteio = rng.random()
+        for falha, taxa in taxas.items():
+            if sorteio < taxa:
+                return falha
+            sorteio -= taxa
+        return None
+
+    async def generate_content(request: Request):
+        modelo = request.path_params["modelo"]
+        corpo = await request.json()
+        config = {
+            "system_instruction": _texto(corpo.get("systemInstruction")),
+            "cached_content": corpo.get("cachedContent"),
+        }
+        falha = sortear_falha()
+        estatisticas[falha or "ok"] += 1
+
+        atraso = sortear_atraso()
+        if falha == "timeout":
+            atraso = timeout_s
+        if atraso:
+            await asyncio.sleep(atraso)
+
+        if falha and falha.isdigit():
+            codigo = int(falha)
+            status = STATUS_ERRO.get(codigo, "UNKNOWN")
+            return JSONResponse(
+                {"error": {"code": codigo, "message": f"Falha simulada ({status})", "status": status}},
+                status_code=codigo
+            )
+
+        try:
+            resposta = cliente.models.generate_content(modelo, _texto(corpo.get("contents")), config)
+        except errors.APIError as e:
+            return _erro(e)
+
+        dados = _json(resposta)
+        if falha == "vazio":
+            dados["candidates"] = []
+        elif falha == "json_invalido":
+            dados["candidates"][0]["content"]["parts"] = [{"text": "Desculpe, não consegui gerar as recomendações."}]
+        elif prontas is not None:
+            dados["candidates"][0]["content"]["parts"] = [{"text": next(prontas)}]
+        return JSONResponse(dados)
+
+    async def obter_estatisticas(request: Request):
+        return JSONResponse(dict(estatisticas))
+
+    async def obter_modelo(request: Request):
+        return JSONResponse({"name": f"models/{request.path_params['modelo']}"})
+
+    async def criar_cache(request: Request):
+        corpo = await request.json()
+        cache = cliente.caches.create(corpo.get("model", "").removeprefix("models/"), {
+            "display_name": corpo.get("displayName"),
+            "system_instruction": _texto(corpo.get("systemInstruction")),
+            "ttl": corpo.get("ttl"),
+        })
+        return JSONResponse(_json(cache))
+
+    async def cache_existente(request: Request):
+        nome = f"cachedContents/{request.path_params['id']}"
+        try:
+            if request.method == "DELETE":
+                cliente.caches.delete(nome)
+                return JSONResponse({})
+            if request.method == "PATCH":
+                corpo = await request.json()
+                return JSONResponse(_json(cliente.caches.update(nome, {"ttl": corpo.get("ttl")})))
+            return JSONResponse(_json(cliente.caches.get(nome)))
+        except errors.APIError as e:
+            return _erro(e)
+
+    return Starlette(routes=[
+        Route("/_estatisticas", obter_estatisticas, methods=["GET"]),
+        Route("/{versao}/models/{modelo}:generateContent", generate_content, methods=["POST"]),
+        Route("/{versao}/models/{modelo}", obter_modelo, methods=["GET"]),
+        Route("/{versao}/cachedContents", criar_cache, methods=["POST"]),
+        Route("/{versao}/cachedContents/{id}", cache_existente, methods=["GET", "PATCH", "DELETE"]),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso da API do Gemini")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8555)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Atraso fixo por generateContent")
+    parser.add_argument("--latencia", help="Distribuição da latência (ex.: lognormal:300,0.5)")
+    parser.add_argument("--erros", help="Taxas de falha (ex.: 429:0.05,500:0.01,timeout:0.01)")
+    parser.add_argument("--respostas", type=Path, help="JSONL com recomendações prontas")
+    parser.add_argument("--semente", type=int, help="Semente dos sorteios (reprodutibilidade)")
+    parser.add_argument("--timeout-s", type=float, default=120.0, help="Espera das falhas 'timeout'")
+    parser.add_argument("--certfile", help="Certificado TLS (habilita HTTPS)")
+    parser.add_argument("--keyfile", help="Chave privada TLS")
+    args = parser.parse_args()
+
+    app = criar_app(
+        args.latencia_ms,
+        latencia=args.latencia,
+        erros=args.erros,
+        respostas=carregar_respostas(args.respostas) if args.respostas else None,
+        semente=args.semente,
+        timeout_s=args.timeout_s
+    )
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.porta,
+        ssl_certfile=args.certfile,
+        ssl_keyfile=args.keyfile,
+        log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Orçamento de tempo de inicialização da API
+==========================================
+Mede, em processos novos, o tempo do ``import main`` até o primeiro
+``GET /health`` respondido (startup concluído) e até o cliente do Gemini
+ficar pronto (criado em segundo plano). Compara o carregamento do catálogo
+pelo JSON e pelo snapshot binário, e falha (código de saída 1) se a mediana
+com snapshot passar do orçamento.
+
+Uso:
+    python bench/inicializacao.py --repeticoes 5 --orcamento-ms 1000
+    python bench/inicializacao.py --perfumes 10000   # catálogo sintético
+
+Por padrão usa o cliente Gemini falso (``GEMINI_FAKE=true``), que importa o
+mesmo SDK que o cliente real, sem acesso à rede.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ_API = Path(__file__).resolve().parent.parent
+CATALOGO_PADRAO = RAIZ_API.parent / "scrapper" / "perfumes.json"
+
+# Executado em um interpretador novo a cada repetição
+CODIGO_FILHO = """
+import json, time
+inicio = time.perf_counter()
+import main
+importado = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as cliente:
+    assert cliente.get("/health").status_code == 200
+    pronto = time.perf_counter()
+    cliente.portal.call(main.gemini_service._aguardar_cliente)
+    gemini = time.perf_counter()
+    perfumes = main.gemini_service.perfumes_count
+print(json.dumps({
+    "import_ms": (importado - inicio) * 1000,
+    "pronto_ms": (pronto - inicio) * 1000,
+    "gemini_ms": (gemini - inicio) * 1000,
+    "perfumes": perfumes,
+}))
+"""
+
+
+def perfumes_sinteticos(quantidade: int) -> list:
+    """Catálogo sintético replicando os perfumes reais até a quantidade pedida"""
+    base = json.loads(CATALOGO_PADRAO.read_text(encoding="utf-8"))
+    perfumes = []
+    for i in range(quantidade):
+        p = dict(base[i % len(base)])
+        p["nome"] = f"{p['nome']} #{i}"
+        perfumes.append(p)
+    return perfumes
+
+
+def gerar_catalogo(destino: Path, quantidade: int):
+    """Grava um catálogo sintético em ``destino``"""
+    destino.write_text(json.dumps(perfumes_sinteticos(quantidade), ensure_ascii=False), encoding="utf-8")
+
+
+def medir(env: dict, repeticoes: int) -> dict:
+    """Medianas de ``repeticoes`` inicializações em processos novos"""
+    amostras = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", CODIGO_FILHO],
+            cwd=RAIZ_API, env=env, capture_output=True, text=True, check=True
+        )
+        amostras.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return {
+        chave: statistics.median(a[chave] for a in amostras)
+        for chave in ("import_ms", "pronto_ms", "gemini_ms", "perfumes")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de inicialização")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--orcamento-ms", type=float,
+                        default=float(os.getenv("ORCAMENTO_INICIALIZACAO_MS", "1000")),
+                        help="limite para a mediana import -> /health (com snapshot)")
+    parser.add_argument("--perfumes", type=int, help="gera um catálogo sintético com N perfumes")
+    parser.add_argument("--gemini-real", action="store_true",
+                        help="não força GEMINI_FAKE (usa a configuração do ambiente)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        catalogo = Path(pasta) / "perfumes.json"
+        if args.perfumes:
+            gerar_catalogo(catalogo, args.perfumes)
+        else:
+            catalogo.write_bytes(CATALOGO_PADRAO.read_bytes())
+        snapshot = catalogo.with_suffix(".snapshot")
+
+        env = dict(os.environ, PYTHONPATH=str(RAIZ_API), PERFUMES_JSON_PATH=str(catalogo),
+                   PERFUMES_SNAPSHOT_PATH=str(snapshot), LOG_LEVEL="WARNING")
+        if not args.gemini_real:
+            env["GEMINI_FAKE"] = "true"
+
+        resultados = {"json": medir(env, args.repeticoes)}
+        subprocess.run([sys.executable, "catalogo.py", str(catalogo), "-o", str(snapshot)],
+                       cwd=RAIZ_API, env=env, check=True, capture_output=True)
+        resultados["snapshot"] = medir(env, args.repeticoes)
+
+    print(f"{'catálogo':<10} {'perfumes':>9} {'import':>9} {'/health':>9} {'gemini':>9}")
+    for nome, r in resultados.items():
+        print(f"{nome:<10} {r['perfumes']:>9.0f} {r['import_ms']:>7.0f}ms "
+              f"{r['pronto_ms']:>7.0f}ms {r['gemini_ms']:>7.0f}ms")
+
+    pronto = resultados["snapshot"]["pronto_ms"]
+    if pronto > args.orcamento_ms:
+        print(f"✗ Inicialização em {pronto:.0f} ms excede o orçamento de {args.orcamento_ms:.0f} ms")
+        sys.exit(1)
+    print(f"✓ Inicialização em {pronto:.0f} ms (orçamento: {args.orcamento_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
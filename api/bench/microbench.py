@@ -0,0 +1,224 @@
+"""
+Microbenchmarks do catálogo e da pontuação
+==========================================
+Mede as funções internas usadas em cada recomendação contra o
+``perfumes.json`` real e contra catálogos sintéticos de 1k/10k/100k
+perfumes, e estima como cada uma escala (inclinação log-log entre o menor e
+o maior catálogo sintético: ~1 é linear, >1 é superlinear).
+
+Os resultados podem ser gravados e comparados com uma execução anterior;
+funções mais lentas que a base além da tolerância são sinalizadas.
+
+Uso:
+    python bench/microbench.py --saida base.json
+    python bench/microbench.py --base base.json --tolerancia 20
+    python bench/microbench.py --tamanhos 1000 10000 --funcoes find_perfume_ausente
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from starlette.requests import Request
+
+RAIZ_API = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ_API))
+
+# Sem efeitos colaterais do .env local (a instância não cria cliente Gemini)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from bench.inicializacao import CATALOGO_PADRAO, perfumes_sinteticos  # noqa: E402
+from catalogo import Catalogo  # noqa: E402
+from gemini_service import GeminiService  # noqa: E402
+from models import QuizAnswers  # noqa: E402
+from quiz_service import QuizService  # noqa: E402
+
+RESPOSTAS = QuizAnswers(
+    genero="masculino",
+    ocasiao="noite",
+    estacao="inverno",
+    intensidade="intensa",
+    familia_olfativa="amadeirado",
+    personalidade="misterioso",
+    faixa_preco="ate_150",
+    notas_preferidas=["oud", "baunilha"],
+    observacoes="Algo marcante para a noite"
+)
+
+
+def _requisicao(cabecalhos: Dict[str, str]) -> Request:
+    """Requisição mínima para os recursos estáticos (só cabeçalhos)"""
+    return Request({
+        "type": "http",
+        "headers": [(nome.encode(), valor.encode()) for nome, valor in cabecalhos.items()],
+    })
+
+
+# GET /quiz/questions como um navegador (negocia br/gzip) e revalidando o ETag
+REQUISICAO_PERGUNTAS = _requisicao({"accept-encoding": "gzip, deflate, br, zstd"})
+
+
+def _servico(catalogo: Catalogo) -> GeminiService:
+    """GeminiService com o catálogo dado e sem cliente (apenas funções internas)"""
+    servico = GeminiService()
+    servico.catalogo = catalogo
+    return servico
+
+
+def casos(servico: GeminiService, quiz: QuizService) -> Dict[str, Callable[[], object]]:
+    """Funções medidas para um catálogo"""
+    perfumes = servico.catalogo.perfumes
+    ultimo = perfumes[-1]
+    _, _, etag = quiz.recurso_perguntas.negociar(REQUISICAO_PERGUNTAS.headers.get("accept-encoding"))
+    revalidacao = _requisicao({"accept-encoding": "gzip, deflate, br, zstd", "if-none-match": etag})
+    return {
+        "build_perfumes_context": servico._build_perfumes_context,
+        "build_quiz_context": lambda: servico._build_quiz_context(RESPOSTAS),
+        # Pior caso da busca exata: o último perfume do catálogo
+        "find_perfume_exato": lambda: servico._find_perfume(ultimo.nome),
+        # Nome inexistente: percorre as três buscas inteiras
+        "find_perfume_ausente": lambda: servico._find_perfume("Perfume Inexistente Xyzw"),
+        "fallback_recommendations": lambda: servico._fallback_recommendations(RESPOSTAS),
+        "generate_fallback_reason": lambda: servico._generate_fallback_reason(ultimo, RESPOSTAS),
+        "build_questions": quiz._build_questions,
+        "responder_perguntas": lambda: quiz.recurso_perguntas.responder(REQUISICAO_PERGUNTAS),
+        "responder_perguntas_304": lambda: quiz.recurso_perguntas.responder(revalidacao),
+    }
+
+
+def cronometrar(funcao: Callable[[], object], repeticoes: int, tempo_minimo: float) -> Dict:
+    """Como o timeit: calibra o número de laços e devolve o tempo por chamada (µs)"""
+    lacos = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(lacos):
+            funcao()
+        decorrido = time.perf_counter() - inicio
+        if decorrido >= tempo_minimo or lacos >= 1_000_000:
+            break
+        lacos *= 10 if decorrido < tempo_minimo / 10 else 2
+
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(lacos):
+            funcao()
+        amostras.append((time.perf_counter() - inicio) / lacos * 1e6)
+    return {
+        "mediana_us": round(statistics.median(amostras), 3),
+        "min_us": round(min(amostras), 3),
+        "lacos": lacos,
+    }
+
+
+def _inclinacao(resultados: Dict[str, Dict], tamanhos: List[int]) -> Optional[float]:
+    """Expoente de escala entre o menor e o maior catálogo sintético"""
+    if len(tamanhos) < 2:
+        return None
+    menor, maior = min(tamanhos), max(tamanhos)
+    t_menor = resultados[str(menor)]["mediana_us"]
+    t_maior = resultados[str(maior)]["mediana_us"]
+    return round(math.log(t_maior / t_menor) / math.log(maior / menor), 2)
+
+
+def executar(args) -> Dict:
+    quiz = QuizService()
+    catalogos = {"real": Catalogo.carregar(CATALOGO_PADRAO)}
+    for tamanho in args.tamanhos:
+        inicio = time.perf_counter()
+        catalogos[str(tamanho)] = Catalogo(perfumes_sinteticos(tamanho))
+        print(f"Catálogo sintético de {tamanho} perfumes montado em {time.perf_counter() - inicio:.1f} s")
+
+    resultados: Dict[str, Dict] = {}
+    for nome_catalogo, catalogo in catalogos.items():
+        for nome, funcao in casos(_servico(catalogo), quiz).items():
+            if args.funcoes and nome not in args.funcoes:
+                continue
+            medida = cronometrar(funcao, args.repeticoes, args.tempo_minimo)
+            resultados.setdefault(nome, {})[nome_catalogo] = medida
+            print(f"  {nome:<26} {nome_catalogo:>7}: {medida['mediana_us']:>14,.1f} µs")
+
+    for medidas in resultados.values():
+        medidas["inclinacao"] = _inclinacao(medidas, args.tamanhos)
+    return resultados
+
+
+def imprimir(resultados: Dict, tamanhos: List[int]):
+    colunas = ["real"] + [str(t) for t in tamanhos]
+    print("\nMediana por chamada (µs):")
+    print(f"{'função':<26}" + "".join(f"{c:>14}" for c in colunas) + f"{'escala':>9}")
+    for nome, medidas in resultados.items():
+        linha = "".join(f"{medidas[c]['mediana_us']:>14,.1f}" if c in medidas else f"{'-':>14}" for c in colunas)
+        inclinacao = medidas.get("inclinacao")
+        print(f"{nome:<26}{linha}{inclinacao if inclinacao is not None else '-':>9}")
+
+
+def comparar(resultados: Dict, base: Dict, tolerancia: float) -> List[str]:
+    """Medições mais lentas que a base além da tolerância (em %)"""
+    regressoes = []
+    print(f"\nComparação com {base.get('commit') or 'base'} ({base.get('gerado_em')}):")
+    for nome, medidas in resultados.items():
+        anteriores = base.get("resultados", {}).get(nome, {})
+        for catalogo, medida in medidas.items():
+            anterior = anteriores.get(catalogo)
+            if catalogo == "inclinacao" or not anterior:
+                continue
+            delta = (medida["mediana_us"] / anterior["mediana_us"] - 1) * 100
+            marca = "✗" if delta > tolerancia else " "
+            print(f" {marca} {nome:<26} {catalogo:>7}: {delta:+7.1f}%")
+            if delta > tolerancia:
+                regressoes.append(f"{nome} [{catalogo}] {delta:+.1f}%")
+    return regressoes
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ_API,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks do catálogo e da pontuação")
+    parser.add_argument("--tamanhos", type=int, nargs="*", default=[1000, 10000, 100000],
+                        help="tamanhos dos catálogos sintéticos")
+    parser.add_argument("--funcoes", nargs="*", help="mede apenas estas funções")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--tempo-minimo", type=float, default=0.2, help="duração mínima de cada amostra (s)")
+    parser.add_argument("--saida", type=Path, help="grava os resultados em JSON")
+    parser.add_argument("--base", type=Path, help="resultados anteriores para comparação")
+    parser.add_argument("--tolerancia", type=float, default=20.0, help="regressão tolerada em %%")
+    args = parser.parse_args()
+
+    resultados = executar(args)
+    imprimir(resultados, args.tamanhos)
+
+    if args.saida:
+        args.saida.write_text(json.dumps({
+            "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "tamanhos": args.tamanhos,
+            "resultados": resultados,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Resultados gravados em {args.saida}")
+
+    if args.base:
+        regressoes = comparar(resultados, json.loads(args.base.read_text(encoding="utf-8")), args.tolerancia)
+        if regressoes:
+            print("✗ Regressões: " + "; ".join(regressoes))
+            sys.exit(1)
+        print("✓ Sem regressões acima da tolerância")
+
+
+if __name__ == "__main__":
+    main()
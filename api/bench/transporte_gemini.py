@@ -0,0 +1,128 @@
+"""
+Benchmark do transporte HTTP do Gemini
+======================================
+Compara a latência da primeira requisição e do regime estável entre o
+cliente ``genai`` com transporte padrão e o ``TransporteGemini`` (pool,
+keep-alive, HTTP/2 e aquecimento), contra o servidor falso em HTTPS local.
+
+Uso:
+    python bench/transporte_gemini.py --requisicoes 200 --concorrencia 10
+
+Gera um certificado autoassinado temporário com o ``openssl`` da máquina.
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google import genai  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from bench.gemini_servidor_fake import criar_app  # noqa: E402
+from transporte import ConfigTransporte, TransporteGemini  # noqa: E402
+
+MODELO = "gemini-2.0-flash"
+PROMPT = "RESPOSTAS DO QUIZ:\n- Gênero preferido: masculino\n"
+SISTEMA = "\n".join(f"{i}. Perfume {i}" for i in range(1, 66))
+
+
+def gerar_certificado(pasta: Path):
+    """Certificado autoassinado para 127.0.0.1"""
+    cert, chave = pasta / "cert.pem", pasta / "key.pem"
+    subprocess.run([
+        "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+        "-keyout", str(chave), "-out", str(cert), "-days", "1",
+        "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"
+    ], check=True, capture_output=True)
+    return cert, chave
+
+
+def iniciar_servidor(porta: int, cert: Path, chave: Path, latencia_ms: float) -> uvicorn.Server:
+    config = uvicorn.Config(
+        criar_app(latencia_ms), host="127.0.0.1", port=porta,
+        ssl_certfile=str(cert), ssl_keyfile=str(chave), log_level="warning"
+    )
+    servidor = uvicorn.Server(config)
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+    return servidor
+
+
+async def medir(client, requisicoes: int, concorrencia: int, aquecer: bool) -> dict:
+    config = {"system_instruction": SISTEMA, "temperature": 0.7}
+
+    async def chamar() -> float:
+        inicio = time.perf_counter()
+        await client.aio.models.generate_content(model=MODELO, contents=PROMPT, config=config)
+        return (time.perf_counter() - inicio) * 1000
+
+    aquecimento = 0.0
+    if aquecer:
+        inicio = time.perf_counter()
+        await client.aio.models.get(model=MODELO)
+        aquecimento = (time.perf_counter() - inicio) * 1000
+
+    primeira = await chamar()
+
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def limitada() -> float:
+        async with semaforo:
+            return await chamar()
+
+    inicio = time.perf_counter()
+    tempos = sorted(await asyncio.gather(*(limitada() for _ in range(requisicoes))))
+    duracao = time.perf_counter() - inicio
+    return {
+        "aquecimento_ms": round(aquecimento, 1),
+        "primeira_ms": round(primeira, 1),
+        "p50_ms": round(statistics.median(tempos), 1),
+        "p95_ms": round(tempos[int(len(tempos) * 0.95) - 1], 1),
+        "rps": round(requisicoes / duracao, 1),
+    }
+
+
+async def executar(args, url: str, cert: Path):
+    padrao = genai.Client(api_key="fake", http_options=types.HttpOptions(
+        base_url=url,
+        client_args={"verify": str(cert)},
+        async_client_args={"verify": str(cert)}
+    ))
+    transporte = TransporteGemini(ConfigTransporte(base_url=url, verify=str(cert)))
+    ajustado = genai.Client(api_key="fake", http_options=transporte.http_options())
+
+    print(f"Transporte ajustado: {transporte.descricao()}")
+    print("padrão:  ", await medir(padrao, args.requisicoes, args.concorrencia, aquecer=False))
+    print("ajustado:", await medir(ajustado, args.requisicoes, args.concorrencia, aquecer=True))
+    await transporte.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do transporte HTTP do Gemini")
+    parser.add_argument("--porta", type=int, default=8556)
+    parser.add_argument("--requisicoes", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=10)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Atraso simulado do servidor")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        cert, chave = gerar_certificado(Path(pasta))
+        servidor = iniciar_servidor(args.porta, cert, chave, args.latencia_ms)
+        try:
+            asyncio.run(executar(args, f"https://127.0.0.1:{args.porta}", cert))
+        finally:
+            servidor.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
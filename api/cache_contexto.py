@@ -0,0 +1,155 @@
+"""
+Cache de contexto do Gemini para o bloco do catálogo
+====================================================
+O bloco estático do prompt (papel do consultor, catálogo e instruções de
+resposta) é enviado uma única vez como *cached content* do Gemini; cada
+recomendação referencia o cache e envia apenas as respostas do quiz.
+
+O cache é identificado pelo hash do bloco: é recriado quando o catálogo
+muda e renovado (extensão do TTL) pouco antes de expirar.
+
+Variáveis de ambiente:
+- ``GEMINI_CACHE_CONTEXTO``: ``true`` (padrão) ou ``false``
+- ``GEMINI_CACHE_TTL``: TTL do cache em segundos (padrão: 3600)
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+from metricas import registrar_cache
+
+logger = logging.getLogger("cache_contexto")
+
+
+class CacheContexto:
+    """Ciclo de vida do cached content do catálogo"""
+
+    def __init__(
+        self,
+        modelo: str,
+        ttl_segundos: Optional[int] = None,
+        margem_renovacao: int = 300,
+        espera_apos_falha: int = 600,
+        relogio: Callable[[], float] = time.time
+    ):
+        self.modelo = modelo
+        self.ttl = ttl_segundos or int(os.getenv("GEMINI_CACHE_TTL", "3600"))
+        self.habilitado = os.getenv("GEMINI_CACHE_CONTEXTO", "true").lower() == "true"
+        self.margem_renovacao = min(margem_renovacao, self.ttl // 2)
+        self.espera_apos_falha = espera_apos_falha
+        self.relogio = relogio
+
+        self.conteudo: Optional[str] = None
+        self.chave: Optional[str] = None
+
+        # Estado do cache remoto
+        self.nome: Optional[str] = None
+        self._chave_remota: Optional[str] = None
+        self._expira_em = 0.0
+        self._tentar_apos = 0.0
+        self._lock = asyncio.Lock()
+
+    def definir_conteudo(self, conteudo: str):
+        """Define o bloco estático (chamado ao carregar o catálogo)"""
+        self.conteudo = conteudo
+        self.chave = hashlib.sha256(f"{self.modelo}\n{conteudo}".encode()).hexdigest()[:16]
+        self._tentar_apos = 0.0
+
+    def invalidar(self):
+        """Esquece o cache atual (ex.: expirado ou removido no servidor)"""
+        self.nome = None
+        self._chave_remota = None
+        self._expira_em = 0.0
+
+    def _valido(self, agora: float) -> bool:
+        return (
+            self.nome is not None
+            and self._chave_remota == self.chave
+            and agora < self._expira_em - self.margem_renovacao
+        )
+
+    async def obter_nome(self, client) -> Optional[str]:
+        """Nome do cached content atual, criando ou renovando se necessário.
+
+        Retorna None quando o cache está desabilitado ou indisponível; nesse
+        caso o bloco deve ser enviado inline.
+        """
+        if not self.habilitado or client is None or not self.conteudo:
+            return None
+
+        agora = self.relogio()
+        if self._valido(agora):
+            registrar_cache("gemini_contexto", True)
+            return self.nome
+        if agora < self._tentar_apos:
+            return None
+
+        async with self._lock:
+            agora = self.relogio()
+            if self._valido(agora):
+                registrar_cache("gemini_contexto", True)
+                return self.nome
+
+            registrar_cache("gemini_contexto", False)
+            try:
+                if self.nome and self._chave_remota == self.chave:
+                    await self._renovar(client)
+                else:
+                    await self._criar(client)
+            except Exception as e:
+                logger.warning("Cache de contexto indisponível (%s: %s) - usando prompt inline",
+                               type(e).__name__, e)
+                self.invalidar()
+                self._tentar_apos = agora + self.espera_apos_falha
+                return None
+
+            return self.nome
+
+    async def _criar(self, client):
+        """Cria o cached content e remove o anterior (catálogo antigo)"""
+        from google.genai import types
+        anterior = self.nome
+        cache = await client.aio.caches.create(
+            model=self.modelo,
+            config=types.CreateCachedContentConfig(
+                display_name=f"catalogo-{self.chave}",
+                system_instruction=self.conteudo,
+                ttl=f"{self.ttl}s"
+            )
+        )
+        self.nome = cache.name
+        self._chave_remota = self.chave
+        self._expira_em = self._expiracao(cache)
+        logger.info("Cache de contexto criado: %s (catálogo %s)", self.nome, self.chave)
+
+        if anterior:
+            try:
+                await client.aio.caches.delete(name=anterior)
+            except Exception as e:
+                logger.debug("Falha ao remover cache anterior %s: %s", anterior, e)
+
+    async def _renovar(self, client):
+        """Estende o TTL do cache atual; recria se ele não existir mais"""
+        from google.genai import types
+        try:
+            cache = await client.aio.caches.update(
+                name=self.nome,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s")
+            )
+        except Exception as e:
+            logger.info("Falha ao renovar cache %s (%s) - recriando", self.nome, e)
+            self.nome = None
+            await self._criar(client)
+            return
+        self._expira_em = self._expiracao(cache)
+        logger.debug("Cache de contexto renovado: %s", self.nome)
+
+    def _expiracao(self, cache) -> float:
+        """Instante de expiração informado pelo servidor (ou estimado pelo TTL)"""
+        expire_time = getattr(cache, "expire_time", None)
+        if expire_time is not None:
+            return expire_time.timestamp()
+        return self.relogio() + self.ttl
@@ -0,0 +1,360 @@
+"""
+Catálogo de perfumes em memória
+================================
+Representação compacta do catálogo usada pela API.
+
+Os campos usados na pontuação e nas respostas ficam em registros com
+``__slots__``. As avaliações dos clientes não fazem parte do registro: o
+scraper grava à parte os agregados por perfume (``perfumes_avaliacoes.json``,
+chave = ``link_produto``) e o catálogo copia deles só a quantidade de
+avaliações, a nota média e as menções a fixação, projeção etc., usadas na
+pontuação. Sem o arquivo, os perfumes ficam sem avaliações.
+
+Registros que não passam na validação são registrados no log e ignorados; o
+``publicar.py --verificar`` aponta os mesmos problemas antes da publicação.
+
+Snapshot binário
+----------------
+Para acelerar a inicialização, o catálogo já validado pode ser gravado em um
+snapshot (gerado no build da imagem com ``python catalogo.py``) e lido via
+mmap, sem parsear o JSON nem validar os registros novamente. O snapshot
+guarda o tamanho e o mtime do JSON de origem e dos agregados e é ignorado se
+estiver desatualizado.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from models import PerfumeBase, PerfumeRecomendado
+
+logger = logging.getLogger("catalogo")
+
+
+# Campos copiados do JSON para o registro compacto
+CAMPOS_QUENTES = (
+    "nome",
+    "categoria",
+    "preco",
+    "preco_pix",
+    "preco_original",
+    "parcelamento",
+    "descricao",
+    "inspiracao",
+    "volume",
+    "notas_topo",
+    "notas_coracao",
+    "notas_fundo",
+    "imagem_url",
+    "link_produto",
+    "desconto",
+)
+
+# Agregados das avaliações exibidos junto com o perfume
+CAMPOS_AVALIACAO = ("avaliacoes_total", "nota_media")
+
+# Campos que podem ser pedidos na listagem
+CAMPOS_PUBLICOS = CAMPOS_QUENTES + CAMPOS_AVALIACAO
+
+# Campos com poucos valores distintos - internados para compartilhar a string
+CAMPOS_INTERNADOS = ("categoria", "volume", "desconto", "parcelamento", "preco", "preco_pix", "preco_original")
+
+# Cabeçalho do snapshot: assinatura, versão do formato e tamanho do bloco quente
+ASSINATURA_SNAPSHOT = b"JACATLG\0"
+FORMATO_SNAPSHOT = 2
+CABECALHO_SNAPSHOT = struct.Struct("<8sHQ")
+
+
+class Perfume:
+    """Registro compacto de um perfume do catálogo"""
+
+    __slots__ = CAMPOS_QUENTES + CAMPOS_AVALIACAO + (
+        "mencoes",
+        "indice",
+        "nome_lower",
+        "descricao_lower",
+        "notas_lower",
+        "base",
+        "fragmento_json",
+        "_catalogo",
+    )
+
+    def __init__(self, dados: Dict, indice: int, catalogo: "Catalogo", avaliacao: Optional[Dict] = None):
+        for campo in CAMPOS_QUENTES:
+            valor = dados.get(campo)
+            if valor is not None and campo in CAMPOS_INTERNADOS:
+                valor = sys.intern(valor)
+            setattr(self, campo, valor)
+
+        if self.categoria is None:
+            self.categoria = ""
+
+        self.indice = indice
+        self._catalogo = catalogo
+
+        avaliacao = avaliacao or {}
+        self.avaliacoes_total = avaliacao.get("total") or 0
+        self.nota_media = avaliacao.get("nota_media")
+        self.mencoes = avaliacao.get("mencoes") or {}
+
+        # Campos da recomendação validados e serializados uma única vez;
+        # o fragmento é o objeto JSON sem o "}" final
+        campos = {campo: getattr(self, campo) for campo in CAMPOS_QUENTES}
+        PerfumeBase.model_validate(campos)
+        self.base = campos
+        self.fragmento_json = orjson.dumps(self.base)[:-1]
+
+        # Textos normalizados usados na busca e no sistema de regras
+        self.nome_lower = self.nome.lower()
+        self.descricao_lower = (self.descricao or "").lower()
+        self.notas_lower = " ".join([
+            self.notas_topo or "",
+            self.notas_coracao or "",
+            self.notas_fundo or ""
+        ]).lower()
+
+    @classmethod
+    def restaurar(cls, estado: tuple, catalogo: "Catalogo") -> "Perfume":
+        """Recria o registro a partir do estado gravado no snapshot"""
+        perfume = cls.__new__(cls)
+        for campo, valor in zip(_CAMPOS_ESTADO, estado):
+            setattr(perfume, campo, valor)
+        perfume._catalogo = catalogo
+        return perfume
+
+    def estado(self) -> tuple:
+        """Valores dos slots (exceto a referência ao catálogo) para o snapshot"""
+        return tuple(getattr(self, campo) for campo in _CAMPOS_ESTADO)
+
+    def projetar(self, campos: Optional[List[str]] = None) -> Dict:
+        """Converte o registro apenas com os campos pedidos"""
+        if campos is None:
+            return self.to_dict()
+        return {campo: getattr(self, campo) for campo in campos}
+
+    def recomendar(self, match_score: float, motivo: str) -> PerfumeRecomendado:
+        """Cria a recomendação a partir dos campos pré-validados"""
+        recomendacao = PerfumeRecomendado.model_construct(
+            **self.base,
+            match_score=match_score,
+            motivo_recomendacao=motivo
+        )
+        recomendacao._fragmento = self.fragmento_json
+        return recomendacao
+
+    def to_dict(self) -> Dict:
+        """Converte o registro para o formato do JSON original, com os agregados das avaliações"""
+        return {campo: getattr(self, campo) for campo in CAMPOS_PUBLICOS}
+
+    def __repr__(self) -> str:
+        return f"Perfume(nome={self.nome!r}, categoria={self.categoria!r})"
+
+
+# Slots gravados no snapshot (a referência ao catálogo é refeita na leitura)
+_CAMPOS_ESTADO = tuple(campo for campo in Perfume.__slots__ if campo != "_catalogo")
+
+
+def _assinatura_origem(caminho: Path) -> Tuple[int, int]:
+    """Tamanho e mtime do JSON de origem, usados para detectar snapshot desatualizado"""
+    info = caminho.stat()
+    return info.st_size, info.st_mtime_ns
+
+
+def _assinatura_avaliacoes(caminho: Optional[Path]) -> Optional[Tuple[int, int]]:
+    """Assinatura dos agregados (None se o arquivo não existe)"""
+    if caminho is None or not caminho.exists():
+        return None
+    return _assinatura_origem(caminho)
+
+
+def ler_avaliacoes(caminho: Optional[Path]) -> Tuple[bytes, Dict[str, Dict]]:
+    """Conteúdo bruto e agregados por ``link_produto`` (vazios se o arquivo não existe ou é inválido)"""
+    if caminho is None or not caminho.exists():
+        return b"", {}
+    bruto = caminho.read_bytes()
+    try:
+        agregados = orjson.loads(bruto)
+    except orjson.JSONDecodeError as e:
+        logger.warning("Avaliações %s ignoradas: %s", caminho, e)
+        return b"", {}
+    if not isinstance(agregados, dict):
+        logger.warning("Avaliações %s ignoradas: o arquivo deve conter um objeto", caminho)
+        return b"", {}
+    return bruto, {link: dados for link, dados in agregados.items() if isinstance(dados, dict)}
+
+
+def versao_catalogo(bruto: bytes, bruto_avaliacoes: bytes = b"") -> str:
+    """Versão do catálogo: hash do JSON e dos agregados das avaliações"""
+    return hashlib.sha256(bruto + b"\0" + bruto_avaliacoes).hexdigest()[:16]
+
+
+class Catalogo:
+    """Catálogo de perfumes com índice por categoria"""
+
+    def __init__(self, dados: List[Dict], caminho: Optional[Path] = None, versao: str = "vazio",
+                 avaliacoes: Optional[Dict[str, Dict]] = None, caminho_avaliacoes: Optional[Path] = None):
+        self.caminho = caminho
+        self.caminho_avaliacoes = caminho_avaliacoes
+        self.versao = versao
+        avaliacoes = avaliacoes or {}
+        self.perfumes: List[Perfume] = []
+        for posicao, dados_perfume in enumerate(dados):
+            # Um registro inválido é ignorado sem derrubar o restante do catálogo
+            try:
+                perfume = Perfume(dados_perfume, len(self.perfumes), self,
+                                  avaliacoes.get(dados_perfume.get("link_produto")))
+            except (ValidationError, TypeError, AttributeError) as e:
+                logger.warning("Perfume %d ignorado (registro inválido): %s", posicao, e)
+                continue
+            self.perfumes.append(perfume)
+        self._indexar()
+
+    def _indexar(self):
+        self.por_categoria: Dict[str, List[Perfume]] = {}
+        for p in self.perfumes:
+            self.por_categoria.setdefault(p.categoria, []).append(p)
+
+    @classmethod
+    def carregar(cls, caminho: Path, snapshot: Optional[Path] = None) -> "Catalogo":
+        """Carrega o catálogo a partir do perfumes.json gerado pelo scraper.
+
+        Os agregados das avaliações vêm de ``caminho_avaliacoes(caminho)``.
+        Se ``snapshot`` existir e corresponder aos dois arquivos, é usado no
+        lugar deles.
+        """
+        avaliacoes = caminho_avaliacoes(caminho)
+        if snapshot is not None and snapshot.exists():
+            try:
+                return cls.ler_snapshot(snapshot, caminho, avaliacoes)
+            except (ValueError, OSError, pickle.UnpicklingError) as e:
+                logger.warning("Snapshot %s ignorado: %s", snapshot, e)
+
+        bruto = caminho.read_bytes()
+        bruto_avaliacoes, agregados = ler_avaliacoes(avaliacoes)
+        return cls(json.loads(bruto), caminho, versao_catalogo(bruto, bruto_avaliacoes), agregados, avaliacoes)
+
+    @classmethod
+    def ler_snapshot(cls, snapshot: Path, caminho: Optional[Path] = None,
+                     avaliacoes: Optional[Path] = None) -> "Catalogo":
+        """Lê o snapshot via mmap; ValueError se inválido ou desatualizado"""
+        with open(snapshot, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                if len(m) < CABECALHO_SNAPSHOT.size:
+                    raise ValueError("arquivo truncado")
+                assinatura, formato, tamanho = CABECALHO_SNAPSHOT.unpack_from(m)
+                if assinatura != ASSINATURA_SNAPSHOT:
+                    raise ValueError("não é um snapshot do catálogo")
+                if formato != FORMATO_SNAPSHOT:
+                    raise ValueError(f"formato {formato} (esperado {FORMATO_SNAPSHOT})")
+
+                inicio = CABECALHO_SNAPSHOT.size
+                with memoryview(m) as visao, visao[inicio:inicio + tamanho] as bloco:
+                    quente = pickle.loads(bloco)
+
+        if quente["campos"] != _CAMPOS_ESTADO:
+            raise ValueError("campos do registro mudaram desde a geração")
+        if caminho is not None and caminho.exists() and tuple(quente["origem"]) != _assinatura_origem(caminho):
+            raise ValueError(f"desatualizado em relação a {caminho}")
+        if caminho is not None and quente["origem_avaliacoes"] != _assinatura_avaliacoes(avaliacoes):
+            raise ValueError(f"desatualizado em relação a {avaliacoes}")
+
+        catalogo = cls([], caminho, quente["versao"], caminho_avaliacoes=avaliacoes)
+        catalogo.perfumes = [Perfume.restaurar(estado, catalogo) for estado in quente["perfumes"]]
+        catalogo._indexar()
+        return catalogo
+
+    def salvar_snapshot(self, destino: Path):
+        """Grava o snapshot binário de forma atômica"""
+        if self.caminho is None:
+            raise ValueError("Catálogo sem arquivo de origem")
+        quente = pickle.dumps({
+            "versao": self.versao,
+            "origem": _assinatura_origem(self.caminho),
+            "origem_avaliacoes": _assinatura_avaliacoes(self.caminho_avaliacoes),
+            "campos": _CAMPOS_ESTADO,
+            "perfumes": [p.estado() for p in self.perfumes],
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        temporario = destino.with_name(destino.name + ".tmp")
+        with open(temporario, "wb") as f:
+            f.write(CABECALHO_SNAPSHOT.pack(ASSINATURA_SNAPSHOT, FORMATO_SNAPSHOT, len(quente)))
+            f.write(quente)
+        os.replace(temporario, destino)
+
+    @classmethod
+    def vazio(cls) -> "Catalogo":
+        """Catálogo sem perfumes (arquivo não encontrado)"""
+        return cls([])
+
+    def fatia(self, categoria: Optional[str] = None) -> List[Perfume]:
+        """Perfumes de uma categoria (ou todos), sem copiar a lista"""
+        if categoria:
+            return self.por_categoria.get(categoria, [])
+        return self.perfumes
+
+    def cursor(self, offset: int) -> str:
+        """Cursor opaco de paginação, válido apenas para esta versão do catálogo"""
+        return base64.urlsafe_b64encode(f"{self.versao}:{offset}".encode()).decode()
+
+    def offset_do_cursor(self, cursor: str) -> int:
+        """Decodifica um cursor; ValueError se inválido ou de outra versão"""
+        try:
+            versao, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+            offset = int(offset)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Cursor inválido")
+        if versao != self.versao:
+            raise ValueError("Cursor expirado: o catálogo foi atualizado")
+        if offset < 0:
+            raise ValueError("Cursor inválido")
+        return offset
+
+    def __len__(self) -> int:
+        return len(self.perfumes)
+
+    def __iter__(self) -> Iterator[Perfume]:
+        return iter(self.perfumes)
+
+
+def caminho_catalogo() -> Path:
+    """Caminho do perfumes.json (``PERFUMES_JSON_PATH`` ou o gerado pelo scraper)"""
+    env_path = os.getenv("PERFUMES_JSON_PATH")
+    return Path(env_path) if env_path else Path(__file__).parent.parent / "scrapper" / "perfumes.json"
+
+
+def caminho_snapshot(caminho_json: Path) -> Path:
+    """Caminho do snapshot (``PERFUMES_SNAPSHOT_PATH`` ou ao lado do JSON)"""
+    env_path = os.getenv("PERFUMES_SNAPSHOT_PATH")
+    return Path(env_path) if env_path else caminho_json.with_suffix(".snapshot")
+
+
+def caminho_avaliacoes(caminho_json: Path) -> Path:
+    """Caminho dos agregados das avaliações (``AVALIACOES_JSON_PATH`` ou ao lado do JSON)"""
+    env_path = os.getenv("AVALIACOES_JSON_PATH")
+    return Path(env_path) if env_path else caminho_json.with_name(f"{caminho_json.stem}_avaliacoes.json")
+
+
+if __name__ == "__main__":
+    # Geração do snapshot (executado no build da imagem Docker)
+    parser = argparse.ArgumentParser(description="Gera o snapshot binário do catálogo")
+    parser.add_argument("json", type=Path, help="perfumes.json gerado pelo scraper")
+    parser.add_argument("-o", "--saida", type=Path, help="destino (padrão: ao lado do JSON)")
+    args = parser.parse_args()
+
+    catalogo = Catalogo.carregar(args.json)
+    destino = args.saida or caminho_snapshot(args.json)
+    catalogo.salvar_snapshot(destino)
+    com_avaliacoes = sum(p.avaliacoes_total > 0 for p in catalogo)
+    print(f"✓ Snapshot com {len(catalogo)} perfumes ({com_avaliacoes} com avaliações) "
+          f"gravado em {destino} (versão {catalogo.versao})")
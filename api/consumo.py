@@ -0,0 +1,121 @@
+"""
+Contabilização de tokens e custo do Gemini
+==========================================
+Registra o ``usage_metadata`` de cada resposta do Gemini e agrega por
+modelo/chave e por versão do catálogo.
+
+O custo é uma estimativa a partir dos preços (USD por 1 milhão de tokens)
+configurados via ambiente:
+- ``GEMINI_PRECO_ENTRADA`` (padrão: 0.10)
+- ``GEMINI_PRECO_CACHE`` (padrão: 0.025)
+- ``GEMINI_PRECO_SAIDA`` (padrão: 0.40)
+"""
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from metricas import GEMINI_CUSTO, GEMINI_TOKENS
+
+
+def identificar_chave(api_key: Optional[str]) -> str:
+    """Identificador curto e não reversível da API key"""
+    if not api_key:
+        return "sem_chave"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+
+class Consumo:
+    """Totais de tokens e custo de um agrupamento"""
+
+    __slots__ = ("requisicoes", "prompt", "cache", "saida", "custo")
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.prompt = 0
+        self.cache = 0
+        self.saida = 0
+        self.custo = 0.0
+
+    def somar(self, prompt: int, cache: int, saida: int, custo: float):
+        self.requisicoes += 1
+        self.prompt += prompt
+        self.cache += cache
+        self.saida += saida
+        self.custo += custo
+
+    def to_dict(self) -> Dict:
+        return {
+            "requisicoes": self.requisicoes,
+            "tokens_prompt": self.prompt,
+            "tokens_cache": self.cache,
+            "tokens_saida": self.saida,
+            "custo_estimado_usd": round(self.custo, 6),
+        }
+
+
+class ContadorConsumo:
+    """Agrega o consumo de tokens do Gemini"""
+
+    def __init__(self):
+        self.preco_entrada = float(os.getenv("GEMINI_PRECO_ENTRADA", "0.10"))
+        self.preco_cache = float(os.getenv("GEMINI_PRECO_CACHE", "0.025"))
+        self.preco_saida = float(os.getenv("GEMINI_PRECO_SAIDA", "0.40"))
+        self._lock = threading.Lock()
+        self.total = Consumo()
+        self.por_modelo_chave: Dict[Tuple[str, str], Consumo] = {}
+        self.por_catalogo: Dict[str, Consumo] = {}
+
+    def estimar_custo(self, prompt: int, cache: int, saida: int) -> float:
+        """Custo estimado em USD (tokens em cache são cobrados à parte)"""
+        return (
+            (prompt - cache) * self.preco_entrada
+            + cache * self.preco_cache
+            + saida * self.preco_saida
+        ) / 1_000_000
+
+    def registrar(self, modelo: str, chave: str, versao_catalogo: str, usage) -> Optional[Dict]:
+        """Registra o usage_metadata de uma resposta e retorna o consumo dela"""
+        if not usage:
+            return None
+
+        prompt = usage.prompt_token_count or 0
+        cache = usage.cached_content_token_count or 0
+        saida = usage.candidates_token_count or 0
+        custo = self.estimar_custo(prompt, cache, saida)
+
+        with self._lock:
+            self.total.somar(prompt, cache, saida, custo)
+            self.por_modelo_chave.setdefault((modelo, chave), Consumo()).somar(prompt, cache, saida, custo)
+            self.por_catalogo.setdefault(versao_catalogo, Consumo()).somar(prompt, cache, saida, custo)
+
+        GEMINI_TOKENS.labels(modelo, "prompt").inc(prompt)
+        GEMINI_TOKENS.labels(modelo, "cache").inc(cache)
+        GEMINI_TOKENS.labels(modelo, "saida").inc(saida)
+        GEMINI_CUSTO.labels(modelo).inc(custo)
+
+        return {"tokens_prompt": prompt, "tokens_cache": cache, "tokens_saida": saida, "custo_estimado_usd": custo}
+
+    def resumo(self) -> Dict:
+        """Resumo agregado para o endpoint administrativo"""
+        with self._lock:
+            return {
+                "precos_usd_por_milhao": {
+                    "entrada": self.preco_entrada,
+                    "cache": self.preco_cache,
+                    "saida": self.preco_saida,
+                },
+                "total": self.total.to_dict(),
+                "por_modelo_chave": [
+                    {"modelo": modelo, "chave": chave, **consumo.to_dict()}
+                    for (modelo, chave), consumo in self.por_modelo_chave.items()
+                ],
+                "por_versao_catalogo": [
+                    {"versao_catalogo": versao, **consumo.to_dict()}
+                    for versao, consumo in self.por_catalogo.items()
+                ],
+            }
+
+
+# Instância global
+contador_consumo = ContadorConsumo()
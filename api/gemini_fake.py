@@ -0,0 +1,176 @@
+"""
+Cliente Gemini falso para desenvolvimento offline
+=================================================
+Implementa o subconjunto de ``genai.Client`` usado pela API
+(``models.generate_content``, ``models.get`` e
+``caches.create/get/update/delete``, também via ``aio``) sem acesso à rede. As recomendações são escolhidas de forma determinística entre
+os perfumes presentes no catálogo do prompt, e o ``usage_metadata`` é
+estimado (~4 caracteres por token), separando os tokens vindos do cache.
+
+Ative com ``GEMINI_FAKE=true`` para rodar a API sem chave do Gemini.
+"""
+import datetime
+import hashlib
+import itertools
+import json
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+from google.genai import errors, types
+
+
+def _campo(config: Any, nome: str, padrao: Any = None) -> Any:
+    """Lê um campo de config, seja dict ou objeto de types"""
+    if config is None:
+        return padrao
+    if isinstance(config, dict):
+        return config.get(nome, padrao)
+    valor = getattr(config, nome, None)
+    return padrao if valor is None else valor
+
+
+def _ttl_segundos(ttl: Optional[str]) -> float:
+    return float(ttl.rstrip("s")) if ttl else 3600.0
+
+
+def _tokens(texto: str) -> int:
+    return max(1, len(texto) // 4)
+
+
+def _nao_encontrado(nome: str) -> errors.ClientError:
+    return errors.ClientError(404, {
+        "error": {"code": 404, "message": f"CachedContent not found: {nome}", "status": "NOT_FOUND"}
+    })
+
+
+class _CachesFake:
+    """Armazena os cached contents em memória, respeitando o TTL"""
+
+    def __init__(self, relogio: Callable[[], float]):
+        self.relogio = relogio
+        self.itens: Dict[str, Dict] = {}
+        self.criados = 0
+        self._ids = itertools.count(1)
+
+    def _cached_content(self, nome: str) -> types.CachedContent:
+        item = self.itens[nome]
+        return types.CachedContent(
+            name=nome,
+            display_name=item["display_name"],
+            model=item["modelo"],
+            expire_time=datetime.datetime.fromtimestamp(item["expira_em"], tz=datetime.timezone.utc)
+        )
+
+    def obter_conteudo(self, nome: str) -> str:
+        """Conteúdo de um cache válido (ClientError 404 se ausente ou expirado)"""
+        item = self.itens.get(nome)
+        if item is None or item["expira_em"] <= self.relogio():
+            self.itens.pop(nome, None)
+            raise _nao_encontrado(nome)
+        return item["conteudo"]
+
+    def create(self, model: str, config: Any = None) -> types.CachedContent:
+        nome = f"cachedContents/fake-{next(self._ids)}"
+        self.itens[nome] = {
+            "modelo": model,
+            "display_name": _campo(config, "display_name"),
+            "conteudo": str(_campo(config, "system_instruction", "")),
+            "expira_em": self.relogio() + _ttl_segundos(_campo(config, "ttl")),
+        }
+        self.criados += 1
+        return self._cached_content(nome)
+
+    def get(self, name: str, config: Any = None) -> types.CachedContent:
+        self.obter_conteudo(name)
+        return self._cached_content(name)
+
+    def update(self, name: str, config: Any = None) -> types.CachedContent:
+        self.obter_conteudo(name)
+        self.itens[name]["expira_em"] = self.relogio() + _ttl_segundos(_campo(config, "ttl"))
+        return self._cached_content(name)
+
+    def delete(self, name: str, config: Any = None):
+        if self.itens.pop(name, None) is None:
+            raise _nao_encontrado(name)
+
+
+class _ModelsFake:
+    """Gera respostas no formato JSON esperado pelo GeminiService"""
+
+    def __init__(self, caches: _CachesFake):
+        self.caches = caches
+        self.chamadas = 0
+
+    def get(self, model: str, config: Any = None) -> types.Model:
+        return types.Model(name=f"models/{model}")
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> types.GenerateContentResponse:
+        self.chamadas += 1
+        texto_usuario = contents if isinstance(contents, str) else str(contents)
+
+        nome_cache = _campo(config, "cached_content")
+        if nome_cache:
+            catalogo = self.caches.obter_conteudo(nome_cache)
+            tokens_cache = _tokens(catalogo)
+        else:
+            catalogo = str(_campo(config, "system_instruction", "")) + texto_usuario
+            tokens_cache = 0
+
+        # Perfumes listados no catálogo do prompt ("1. Nome do perfume")
+        nomes = re.findall(r"^\d+\. (.+)$", catalogo, re.MULTILINE)
+        semente = int(hashlib.sha256(texto_usuario.encode()).hexdigest(), 16)
+        escolhidos = [nomes[(semente + i * 7) % len(nomes)] for i in range(3)] if nomes else []
+
+        resposta = json.dumps({
+            "perfil_usuario": "Perfil olfativo gerado pelo cliente Gemini falso.",
+            "recomendacoes": [
+                {
+                    "nome_perfume": nome,
+                    "match_score": 95 - i * 5,
+                    "motivo_recomendacao": "Recomendação determinística do cliente falso."
+                }
+                for i, nome in enumerate(escolhidos)
+            ],
+            "dica_extra": "Aplique o perfume nos pontos de pulsação."
+        }, ensure_ascii=False)
+
+        tokens_prompt = tokens_cache + _tokens(texto_usuario) if nome_cache else _tokens(catalogo)
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(
+                content=types.Content(role="model", parts=[types.Part(text=resposta)])
+            )],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=tokens_prompt,
+                cached_content_token_count=tokens_cache or None,
+                candidates_token_count=_tokens(resposta),
+            )
+        )
+
+
+class _Assincrono:
+    """Expõe os métodos de um objeto síncrono como corrotinas (equivalente a ``aio``)"""
+
+    def __init__(self, alvo: Any):
+        self._alvo = alvo
+
+    def __getattr__(self, nome: str):
+        metodo = getattr(self._alvo, nome)
+
+        async def chamar(*args, **kwargs):
+            return metodo(*args, **kwargs)
+
+        return chamar
+
+
+class ClienteGeminiFake:
+    """Substituto offline de ``genai.Client``"""
+
+    def __init__(self, relogio: Callable[[], float] = time.time):
+        self.caches = _CachesFake(relogio)
+        self.models = _ModelsFake(self.caches)
+        self.aio = SimpleNamespace(
+            models=_Assincrono(self.models),
+            caches=_Assincrono(self.caches)
+        )
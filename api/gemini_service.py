@@ -1,25 +1,52 @@
 """
 Serviço de integração com Google Gemini para recomendações de perfumes
+
+O SDK do Gemini (``google.genai``) é pesado de importar; por isso o cliente é
+criado em segundo plano após o startup (``preparar_em_segundo_plano``) e as
+recomendações aguardam o preparo apenas se chegarem antes dele terminar.
 """
+import asyncio
 import os
 import json
 import re
 import logging
-from typing import List, Dict, Any, Optional
+import math
+import threading
+import time
+from typing import Dict, Any, Optional, TYPE_CHECKING
 from pathlib import Path
 
-from google import genai
 from dotenv import load_dotenv
 
-from models import QuizAnswers, PerfumeRecomendado, QuizResult
+from models import QuizAnswers, QuizResult
+from catalogo import Catalogo, Perfume, caminho_catalogo, caminho_snapshot
+from cache_contexto import CacheContexto
+from consumo import contador_consumo, identificar_chave
+from metricas import GEMINI_ERROS, RECOMENDACOES, medir
+
+if TYPE_CHECKING:
+    from transporte import TransporteGemini
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging configurado em logs.configurar_logging (nível via LOG_LEVEL)
 logger = logging.getLogger("gemini_service")
 
+# Avaliações mínimas para a nota média e as menções contarem na pontuação
+AVALIACOES_MINIMAS = 3
+
+# Score usado quando o modelo não informa um match_score numérico
+MATCH_SCORE_PADRAO = 80.0
+
+
+def _match_score(valor: Any) -> float:
+    """match_score da resposta do modelo limitado a 0-100 (inválido vira o padrão)"""
+    try:
+        score = float(valor)
+    except (TypeError, ValueError):
+        return MATCH_SCORE_PADRAO
+    if not math.isfinite(score):
+        return MATCH_SCORE_PADRAO
+    return min(max(score, 0.0), 100.0)
+
 # Carregar variáveis de ambiente da raiz do projeto
 env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(env_path)
@@ -29,85 +56,182 @@ class GeminiService:
     """Serviço para interação com Gemini AI"""
     
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
+        self.api_key: Optional[str] = None
         self.client = None
+        self.transporte: Optional["TransporteGemini"] = None
         self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-        self.perfumes_data: List[Dict] = []
+        self.catalogo: Catalogo = Catalogo.vazio()
+        self.prompt_catalogo = ""
+        self.cache_contexto = CacheContexto(self.model_name)
+        # Tipo de cliente a criar: "gemini", "fake" ou None (apenas fallback)
+        self.modo: Optional[str] = None
+        self.iniciado = False
+        self._preparo: Optional[asyncio.Task] = None
+        self._recarga = threading.Lock()
+    
+    def iniciar(self):
+        """Lê a configuração e carrega o catálogo (chamado no startup da API)"""
+        if self.iniciado:
+            return
         self._configure()
         self._load_perfumes()
+        self.iniciado = True
     
     def _configure(self):
-        """Configura a API do Gemini"""
-        # Limpar a chave de espaços em branco
+        """Configura a API do Gemini (o cliente é criado em _criar_cliente)"""
+        # Lida no startup (não no import); limpar a chave de espaços em branco
+        self.api_key = os.getenv("GEMINI_API_KEY")
         self.api_key = self.api_key.strip() if self.api_key else None
+        self.chave_id = identificar_chave(self.api_key)
         
-        logger.info(f"Configurando Gemini - API Key presente: {bool(self.api_key)}")
-        logger.info(f"Modelo configurado: {self.model_name}")
-        logger.info(f"Tamanho da API Key: {len(self.api_key) if self.api_key else 0}")
+        logger.info(
+            "Configurando Gemini - API Key presente: %s, modelo: %s",
+            bool(self.api_key), self.model_name
+        )
         
-        if self.api_key and self.api_key != "sua_chave_api_gemini_aqui":
+        if os.getenv("GEMINI_FAKE", "false").lower() == "true":
+            # Cliente offline para desenvolvimento e testes de carga
+            self.modo = "fake"
+            logger.warning("⚠ Usando cliente Gemini falso (GEMINI_FAKE=true)")
+        elif self.api_key and self.api_key != "sua_chave_api_gemini_aqui":
             # Configurar como GOOGLE_API_KEY para o SDK usar
             os.environ["GOOGLE_API_KEY"] = self.api_key
-            self.client = genai.Client(api_key=self.api_key)
-            logger.info("✓ Cliente Gemini criado com sucesso")
+            self.modo = "gemini"
         else:
             logger.warning("⚠ API Key não configurada ou inválida")
     
+    def _criar_cliente(self):
+        """Importa o SDK e cria o cliente (executado fora do event loop)"""
+        if self.modo == "fake":
+            from gemini_fake import ClienteGeminiFake
+            self.client = ClienteGeminiFake()
+        elif self.modo == "gemini":
+            from google import genai
+            from transporte import TransporteGemini
+            self.transporte = TransporteGemini()
+            self.client = genai.Client(
+                api_key=self.api_key,
+                http_options=self.transporte.http_options()
+            )
+            logger.info("✓ Cliente Gemini criado (%s)", self.transporte.descricao())
+    
     def _load_perfumes(self):
         """Carrega os dados dos perfumes do JSON"""
         # Usar variável de ambiente ou caminho relativo padrão
-        env_path = os.getenv("PERFUMES_JSON_PATH")
-        if env_path:
-            perfumes_path = Path(env_path)
-        else:
-            perfumes_path = Path(__file__).parent.parent / "scrapper" / "perfumes.json"
+        perfumes_path = caminho_catalogo()
         
         if perfumes_path.exists():
-            with open(perfumes_path, "r", encoding="utf-8") as f:
-                self.perfumes_data = json.load(f)
-            print(f"✓ Carregados {len(self.perfumes_data)} perfumes")
+            self.catalogo = Catalogo.carregar(perfumes_path, caminho_snapshot(perfumes_path))
+            print(f"✓ Carregados {len(self.catalogo)} perfumes")
         else:
             print(f"⚠ Arquivo perfumes.json não encontrado em {perfumes_path}")
+        
+        # Bloco estático do prompt, montado uma vez por versão do catálogo
+        self.prompt_catalogo = self._build_prompt_catalogo()
+        self.cache_contexto.definir_conteudo(self.prompt_catalogo)
+    
+    def recarregar_catalogo(self) -> Dict[str, Any]:
+        """Relê o catálogo publicado e o troca pelo atual (requisições em curso seguem com o anterior)"""
+        with self._recarga:
+            anterior = self.catalogo.versao
+            self._load_perfumes()
+        logger.info("Catálogo recarregado: %s -> %s (%d perfumes)", anterior, self.catalogo.versao, len(self.catalogo))
+        return {
+            "versao_anterior": anterior,
+            "versao": self.catalogo.versao,
+            "perfumes": len(self.catalogo),
+            "alterado": anterior != self.catalogo.versao,
+        }
+    
+    async def preparar(self):
+        """Cria o cliente em uma thread e aquece a conexão com o Gemini"""
+        inicio = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._criar_cliente)
+        except Exception as e:
+            logger.error("Falha ao criar o cliente Gemini (%s: %s) - usando fallback", type(e).__name__, e)
+            self.modo = None
+            return
+        logger.info("Cliente Gemini pronto em %.0f ms", (time.perf_counter() - inicio) * 1000)
+        await self.aquecer()
+    
+    def preparar_em_segundo_plano(self):
+        """Agenda o preparo do cliente sem atrasar o início do servidor"""
+        if self.modo and self._preparo is None:
+            self._preparo = asyncio.create_task(self.preparar())
+    
+    async def _aguardar_cliente(self):
+        """Aguarda o preparo do cliente, se ainda estiver em andamento"""
+        if self._preparo is not None and not self._preparo.done():
+            # shield: o cancelamento de uma requisição não interrompe o preparo
+            await asyncio.shield(self._preparo)
+    
+    async def aquecer(self):
+        """Abre a conexão TLS com o Gemini e prepara o cache de contexto"""
+        if self.client is None:
+            return
+        inicio = time.perf_counter()
+        try:
+            await self.client.aio.models.get(model=self.model_name)
+            await self.cache_contexto.obter_nome(self.client)
+            logger.info("Conexão com o Gemini aquecida em %.0f ms", (time.perf_counter() - inicio) * 1000)
+        except Exception as e:
+            logger.warning("Falha no aquecimento do Gemini (%s: %s)", type(e).__name__, e)
+    
+    async def encerrar(self):
+        """Interrompe o preparo pendente e fecha as conexões do transporte HTTP"""
+        if self._preparo is not None and not self._preparo.done():
+            self._preparo.cancel()
+            try:
+                await self._preparo
+            except asyncio.CancelledError:
+                pass
+        if self.transporte:
+            await self.transporte.fechar()
     
     @property
     def is_configured(self) -> bool:
-        """Verifica se o Gemini está configurado"""
-        return self.client is not None
+        """Verifica se o Gemini está configurado (o cliente pode estar em preparo)"""
+        return self.modo is not None
     
     @property
     def perfumes_count(self) -> int:
         """Retorna a quantidade de perfumes carregados"""
-        return len(self.perfumes_data)
+        return len(self.catalogo)
     
     def _build_perfumes_context(self) -> str:
         """Constrói o contexto dos perfumes para o prompt"""
         context_lines = []
         
-        for i, p in enumerate(self.perfumes_data, 1):
+        for i, p in enumerate(self.catalogo, 1):
             notas = []
-            if p.get("notas_topo"):
-                notas.append(f"Topo: {p['notas_topo']}")
-            if p.get("notas_coracao"):
-                notas.append(f"Coração: {p['notas_coracao']}")
-            if p.get("notas_fundo"):
-                notas.append(f"Fundo: {p['notas_fundo']}")
+            if p.notas_topo:
+                notas.append(f"Topo: {p.notas_topo}")
+            if p.notas_coracao:
+                notas.append(f"Coração: {p.notas_coracao}")
+            if p.notas_fundo:
+                notas.append(f"Fundo: {p.notas_fundo}")
             
             notas_str = " | ".join(notas) if notas else "Não informado"
             
-            preco = p.get("preco_pix") or p.get("preco") or "Não informado"
+            preco = p.preco_pix or p.preco or "Não informado"
             
             # Garantir que descrição não seja None
-            descricao = p.get("descricao") or "Não informado"
+            descricao = p.descricao or "Não informado"
             descricao = descricao[:200] if descricao else "Não informado"
             
-            context_lines.append(
-                f"{i}. {p['nome']}\n"
-                f"   Categoria: {p['categoria']}\n"
+            linha = (
+                f"{i}. {p.nome}\n"
+                f"   Categoria: {p.categoria}\n"
                 f"   Preço: {preco}\n"
-                f"   Inspirado em: {p.get('inspiracao') or 'Não informado'}\n"
+                f"   Inspirado em: {p.inspiracao or 'Não informado'}\n"
                 f"   Notas: {notas_str}\n"
                 f"   Descrição: {descricao}"
             )
+            if p.avaliacoes_total:
+                nota = f"nota {p.nota_media:.1f}/5, " if p.nota_media is not None else ""
+                linha += f"\n   Avaliações: {nota}{p.avaliacoes_total} de clientes"
+            context_lines.append(linha)
         
         return "\n\n".join(context_lines)
     
@@ -135,29 +259,12 @@ RESPOSTAS DO QUIZ:
         
         return context
     
-    async def get_recommendations(self, answers: QuizAnswers) -> QuizResult:
-        """Obtém recomendações de perfumes baseadas nas respostas do quiz"""
-        
-        logger.info("="*50)
-        logger.info("INICIANDO get_recommendations")
-        logger.info(f"is_configured: {self.is_configured}")
-        logger.info(f"client: {self.client}")
-        logger.info(f"model_name: {self.model_name}")
-        logger.info(f"api_key (primeiros 10 chars): {self.api_key[:10] if self.api_key else 'None'}...")
-        
-        if not self.is_configured:
-            logger.warning("Gemini NÃO configurado - usando fallback")
-            # Fallback: recomendação baseada em regras simples
-            return self._fallback_recommendations(answers)
-        
-        logger.info("Gemini está configurado, gerando recomendação via IA...")
-        quiz_context = self._build_quiz_context(answers)
+    def _build_prompt_catalogo(self) -> str:
+        """Constrói o bloco estático do prompt (igual para todas as requisições)"""
         perfumes_context = self._build_perfumes_context()
         
-        prompt = f"""Você é um especialista em perfumaria e consultor de fragrâncias da JA Essence de la Vie.
-Analise as preferências do usuário e recomende os 3 melhores perfumes do nosso catálogo.
-
-{quiz_context}
+        return f"""Você é um especialista em perfumaria e consultor de fragrâncias da JA Essence de la Vie.
+Analise as preferências do usuário (enviadas na mensagem) e recomende os 3 melhores perfumes do nosso catálogo.
 
 CATÁLOGO DE PERFUMES DISPONÍVEIS:
 {perfumes_context}
@@ -174,6 +281,7 @@ IMPORTANTE:
 - Os nomes dos perfumes devem ser EXATAMENTE iguais aos do catálogo
 - Considere categoria (masculino/feminino/compartilhavel) conforme preferência do usuário
 - Se gênero for "qualquer", priorize compartilháveis
+- Entre perfumes igualmente adequados, prefira os mais bem avaliados pelos clientes
 
 RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
 {{
@@ -197,68 +305,112 @@ RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
     ],
     "dica_extra": "Uma dica útil sobre perfumes"
 }}"""
+    
+    async def _gerar_conteudo(self, quiz_context: str):
+        """Chama o Gemini usando o cache de contexto do catálogo quando disponível"""
+        # O SDK já foi importado junto com o cliente
+        from google.genai import errors as genai_errors
+        
+        config = {
+            "temperature": 0.7,
+            "top_p": 0.95,
+        }
+        
+        nome_cache = await self.cache_contexto.obter_nome(self.client)
+        if nome_cache:
+            config["cached_content"] = nome_cache
+        else:
+            config["system_instruction"] = self.prompt_catalogo
+        
+        logger.debug(
+            "Chamando Gemini - modelo: %s, cache: %s, prompt: %d caracteres",
+            self.model_name, nome_cache, len(quiz_context)
+        )
+        
+        try:
+            with medir("gemini"):
+                return await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=quiz_context,
+                    config=config
+                )
+        except genai_errors.ClientError as e:
+            if not nome_cache:
+                raise
+            # Cache expirado ou removido no servidor: repetir com o bloco inline
+            logger.warning("Falha com cache de contexto %s (%s) - repetindo inline", nome_cache, e)
+            GEMINI_ERROS.labels("cache_contexto").inc()
+            self.cache_contexto.invalidar()
+            config.pop("cached_content")
+            config["system_instruction"] = self.prompt_catalogo
+            with medir("gemini"):
+                return await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=quiz_context,
+                    config=config
+                )
+    
+    async def get_recommendations(self, answers: QuizAnswers) -> QuizResult:
+        """Obtém recomendações de perfumes baseadas nas respostas do quiz"""
+        await self._aguardar_cliente()
+        
+        if self.client is None:
+            logger.debug("Gemini não configurado - usando fallback")
+            # Fallback: recomendação baseada em regras simples
+            RECOMENDACOES.labels("fallback").inc()
+            return self._fallback_recommendations(answers)
+        
+        with medir("prompt"):
+            quiz_context = self._build_quiz_context(answers)
 
         try:
-            logger.info(f"Chamando Gemini API - modelo: {self.model_name}")
-            logger.debug(f"Tamanho do prompt: {len(prompt)} caracteres")
-            logger.debug(f"self.model_name: {self.model_name}")
-            
             # Tentar gerar conteúdo
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config={
-                    "temperature": 0.7,
-                    "top_p": 0.95,
-                }
-            )
+            response = await self._gerar_conteudo(quiz_context)
             
-            logger.info(f"Resposta recebida do Gemini")
-            logger.debug(f"Tipo da resposta: {type(response)}")
+            consumo = contador_consumo.registrar(
+                self.model_name,
+                self.chave_id,
+                self.catalogo.versao,
+                getattr(response, "usage_metadata", None)
+            )
+            if consumo:
+                logger.info(
+                    "Tokens Gemini - prompt: %d, cache: %d, saída: %d",
+                    consumo["tokens_prompt"], consumo["tokens_cache"], consumo["tokens_saida"]
+                )
             
             # Verificar se a resposta tem texto
             if not response or not response.text:
                 logger.warning("Gemini retornou resposta vazia, usando fallback")
+                GEMINI_ERROS.labels("resposta_vazia").inc()
+                RECOMENDACOES.labels("fallback").inc()
                 return self._fallback_recommendations(answers)
             
             result_text = response.text.strip()
-            logger.info(f"Texto recebido ({len(result_text)} chars): {result_text[:200]}...")
-            
-            # Limpar resposta (remover markdown se presente)
-            if result_text.startswith("```"):
-                result_text = re.sub(r"```json?\n?", "", result_text)
-                result_text = re.sub(r"\n?```$", "", result_text)
+            logger.debug("Resposta do Gemini: %d caracteres", len(result_text))
             
-            result_json = json.loads(result_text)
+            with medir("parse_json"):
+                # Limpar resposta (remover markdown se presente)
+                if result_text.startswith("```"):
+                    result_text = re.sub(r"```json?\n?", "", result_text)
+                    result_text = re.sub(r"\n?```$", "", result_text)
+                
+                result_json = json.loads(result_text)
             
             # Mapear recomendações para objetos PerfumeRecomendado
-            recomendacoes = []
-            for rec in result_json.get("recomendacoes", [])[:3]:
-                nome_perfume = rec.get("nome_perfume", "")
-                
-                # Encontrar perfume no catálogo
-                perfume_data = self._find_perfume(nome_perfume)
-                
-                if perfume_data:
-                    recomendacoes.append(PerfumeRecomendado(
-                        nome=perfume_data["nome"],
-                        categoria=perfume_data.get("categoria", ""),
-                        preco=perfume_data.get("preco"),
-                        preco_pix=perfume_data.get("preco_pix"),
-                        preco_original=perfume_data.get("preco_original"),
-                        parcelamento=perfume_data.get("parcelamento"),
-                        descricao=perfume_data.get("descricao"),
-                        inspiracao=perfume_data.get("inspiracao"),
-                        volume=perfume_data.get("volume"),
-                        notas_topo=perfume_data.get("notas_topo"),
-                        notas_coracao=perfume_data.get("notas_coracao"),
-                        notas_fundo=perfume_data.get("notas_fundo"),
-                        imagem_url=perfume_data.get("imagem_url"),
-                        link_produto=perfume_data.get("link_produto"),
-                        desconto=perfume_data.get("desconto"),
-                        match_score=float(rec.get("match_score", 80)),
-                        motivo_recomendacao=rec.get("motivo_recomendacao", "")
-                    ))
+            with medir("mapeamento"):
+                recomendacoes = []
+                for rec in result_json.get("recomendacoes", [])[:3]:
+                    nome_perfume = rec.get("nome_perfume", "")
+                    
+                    # Encontrar perfume no catálogo
+                    perfume_data = self._find_perfume(nome_perfume)
+                    
+                    if perfume_data:
+                        recomendacoes.append(perfume_data.recomendar(
+                            match_score=_match_score(rec.get("match_score")),
+                            motivo=str(rec.get("motivo_recomendacao") or "")
+                        ))
             
             # Se não encontrou 3.perfumes, completar com fallback
             if len(recomendacoes) < 3:
@@ -269,7 +421,8 @@ RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
                     if not any(r.nome == fb_rec.nome for r in recomendacoes):
                         recomendacoes.append(fb_rec)
             
-            logger.info("✓ Recomendações geradas com sucesso via Gemini AI!")
+            logger.info("Recomendações geradas via Gemini (%d do catálogo)", len(recomendacoes))
+            RECOMENDACOES.labels("gemini").inc()
             return QuizResult(
                 sucesso=True,
                 mensagem="Recomendações geradas com Gemini AI!",
@@ -279,46 +432,50 @@ RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
             )
             
         except json.JSONDecodeError as e:
-            logger.error(f"Erro ao parsear JSON do Gemini: {e}")
-            try:
-                logger.error(f"Resposta recebida: {result_text[:500] if result_text else 'vazia'}")
-            except:
-                pass
+            logger.error("Erro ao parsear JSON do Gemini: %s", e)
+            GEMINI_ERROS.labels("json_invalido").inc()
+            logger.debug("Resposta recebida: %.500s", result_text)
+            RECOMENDACOES.labels("fallback").inc()
             return self._fallback_recommendations(answers)
         except Exception as e:
-            logger.error(f"Erro na API Gemini: {type(e).__name__}: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.error("Erro na API Gemini: %s: %s", type(e).__name__, e)
+            logger.debug("Detalhes do erro na API Gemini", exc_info=True)
+            GEMINI_ERROS.labels(type(e).__name__).inc()
+            RECOMENDACOES.labels("fallback").inc()
             return self._fallback_recommendations(answers)
     
-    def _find_perfume(self, nome: str) -> Optional[Dict]:
+    def recomendar_por_regras(self, answers: QuizAnswers) -> QuizResult:
+        """Recomendação sem o Gemini (degradação sob sobrecarga)"""
+        RECOMENDACOES.labels("degradada").inc()
+        return self._fallback_recommendations(answers)
+    
+    def _find_perfume(self, nome: str) -> Optional[Perfume]:
         """Encontra um perfume pelo nome (busca flexível)"""
         nome_lower = nome.lower().strip()
         
         # Busca exata
-        for p in self.perfumes_data:
-            if p["nome"].lower() == nome_lower:
+        for p in self.catalogo:
+            if p.nome_lower == nome_lower:
                 return p
         
         # Busca parcial (nome contém)
-        for p in self.perfumes_data:
-            if nome_lower in p["nome"].lower() or p["nome"].lower() in nome_lower:
+        for p in self.catalogo:
+            if nome_lower in p.nome_lower or p.nome_lower in nome_lower:
                 return p
         
         # Busca por palavras-chave
         palavras = nome_lower.split()
-        for p in self.perfumes_data:
-            nome_perfume = p["nome"].lower()
+        for p in self.catalogo:
+            nome_perfume = p.nome_lower
             if any(palavra in nome_perfume for palavra in palavras if len(palavra) > 3):
                 return p
         
         return None
     
+    @medir("fallback")
     def _fallback_recommendations(self, answers: QuizAnswers) -> QuizResult:
         """Recomendações baseadas em regras quando Gemini não está disponível"""
-        logger.warning("="*50)
-        logger.warning("USANDO FALLBACK - Gemini não disponível ou falhou")
-        logger.warning("="*50)
+        logger.debug("Usando fallback baseado em regras")
         
         # Filtrar por categoria
         categoria_map = {
@@ -330,23 +487,19 @@ RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
         categoria = categoria_map.get(answers.genero.value)
         
         candidatos = []
-        for p in self.perfumes_data:
+        for p in self.catalogo:
             score = 50  # Score base
             
             # Filtro de categoria
-            if categoria and p.get("categoria") != categoria:
+            if categoria and p.categoria != categoria:
                 if answers.genero.value != "qualquer":
                     score -= 20
-            elif categoria and p.get("categoria") == categoria:
+            elif categoria and p.categoria == categoria:
                 score += 20
             
             # Bonus por descrição matching
-            descricao = (p.get("descricao") or "").lower()
-            notas = " ".join([
-                p.get("notas_topo") or "",
-                p.get("notas_coracao") or "",
-                p.get("notas_fundo") or ""
-            ]).lower()
+            descricao = p.descricao_lower
+            notas = p.notas_lower
             
             keywords_map = {
                 "floral": ["floral", "rosa", "jasmim", "lírio", "flor"],
@@ -390,33 +543,21 @@ RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
                     if keyword in descricao:
                         score += 8
             
-            candidatos.append((p, min(score, 100)))
+            score += self._bonus_avaliacoes(p, answers)
+            
+            candidatos.append((p, score))
         
-        # Ordenar por score
+        # Ordenar pelo score sem o teto de 100 (perfumes acima do teto ainda
+        # se diferenciam, inclusive pelas avaliações)
         candidatos.sort(key=lambda x: x[1], reverse=True)
         
         # Selecionar top 3
         recomendacoes = []
         for p, score in candidatos[:3]:
             motivo = self._generate_fallback_reason(p, answers)
-            recomendacoes.append(PerfumeRecomendado(
-                nome=p["nome"],
-                categoria=p.get("categoria", ""),
-                preco=p.get("preco"),
-                preco_pix=p.get("preco_pix"),
-                preco_original=p.get("preco_original"),
-                parcelamento=p.get("parcelamento"),
-                descricao=p.get("descricao"),
-                inspiracao=p.get("inspiracao"),
-                volume=p.get("volume"),
-                notas_topo=p.get("notas_topo"),
-                notas_coracao=p.get("notas_coracao"),
-                notas_fundo=p.get("notas_fundo"),
-                imagem_url=p.get("imagem_url"),
-                link_produto=p.get("link_produto"),
-                desconto=p.get("desconto"),
-                match_score=float(score),
-                motivo_recomendacao=motivo
+            recomendacoes.append(p.recomendar(
+                match_score=float(min(score, 100)),
+                motivo=motivo
             ))
         
         perfil = f"Você busca fragrâncias {answers.familia_olfativa.value} com intensidade {answers.intensidade.value}. "
@@ -430,20 +571,44 @@ RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
             dica_extra="Aplique o perfume nos pontos de pulsação (pulsos, pescoço) para melhor projeção!"
         )
     
-    def _generate_fallback_reason(self, perfume: Dict, answers: QuizAnswers) -> str:
+    def _bonus_avaliacoes(self, perfume: Perfume, answers: QuizAnswers) -> int:
+        """Pontos pelos agregados das avaliações (nota média, volume e menções)"""
+        total = perfume.avaliacoes_total
+        if total < AVALIACOES_MINIMAS:
+            return 0
+        
+        # Volume de avaliações: até 4 pontos
+        bonus = min(total, 20) // 5
+        
+        # Nota média de 1 a 5: de -8 a +8 pontos
+        if perfume.nota_media is not None:
+            bonus += round((perfume.nota_media - 3) * 4)
+        
+        # Clientes confirmando a intensidade pedida (ao menos 1 em cada 4 avaliações)
+        mencoes = perfume.mencoes
+        if answers.intensidade.value in ["intensa", "muito_intensa"]:
+            if 4 * max(mencoes.get("fixacao", 0), mencoes.get("projecao", 0)) >= total:
+                bonus += 5
+        elif answers.intensidade.value == "leve":
+            if 4 * mencoes.get("suave", 0) >= total:
+                bonus += 5
+        
+        return bonus
+    
+    def _generate_fallback_reason(self, perfume: Perfume, answers: QuizAnswers) -> str:
         """Gera um motivo de recomendação baseado em regras"""
         reasons = []
         
-        if perfume.get("categoria") == "compartilhaveis":
+        if perfume.categoria == "compartilhaveis":
             reasons.append("versátil para qualquer ocasião")
-        elif perfume.get("categoria") == answers.genero.value + "s":
+        elif perfume.categoria == answers.genero.value + "s":
             reasons.append(f"ideal para o público {answers.genero.value}")
         
-        if perfume.get("inspiracao"):
-            reasons.append(f"inspirado na renomada fragrância {perfume['inspiracao']}")
+        if perfume.inspiracao:
+            reasons.append(f"inspirado na renomada fragrância {perfume.inspiracao}")
         
-        if perfume.get("descricao"):
-            desc = perfume["descricao"].lower()
+        if perfume.descricao:
+            desc = perfume.descricao_lower
             if "elegância" in desc or "sofisticação" in desc:
                 reasons.append("transmite elegância e sofisticação")
             if "fresco" in desc or "refrescante" in desc:
@@ -451,6 +616,11 @@ RESPONDA APENAS EM JSON válido no seguinte formato (sem markdown):
             if "intenso" in desc or "marcante" in desc:
                 reasons.append("possui presença marcante")
         
+        if perfume.nota_media is not None and perfume.nota_media >= 4 and perfume.avaliacoes_total >= AVALIACOES_MINIMAS:
+            reasons.append(
+                f"bem avaliado pelos clientes (nota {perfume.nota_media:.1f} em {perfume.avaliacoes_total} avaliações)"
+            )
+        
         if not reasons:
             reasons.append("excelente opção para o seu perfil")
         
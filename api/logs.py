@@ -0,0 +1,164 @@
+"""
+Configuração de logging da API
+==============================
+Os registros são enfileirados (``QueueHandler``) e escritos por uma thread
+separada (``QueueListener``), para que a escrita em stderr não bloqueie o
+event loop. Cada registro leva o ID da requisição em andamento. Os loggers
+do uvicorn (inclusive o de acesso) perdem os handlers próprios e passam pela
+mesma fila e formatação.
+
+Variáveis de ambiente:
+- ``LOG_LEVEL``: nível mínimo (padrão: INFO; um nível desconhecido vira INFO)
+- ``LOG_FORMAT``: ``json`` (padrão) ou ``texto``
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+import orjson
+
+
+# ID da requisição em andamento (preenchido pelo MiddlewareRequestId)
+request_id_atual: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class FiltroRequestId(logging.Filter):
+    """Anexa o ID da requisição ao registro, no contexto de quem loga"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_atual.get()
+        return True
+
+
+class EnfileiradorLogs(logging.handlers.QueueHandler):
+    """QueueHandler que mantém o traceback separado da mensagem"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Interpolar os argumentos aqui (o registro cruza threads), mas deixar
+        # a formatação final para o handler de saída
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como uma linha JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            dados["request_id"] = request_id
+        if record.exc_info:
+            dados["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados["exc"] = record.exc_text
+        return orjson.dumps(dados).decode()
+
+
+def configurar_logging():
+    """Configura o logger raiz com fila e escrita em thread separada"""
+    global _listener
+    if _listener is not None:
+        return
+
+    nivel = os.getenv("LOG_LEVEL", "INFO").upper()
+    nivel_invalido = not isinstance(logging.getLevelName(nivel), int)
+    if nivel_invalido:
+        nivel_informado, nivel = nivel, "INFO"
+    formato = os.getenv("LOG_FORMAT", "json").lower()
+
+    saida = logging.StreamHandler(sys.stderr)
+    if formato == "json":
+        saida.setFormatter(FormatadorJSON())
+    else:
+        saida.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+        ))
+
+    fila = queue.SimpleQueue()
+    enfileirador = EnfileiradorLogs(fila)
+    enfileirador.addFilter(FiltroRequestId())
+
+    raiz = logging.getLogger()
+    raiz.handlers = [enfileirador]
+    raiz.setLevel(nivel)
+
+    # O uvicorn instala handlers síncronos próprios antes de importar a app
+    for nome in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger_uvicorn = logging.getLogger(nome)
+        logger_uvicorn.handlers = []
+        logger_uvicorn.propagate = True
+        logger_uvicorn.setLevel(logging.NOTSET)
+
+    # Bibliotecas que logam uma linha por chamada HTTP ao Gemini
+    if nivel != "DEBUG":
+        for nome in ("httpx", "google_genai.models"):
+            logging.getLogger(nome).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(fila, saida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(encerrar_logging)
+
+    if nivel_invalido:
+        logging.getLogger("logs").warning("LOG_LEVEL inválido (%r); usando INFO", nivel_informado)
+
+
+def encerrar_logging():
+    """Esvazia a fila e para a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class MiddlewareRequestId:
+    """Middleware ASGI que define o ID da requisição (X-Request-ID)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for nome, valor in scope["headers"]:
+            if nome == b"x-request-id":
+                request_id = valor.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        async def send_com_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = request_id_atual.set(request_id)
+        try:
+            await self.app(scope, receive, send_com_id)
+        finally:
+            request_id_atual.reset(token)
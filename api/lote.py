@@ -0,0 +1,290 @@
+"""
+Recomendações em lote
+=====================
+Processa um arquivo JSONL ou CSV de respostas do quiz e devolve uma linha
+NDJSON por registro, na ordem de entrada:
+
+    {"linha": 1, "id": "abc", "sucesso": true, "resultado": {...}}
+    {"linha": 2, "sucesso": false, "erro": "..."}
+
+- perfis idênticos (mesmas respostas) são calculados uma vez e reaproveitados;
+- o sistema de regras roda em um pool de processos (fora do event loop);
+- as chamadas ao Gemini têm concorrência limitada e compartilhada entre lotes;
+- a memória fica constante: a entrada é lida sob demanda e no máximo
+  ``LOTE_JANELA`` registros ficam em processamento ao mesmo tempo.
+
+No CSV, a primeira linha traz os nomes dos campos e as listas
+(``notas_preferidas``, ``notas_evitar``) usam ``;`` como separador. O campo
+opcional ``id`` é devolvido na saída para relacionar os resultados.
+
+Variáveis de ambiente:
+- ``LOTE_PROCESSOS``: processos do sistema de regras (padrão: nº de CPUs)
+- ``LOTE_CONCORRENCIA_GEMINI``: chamadas simultâneas ao Gemini (padrão: 4)
+- ``LOTE_JANELA``: registros em processamento por lote (padrão: 64)
+- ``LOTE_CACHE_PERFIS``: perfis distintos lembrados por lote (padrão: 2000)
+"""
+import asyncio
+import codecs
+import csv
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import IO, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from catalogo import Catalogo, caminho_snapshot
+from metricas import LOTE_REGISTROS
+from models import QuizAnswers
+from respostas import serializar_resultado
+
+logger = logging.getLogger("lote")
+
+CAMPOS_LISTA = ("notas_preferidas", "notas_evitar")
+
+
+# ============ LEITURA ============
+
+# Um registro com problema vira uma linha de erro; o lote continua
+ERRO_UTF8 = "texto inválido: o arquivo deve estar em UTF-8"
+
+
+def _linhas(arquivo: IO[bytes]) -> Iterator[bytes]:
+    """Linhas em bytes (com o fim de linha), sem o BOM do início"""
+    for i, bruta in enumerate(arquivo):
+        yield bruta.removeprefix(codecs.BOM_UTF8) if i == 0 else bruta
+
+
+def _registros_jsonl(arquivo: IO[bytes]) -> Iterator[Tuple[int, Dict]]:
+    for linha, conteudo in enumerate(_linhas(arquivo), 1):
+        if not conteudo.strip():
+            continue
+        try:
+            # O orjson decodifica (e valida) o UTF-8 da própria linha
+            dados = orjson.loads(conteudo)
+        except orjson.JSONDecodeError as e:
+            yield linha, {"_erro": f"JSON inválido: {e}"}
+            continue
+        if not isinstance(dados, dict):
+            yield linha, {"_erro": "registro deve ser um objeto JSON"}
+            continue
+        yield linha, dados
+
+
+def _registros_csv(arquivo: IO[bytes]) -> Iterator[Tuple[int, Dict]]:
+    # Cada linha é decodificada sozinha; bytes inválidos viram U+FFFD e o
+    # registro que a contém (um campo entre aspas pode ocupar várias) vira erro
+    invalidas = set()
+
+    def decodificar() -> Iterator[str]:
+        for numero, bruta in enumerate(_linhas(arquivo), 1):
+            try:
+                yield bruta.decode("utf-8")
+            except UnicodeDecodeError:
+                invalidas.add(numero)
+                yield bruta.decode("utf-8", errors="replace")
+
+    leitor = csv.DictReader(decodificar())
+    fim_anterior = 1  # A linha 1 é o cabeçalho
+    for registro in leitor:
+        inicio, fim_anterior = fim_anterior + 1, leitor.line_num
+        if invalidas and any(inicio <= numero <= leitor.line_num for numero in invalidas):
+            invalidas.difference_update(range(inicio, leitor.line_num + 1))
+            yield leitor.line_num, {"_erro": ERRO_UTF8}
+            continue
+        dados = {campo: valor for campo, valor in registro.items() if campo and valor not in (None, "")}
+        for campo in CAMPOS_LISTA:
+            if campo in dados:
+                dados[campo] = [v.strip() for v in dados[campo].split(";") if v.strip()]
+        # Linha do arquivo (a linha 1 é o cabeçalho)
+        yield leitor.line_num, dados
+
+
+def ler_registros(arquivo: IO[bytes], formato: str) -> Iterator[Tuple[int, Dict]]:
+    """Itera (linha, registro) de um arquivo JSONL ou CSV, sem carregá-lo inteiro.
+
+    Linhas com JSON inválido, que não sejam objetos ou que não estejam em
+    UTF-8 viram registros com ``_erro`` (uma linha de erro na saída).
+    """
+    if formato == "csv":
+        return _registros_csv(arquivo)
+    return _registros_jsonl(arquivo)
+
+
+def formato_do_arquivo(nome: Optional[str], content_type: Optional[str]) -> str:
+    """Deduz o formato pelo nome do arquivo ou pelo Content-Type (padrão: jsonl)"""
+    if nome and nome.lower().endswith(".csv"):
+        return "csv"
+    if content_type and "csv" in content_type:
+        return "csv"
+    return "jsonl"
+
+
+# ============ POOL DE PROCESSOS ============
+
+# Serviço com o catálogo carregado em cada processo do pool
+_servico_worker = None
+
+
+def _iniciar_worker(caminho_catalogo: str):
+    global _servico_worker
+    from gemini_service import GeminiService
+
+    caminho = Path(caminho_catalogo)
+    _servico_worker = GeminiService()
+    _servico_worker.catalogo = Catalogo.carregar(caminho, caminho_snapshot(caminho))
+
+
+def _recomendar_por_regras(dados: Dict) -> bytes:
+    """Executado no pool: recomendação por regras já serializada"""
+    answers = QuizAnswers.model_validate(dados)
+    return serializar_resultado(_servico_worker._fallback_recommendations(answers))
+
+
+class ProcessadorLote:
+    """Pool de processos e limite de chamadas ao Gemini compartilhados pelos lotes"""
+
+    def __init__(self):
+        self.processos = int(os.getenv("LOTE_PROCESSOS") or 0) or os.cpu_count() or 1
+        self.janela = int(os.getenv("LOTE_JANELA", "64"))
+        self.cache_perfis = int(os.getenv("LOTE_CACHE_PERFIS", "2000"))
+        self._vagas_gemini = asyncio.Semaphore(int(os.getenv("LOTE_CONCORRENCIA_GEMINI", "4")))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._versao_pool: Optional[str] = None
+
+    @staticmethod
+    def regras_disponiveis(catalogo: Catalogo) -> bool:
+        """O pool carrega o catálogo do arquivo: sem arquivo, não há como iniciá-lo"""
+        return catalogo.caminho is not None
+
+    def _obter_pool(self, catalogo: Catalogo) -> ProcessPoolExecutor:
+        """Pool com o catálogo atual (recriado quando o catálogo muda)"""
+        if self._pool is not None and self._versao_pool != catalogo.versao:
+            # Sem cancelar: os lotes em andamento terminam no pool anterior
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processos,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_iniciar_worker,
+                initargs=(str(catalogo.caminho),)
+            )
+            self._versao_pool = catalogo.versao
+            logger.info("Pool do lote criado com %d processos (catálogo %s)", self.processos, catalogo.versao)
+        return self._pool
+
+    def encerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _descartar_pool(self, pool: ProcessPoolExecutor):
+        """Descarta um pool quebrado (processo morto); o próximo registro cria outro"""
+        if self._pool is pool:
+            logger.warning("Pool do lote quebrado (processo encerrado); recriando")
+            pool.shutdown(wait=False)
+            self._pool = None
+
+    async def _recomendar(self, servico, answers: QuizAnswers, motor: str) -> bytes:
+        if motor == "regras":
+            loop = asyncio.get_running_loop()
+            dados = answers.model_dump(mode="json")
+            pool = self._obter_pool(servico.catalogo)
+            try:
+                return await loop.run_in_executor(pool, _recomendar_por_regras, dados)
+            except BrokenProcessPool:
+                # Uma nova tentativa em um pool novo; se quebrar de novo, vira erro do registro
+                self._descartar_pool(pool)
+                pool = self._obter_pool(servico.catalogo)
+                try:
+                    return await loop.run_in_executor(pool, _recomendar_por_regras, dados)
+                except BrokenProcessPool:
+                    self._descartar_pool(pool)
+                    raise
+        async with self._vagas_gemini:
+            return serializar_resultado(await servico.get_recommendations(answers))
+
+    async def processar(self, servico, registros: Iterator[Tuple[int, Dict]], motor: str) -> AsyncIterator[bytes]:
+        """Gera as linhas NDJSON na ordem de entrada, com no máximo ``janela`` em andamento"""
+        perfis: "OrderedDict[bytes, asyncio.Future]" = OrderedDict()
+        pendentes: deque = deque()
+        totais = {"ok": 0, "duplicado": 0, "invalido": 0, "erro": 0}
+
+        def agendar(linha: int, dados: Dict) -> Tuple[Dict, Optional[asyncio.Future]]:
+            cabecalho = {"linha": linha}
+            if "id" in dados:
+                cabecalho["id"] = dados.pop("id")
+            if "_erro" in dados:
+                cabecalho["erro"] = dados["_erro"]
+                return cabecalho, None
+            try:
+                answers = QuizAnswers.model_validate(dados)
+            except ValidationError as e:
+                cabecalho["erro"] = "; ".join(
+                    f"{'.'.join(str(p) for p in erro['loc'])}: {erro['msg']}" for erro in e.errors()
+                )
+                return cabecalho, None
+
+            chave = orjson.dumps(answers.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+            futuro = perfis.get(chave)
+            if futuro is not None:
+                perfis.move_to_end(chave)
+                cabecalho["duplicado"] = True
+                return cabecalho, futuro
+
+            futuro = asyncio.ensure_future(self._recomendar(servico, answers, motor))
+            perfis[chave] = futuro
+            if len(perfis) > self.cache_perfis:
+                perfis.popitem(last=False)
+            return cabecalho, futuro
+
+        async def concluir(cabecalho: Dict, futuro: Optional[asyncio.Future]) -> bytes:
+            if futuro is None:
+                totais["invalido"] += 1
+                return orjson.dumps({**cabecalho, "sucesso": False}) + b"\n"
+            try:
+                resultado = await asyncio.shield(futuro)
+            except (Exception, asyncio.CancelledError) as e:
+                # Cancelamento do próprio lote (cliente desconectou) continua propagando;
+                # o do registro (ex.: pool encerrado) vira linha de erro
+                if isinstance(e, asyncio.CancelledError) and (
+                    not futuro.cancelled() or asyncio.current_task().cancelling()
+                ):
+                    raise
+                totais["erro"] += 1
+                logger.warning("Falha no registro %d do lote: %s: %s", cabecalho["linha"], type(e).__name__, e)
+                return orjson.dumps({**cabecalho, "sucesso": False, "erro": "Erro ao processar recomendação"}) + b"\n"
+            totais["duplicado" if cabecalho.get("duplicado") else "ok"] += 1
+            cabecalho.pop("duplicado", None)
+            # {"linha":..., "sucesso":true, "resultado": <bytes já serializados>}
+            return orjson.dumps({**cabecalho, "sucesso": True})[:-1] + b',"resultado":' + resultado + b"}\n"
+
+        try:
+            for linha, dados in registros:
+                pendentes.append(agendar(linha, dados))
+                # Libera as linhas prontas no início da fila; espera se a janela encheu
+                while pendentes and (len(pendentes) >= self.janela or _pronto(pendentes[0][1])):
+                    yield await concluir(*pendentes.popleft())
+            while pendentes:
+                yield await concluir(*pendentes.popleft())
+        finally:
+            for _, futuro in pendentes:
+                if futuro is not None:
+                    futuro.cancel()
+            for resultado, total in totais.items():
+                LOTE_REGISTROS.labels(resultado).inc(total)
+            logger.info("Lote concluído (%s): %s", motor, totais)
+
+
+def _pronto(futuro: Optional[asyncio.Future]) -> bool:
+    return futuro is None or futuro.done()
+
+
+# Instância global
+processador_lote = ProcessadorLote()
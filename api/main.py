@@ -4,14 +4,18 @@ API de Quiz de Perfumes - JA Essence de la Vie
 Backend com integração Gemini AI para recomendação de perfumes
 """
 import os
+import tempfile
 from pathlib import Path
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
 
+from logs import MiddlewareRequestId, configurar_logging
 from models import (
     QuizAnswers, 
     QuizResult, 
@@ -19,6 +23,10 @@ from models import (
     ErrorResponse,
     HealthCheck
 )
+from respostas import CompressaoGZip, RespostaJSON, gerar_etag, resposta_condicional, serializar_resultado
+from catalogo import CAMPOS_PUBLICOS
+from metricas import MiddlewareMetricas, RECOMENDACOES_EM_ANDAMENTO, TIPO_CONTEUDO, exportar
+from perfilador import MiddlewarePerfil
 
 # Limpar variáveis de ambiente antigas do sistema APENAS em desenvolvimento
 # (não no Docker onde as variáveis vêm do docker-compose.yml)
@@ -30,14 +38,20 @@ if not os.path.exists("/.dockerenv"):
 env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(env_path)
 
+configurar_logging()
+
 from gemini_service import gemini_service
 from quiz_service import quiz_service
+from admin import exigir_admin, router as admin_router, token_admin_valido
+from admissao import AdmissaoRecusada, controle_admissao
+from lote import formato_do_arquivo, ler_registros, processador_lote
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gerencia o ciclo de vida da aplicação"""
     # Startup
+    gemini_service.iniciar()
     print("\n" + "="*50)
     print("🚀 Iniciando API de Quiz de Perfumes")
     print("="*50)
@@ -45,10 +59,16 @@ async def lifespan(app: FastAPI):
     print(f"{'✓' if gemini_service.is_configured else '✗'} Gemini AI: {'Configurado' if gemini_service.is_configured else 'Não configurado (usando fallback)'}")
     print("="*50 + "\n")
     
+    # Criar o cliente e abrir a conexão com o Gemini em segundo plano
+    # (o servidor já responde, p.ex. ao /health, enquanto o SDK é importado)
+    gemini_service.preparar_em_segundo_plano()
+    
     yield
     
     # Shutdown
     print("\n👋 Encerrando API...")
+    processador_lote.encerrar()
+    await gemini_service.encerrar()
 
 
 # Criar aplicação FastAPI
@@ -87,9 +107,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão das respostas dinâmicas (respostas pré-comprimidas são mantidas)
+app.add_middleware(CompressaoGZip, minimum_size=1024)
+
+# Latência por rota e requisições em andamento (exportadas em /metrics)
+app.add_middleware(MiddlewareMetricas)
+
+# Perfil (cProfile) por requisição com X-Perfil: 1 e token administrativo
+app.add_middleware(MiddlewarePerfil, autorizar=token_admin_valido)
+
+# ID de requisição (X-Request-ID) anexado aos logs e à resposta
+app.add_middleware(MiddlewareRequestId)
+
 
 # ============ ENDPOINTS ============
 
+app.include_router(admin_router)
+
 @app.get("/", tags=["Root"])
 async def root():
     """Endpoint raiz com informações da API"""
@@ -100,6 +134,8 @@ async def root():
             "health": "/health",
             "quiz_questions": "/quiz/questions",
             "quiz_recommend": "/quiz/recommend",
+            "quiz_recommend_batch": "/quiz/recommend/batch",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -116,6 +152,12 @@ async def health_check():
     )
 
 
+@app.get("/metrics", tags=["Health"], summary="Métricas Prometheus")
+async def metrics():
+    """Exporta as métricas da API no formato texto do Prometheus"""
+    return Response(content=exportar(), media_type=TIPO_CONTEUDO)
+
+
 @app.get(
     "/quiz/questions", 
     response_model=QuizQuestionsResponse,
@@ -123,29 +165,35 @@ async def health_check():
     summary="Obter perguntas do quiz",
     description="Retorna todas as perguntas do quiz de perfumes para o frontend renderizar"
 )
-async def get_quiz_questions():
+async def get_quiz_questions(request: Request):
     """
     Retorna as perguntas do quiz de perfumes.
     
     Use esta rota para obter todas as perguntas que devem ser
     exibidas ao usuário antes de enviar as respostas.
+    
+    A resposta é pré-serializada e suporta `If-None-Match` (304)
+    e compressão gzip/brotli.
     """
-    return quiz_service.get_questions()
+    return quiz_service.recurso_perguntas.responder(request)
 
 
 @app.post(
     "/quiz/recommend",
     response_model=QuizResult,
+    response_class=RespostaJSON,
     responses={
         200: {"description": "Recomendações geradas com sucesso"},
         400: {"model": ErrorResponse, "description": "Erro nas respostas enviadas"},
-        500: {"model": ErrorResponse, "description": "Erro interno do servidor"}
+        429: {"model": ErrorResponse, "description": "Limite de requisições do cliente excedido"},
+        500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
+        503: {"model": ErrorResponse, "description": "Servidor sobrecarregado"}
     },
     tags=["Quiz"],
     summary="Obter recomendações de perfumes",
     description="Envia as respostas do quiz e recebe o top 3 de perfumes recomendados"
 )
-async def get_recommendations(answers: QuizAnswers):
+async def get_recommendations(answers: QuizAnswers, request: Request):
     """
     Processa as respostas do quiz e retorna recomendações.
     
@@ -153,10 +201,25 @@ async def get_recommendations(answers: QuizAnswers):
     os 3 perfumes mais compatíveis do catálogo.
     
     Se o Gemini não estiver configurado, usa sistema de regras como fallback.
+    
+    Sob carga, o controle de admissão responde `429` (limite do cliente) ou
+    `503` (sem vaga), com `Retry-After`; com `ADMISSAO_DEGRADAR=true`, a
+    falta de vaga é atendida pelo sistema de regras.
     """
     try:
-        result = await gemini_service.get_recommendations(answers)
-        return result
+        async with controle_admissao.admitir(request):
+            with RECOMENDACOES_EM_ANDAMENTO.track_inprogress():
+                result = await gemini_service.get_recommendations(answers)
+        return RespostaJSON(serializar_resultado(result))
+    except AdmissaoRecusada as e:
+        if e.status_code == 503 and controle_admissao.degradar:
+            result = gemini_service.recomendar_por_regras(answers)
+            return RespostaJSON(serializar_resultado(result))
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -164,31 +227,132 @@ async def get_recommendations(answers: QuizAnswers):
         )
 
 
+@app.post(
+    "/quiz/recommend/batch",
+    tags=["Quiz"],
+    dependencies=[Depends(exigir_admin)],
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "Uma linha JSON por registro"}},
+    summary="Recomendações em lote",
+    description="Recebe um arquivo JSONL ou CSV de respostas do quiz e devolve NDJSON na ordem de entrada"
+)
+async def get_recommendations_batch(
+    request: Request,
+    formato: Optional[str] = Query(None, pattern="^(jsonl|csv)$"),
+    motor: Optional[str] = Query(None, pattern="^(gemini|regras)$")
+):
+    """
+    Recomendações para um lote de respostas do quiz (requer token administrativo).
+    
+    Envie o arquivo no corpo (`Content-Type: application/x-ndjson` ou
+    `text/csv`) ou como upload multipart no campo `arquivo`.
+    
+    - **formato**: `jsonl` ou `csv` (padrão: pela extensão ou Content-Type)
+    - **motor**: `gemini` ou `regras` (padrão: Gemini se configurado)
+    
+    Cada linha da resposta traz `linha`, `id` (se enviado), `sucesso` e
+    `resultado` ou `erro`. Perfis repetidos são calculados uma única vez.
+    """
+    motor = motor or ("gemini" if gemini_service.is_configured else "regras")
+    if motor == "gemini" and not gemini_service.is_configured:
+        raise HTTPException(status_code=400, detail="Gemini não configurado - use motor=regras")
+    if motor == "regras" and not processador_lote.regras_disponiveis(gemini_service.catalogo):
+        raise HTTPException(status_code=503, detail="Catálogo não carregado de arquivo - lote por regras indisponível")
+    
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("arquivo")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Envie o arquivo no campo 'arquivo'")
+        arquivo, nome = upload.file, upload.filename
+        content_type = upload.content_type
+        fechar = form.close
+    else:
+        # O corpo é copiado para um arquivo temporário (em disco acima de 1 MB)
+        # antes da resposta começar a ser transmitida
+        arquivo = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        async for parte in request.stream():
+            arquivo.write(parte)
+        arquivo.seek(0)
+        nome = None
+        fechar = arquivo.close
+    
+    registros = ler_registros(arquivo, formato or formato_do_arquivo(nome, content_type))
+    return StreamingResponse(
+        processador_lote.processar(gemini_service, registros, motor),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(fechar)
+    )
+
+
 @app.get(
     "/perfumes",
     tags=["Perfumes"],
     summary="Listar todos os perfumes",
-    description="Retorna a lista completa de perfumes disponíveis"
+    description="Retorna a lista de perfumes disponíveis, com paginação e seleção de campos"
 )
 async def list_perfumes(
+    request: Request,
     categoria: str = None,
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: str = None,
+    fields: str = None
 ):
     """
-    Lista todos os perfumes do catálogo.
+    Lista os perfumes do catálogo.
     
     - **categoria**: Filtrar por categoria (compartilhaveis, masculinos, femininos)
     - **limit**: Limite de resultados (padrão: 50)
+    - **offset**: Posição inicial na lista (padrão: 0)
+    - **cursor**: Cursor retornado em `proximo_cursor` (substitui o offset)
+    - **fields**: Campos a retornar, separados por vírgula (ex: `nome,preco_pix`)
+    
+    A resposta inclui `ETag` ligado à versão do catálogo; envie
+    `If-None-Match` para receber `304 Not Modified`.
     """
-    perfumes = gemini_service.perfumes_data
+    catalogo = gemini_service.catalogo
     
-    if categoria:
-        perfumes = [p for p in perfumes if p.get("categoria") == categoria]
+    if cursor:
+        try:
+            offset = catalogo.offset_do_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    return {
-        "total": len(perfumes),
-        "perfumes": perfumes[:limit]
-    }
+    campos = None
+    if fields:
+        # Sem repetições e em ordem fixa: mesma projeção, mesmo ETag
+        campos = sorted({c.strip() for c in fields.split(",") if c.strip()})
+        invalidos = [c for c in campos if c not in CAMPOS_PUBLICOS]
+        if invalidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos inválidos: {', '.join(invalidos)}"
+            )
+    
+    perfumes = catalogo.fatia(categoria)
+    fim = offset + limit
+    
+    def gerar_conteudo():
+        return {
+            "total": len(perfumes),
+            "offset": offset,
+            "limit": limit,
+            "proximo_cursor": catalogo.cursor(fim) if fim < len(perfumes) else None,
+            "perfumes": [p.projetar(campos) for p in perfumes[offset:fim]]
+        }
+    
+    etag = gerar_etag(
+        f"{catalogo.versao}|{categoria}|{offset}|{limit}|{','.join(campos or [])}".encode()
+    )
+    return resposta_condicional(
+        request,
+        etag,
+        gerar_conteudo,
+        cache_control="public, max-age=300",
+        nome_cache="perfumes"
+    )
 
 
 @app.get(
@@ -211,7 +375,7 @@ async def get_perfume(nome: str):
             detail=f"Perfume '{nome}' não encontrado"
         )
     
-    return perfume
+    return perfume.to_dict()
 
 
 # ============ ERROR HANDLERS ============
@@ -224,7 +388,8 @@ async def http_exception_handler(request, exc):
             "sucesso": False,
             "erro": exc.detail,
             "detalhes": None
-        }
+        },
+        headers=exc.headers
     )
 
 
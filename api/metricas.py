@@ -0,0 +1,155 @@
+"""
+Métricas Prometheus da API
+==========================
+Histogramas por etapa da recomendação, latência HTTP por rota, contadores
+de cache e de erros do Gemini, expostos em ``GET /metrics``.
+"""
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+
+# Buckets pensados para chamadas ao Gemini (centenas de ms a dezenas de s)
+BUCKETS_SEGUNDOS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0
+)
+
+# ============ RECOMENDAÇÃO ============
+
+ETAPA_DURACAO = Histogram(
+    "quiz_recomendacao_etapa_segundos",
+    "Duração de cada etapa de /quiz/recommend",
+    ["etapa"],
+    buckets=BUCKETS_SEGUNDOS
+)
+
+RECOMENDACOES = Counter(
+    "quiz_recomendacoes_total",
+    "Recomendações geradas por origem (gemini, fallback ou degradada)",
+    ["origem"]
+)
+
+RECOMENDACOES_EM_ANDAMENTO = Gauge(
+    "quiz_recomendacoes_em_andamento",
+    "Requisições de recomendação em processamento"
+)
+
+# ============ ADMISSÃO ============
+
+ADMISSAO = Counter(
+    "quiz_admissao_total",
+    "Decisões do controle de admissão de /quiz/recommend",
+    ["resultado"]
+)
+
+ADMISSAO_FILA = Gauge(
+    "quiz_admissao_fila",
+    "Recomendações aguardando vaga"
+)
+
+# ============ LOTE ============
+
+LOTE_REGISTROS = Counter(
+    "quiz_lote_registros_total",
+    "Registros de /quiz/recommend/batch por resultado (ok, duplicado, invalido, erro)",
+    ["resultado"]
+)
+
+# ============ GEMINI ============
+
+GEMINI_ERROS = Counter(
+    "quiz_gemini_erros_total",
+    "Falhas na chamada ao Gemini por tipo",
+    ["tipo"]
+)
+
+GEMINI_TOKENS = Counter(
+    "quiz_gemini_tokens_total",
+    "Tokens consumidos no Gemini por modelo e tipo (prompt, cache, saida)",
+    ["modelo", "tipo"]
+)
+
+GEMINI_CUSTO = Counter(
+    "quiz_gemini_custo_estimado_usd_total",
+    "Custo estimado das chamadas ao Gemini em USD",
+    ["modelo"]
+)
+
+# ============ CACHE ============
+
+CACHE_CONSULTAS = Counter(
+    "quiz_cache_consultas_total",
+    "Consultas a caches por resultado (hit ou miss)",
+    ["cache", "resultado"]
+)
+
+# ============ HTTP ============
+
+HTTP_DURACAO = Histogram(
+    "quiz_http_requisicao_segundos",
+    "Duração das requisições HTTP por rota e status",
+    ["metodo", "rota", "status"],
+    buckets=BUCKETS_SEGUNDOS
+)
+
+HTTP_EM_ANDAMENTO = Gauge(
+    "quiz_http_requisicoes_em_andamento",
+    "Requisições HTTP em processamento"
+)
+
+
+def medir(etapa: str):
+    """Mede a duração de uma etapa (context manager ou decorador)"""
+    return ETAPA_DURACAO.labels(etapa).time()
+
+
+def registrar_cache(cache: str, hit: bool):
+    """Contabiliza uma consulta a cache"""
+    CACHE_CONSULTAS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def exportar() -> bytes:
+    """Métricas no formato texto do Prometheus"""
+    return generate_latest()
+
+
+TIPO_CONTEUDO = CONTENT_TYPE_LATEST
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI que mede latência e requisições em andamento"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"codigo": 500}
+
+        async def send_com_status(message):
+            if message["type"] == "http.response.start":
+                status["codigo"] = message["status"]
+            await send(message)
+
+        inicio = time.perf_counter()
+        HTTP_EM_ANDAMENTO.inc()
+        try:
+            await self.app(scope, receive, send_com_status)
+        finally:
+            HTTP_EM_ANDAMENTO.dec()
+            # Usar o template da rota para não explodir a cardinalidade
+            rota = scope.get("route")
+            caminho = getattr(rota, "path", None) or "nao_encontrada"
+            HTTP_DURACAO.labels(
+                scope["method"], caminho, str(status["codigo"])
+            ).observe(time.perf_counter() - inicio)
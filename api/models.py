@@ -1,7 +1,7 @@
 """
 Modelos Pydantic para a API de Quiz de Perfumes
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, List
 from enum import Enum
 
@@ -109,8 +109,8 @@ class Comentario(BaseModel):
     verificado: bool = False
 
 
-class PerfumeRecomendado(BaseModel):
-    """Perfume recomendado pelo quiz"""
+class PerfumeBase(BaseModel):
+    """Campos do catálogo exibidos em uma recomendação"""
     nome: str
     categoria: str
     preco: Optional[str] = None
@@ -126,9 +126,16 @@ class PerfumeRecomendado(BaseModel):
     imagem_url: Optional[str] = None
     link_produto: Optional[str] = None
     desconto: Optional[str] = None
+
+
+class PerfumeRecomendado(PerfumeBase):
+    """Perfume recomendado pelo quiz"""
     match_score: float = Field(..., description="Pontuação de compatibilidade (0-100)")
     motivo_recomendacao: str = Field(..., description="Motivo da recomendação pela IA")
 
+    # JSON pré-serializado dos campos do catálogo (ver catalogo.Perfume.recomendar)
+    _fragmento: Optional[bytes] = PrivateAttr(default=None)
+
 
 class QuizResult(BaseModel):
     """Resultado do quiz com top 3 perfumes"""
@@ -0,0 +1,165 @@
+"""
+Perfilamento sob demanda
+========================
+Ferramentas para diagnosticar o processo em produção sem custo quando
+inativas:
+
+- ``AmostradorPilhas``: amostra as pilhas de todas as threads
+  (``sys._current_frames``) por alguns segundos e agrega no formato
+  "collapsed" (``thread;quadro;quadro contagem``), aceito pelo
+  ``flamegraph.pl``, speedscope e similares;
+- ``MiddlewarePerfil``: com o cabeçalho ``X-Perfil: 1`` (e token
+  administrativo), roda o ``cProfile`` durante a requisição e guarda o
+  relatório pelo ID da requisição. Como o event loop é compartilhado, o
+  perfil inclui o que outras requisições executaram no mesmo intervalo.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Optional
+
+from logs import request_id_atual
+
+
+class AmostragemEmAndamento(RuntimeError):
+    """Já existe uma amostragem de pilhas em execução"""
+
+
+# ============ AMOSTRAGEM DE PILHAS ============
+
+class AmostradorPilhas:
+    """Amostrador de pilhas de todas as threads do processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _quadro(frame) -> str:
+        codigo = frame.f_code
+        return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{frame.f_lineno})"
+
+    def _colapsar(self, thread: str, frame) -> str:
+        quadros = []
+        while frame is not None:
+            quadros.append(self._quadro(frame))
+            frame = frame.f_back
+        quadros.append(thread)
+        return ";".join(reversed(quadros))
+
+    def amostrar(self, segundos: float, intervalo: float = 0.005) -> Counter:
+        """Amostra as pilhas por ``segundos`` (bloqueante: rode em uma thread)"""
+        if not self._lock.acquire(blocking=False):
+            raise AmostragemEmAndamento("Já existe uma amostragem em andamento")
+        try:
+            pilhas = Counter()
+            propria = threading.get_ident()
+            nomes: Dict[int, str] = {}
+            fim = time.monotonic() + segundos
+            while time.monotonic() < fim:
+                for ident, frame in sys._current_frames().items():
+                    if ident == propria:
+                        continue
+                    if ident not in nomes:
+                        nomes.update((t.ident, t.name) for t in threading.enumerate())
+                    pilhas[self._colapsar(nomes.get(ident, f"thread-{ident}"), frame)] += 1
+                time.sleep(intervalo)
+            return pilhas
+        finally:
+            self._lock.release()
+
+
+def formatar_colapsado(pilhas: Counter) -> str:
+    """Pilhas no formato collapsed (uma por linha, mais frequentes primeiro)"""
+    return "".join(f"{pilha} {contagem}\n" for pilha, contagem in pilhas.most_common())
+
+
+# ============ PERFIL POR REQUISIÇÃO ============
+
+class PerfisRequisicao:
+    """Relatórios do cProfile das últimas requisições perfiladas"""
+
+    def __init__(self, capacidade: int = 50):
+        self.capacidade = capacidade
+        self._perfis: "OrderedDict[str, str]" = OrderedDict()
+
+    def guardar(self, request_id: str, perfil: cProfile.Profile, linhas: int = 40):
+        saida = io.StringIO()
+        pstats.Stats(perfil, stream=saida).sort_stats("cumulative").print_stats(linhas)
+        self._perfis[request_id] = saida.getvalue()
+        while len(self._perfis) > self.capacidade:
+            self._perfis.popitem(last=False)
+
+    def obter(self, request_id: str) -> Optional[str]:
+        return self._perfis.get(request_id)
+
+    def ids(self) -> list:
+        return list(reversed(self._perfis))
+
+
+class MiddlewarePerfil:
+    """Middleware ASGI que perfila requisições com ``X-Perfil: 1``.
+
+    ``autorizar(authorization, x_admin_token)`` decide se o cliente pode
+    pedir o perfil; sem o cabeçalho o custo é apenas a busca dele.
+    """
+
+    def __init__(self, app, autorizar: Callable[[Optional[str], Optional[str]], bool]):
+        self.app = app
+        self.autorizar = autorizar
+        # Um perfil por vez: o cProfile não aceita perfis simultâneos na thread
+        self._ativo = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Só procura o cabeçalho; os demais são lidos apenas se ele vier
+        for nome, valor in scope["headers"]:
+            if nome == b"x-perfil":
+                break
+        else:
+            valor = None
+        if valor not in (b"1", b"true"):
+            await self.app(scope, receive, send)
+            return
+
+        cabecalhos = dict(scope["headers"])
+        autorizacao = cabecalhos.get(b"authorization")
+        token = cabecalhos.get(b"x-admin-token")
+        if not self.autorizar(autorizacao and autorizacao.decode(), token and token.decode()):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id_atual.get()
+        if self._ativo or not request_id:
+            await self.app(scope, receive, self._com_cabecalho(send, b"x-perfil", b"ocupado"))
+            return
+
+        self._ativo = True
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            await self.app(scope, receive, self._com_cabecalho(send, b"x-perfil-id", request_id.encode()))
+        finally:
+            perfil.disable()
+            self._ativo = False
+            perfis_requisicao.guardar(request_id, perfil)
+
+    @staticmethod
+    def _com_cabecalho(send, nome: bytes, valor: bytes):
+        async def enviar(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(nome, valor)]
+            await send(message)
+        return enviar
+
+
+# Instâncias globais
+amostrador = AmostradorPilhas()
+perfis_requisicao = PerfisRequisicao()
@@ -0,0 +1,282 @@
+"""
+Publicação do catálogo
+======================
+Leva a saída do scraper até a API sem rebuild da imagem:
+
+1. valida os perfumes contra o esquema da API (``PerfumeBase``): nome e
+   categoria obrigatórios, preços no formato ``R$1.234,56`` e ao menos um
+   preço (``preco`` ou ``preco_pix``) por perfume;
+2. remove nomes repetidos (o scraper lista o mesmo produto em mais de uma
+   categoria), mantendo o registro mais completo;
+3. valida os agregados das avaliações (``perfumes_avaliacoes.json`` do
+   scraper, ao lado da origem ou em ``--avaliacoes``), se houver;
+4. monta o catálogo e o snapshot binário uma única vez;
+5. grava os agregados, o ``perfumes.json`` e o snapshot no destino lido pela
+   API, com troca atômica (um leitor vê o conjunto anterior ou o novo, nunca
+   metade);
+6. avisa as APIs em execução (``POST /admin/catalogo/recarregar``).
+
+Com erros de validação nada é gravado e o comando termina com código 1.
+
+Uso:
+    python publicar.py ../scrapper/perfumes.json --notificar http://localhost:8000
+    python publicar.py ../scrapper/perfumes.json --destino /srv/catalogo/perfumes.json --verificar
+    docker compose exec -T api python publicar.py - --notificar http://localhost:8000 < scrapper/perfumes.json
+
+O destino padrão é o ``PERFUMES_JSON_PATH`` da API (o snapshot vai para
+``PERFUMES_SNAPSHOT_PATH`` ou ao lado do JSON, os agregados para
+``AVALIACOES_JSON_PATH`` ou ao lado do JSON). Sem agregados novos, os já
+publicados no destino continuam valendo. A notificação usa o ``ADMIN_TOKEN``.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from catalogo import (
+    CAMPOS_QUENTES,
+    Catalogo,
+    caminho_avaliacoes,
+    caminho_catalogo,
+    caminho_snapshot,
+    ler_avaliacoes,
+    versao_catalogo,
+)
+from models import PerfumeBase
+
+# Preço como o site exibe: "R$134,90", "R$1.234,56"
+RE_PRECO = re.compile(r"R\$\s*(\d{1,3}(?:\.\d{3})*|\d+),(\d{2})")
+CAMPOS_PRECO = ("preco", "preco_pix", "preco_original")
+
+
+@dataclass
+class Validacao:
+    """Perfumes aceitos, erros (impedem a publicação) e avisos"""
+    perfumes: List[Dict] = field(default_factory=list)
+    erros: List[str] = field(default_factory=list)
+    avisos: List[str] = field(default_factory=list)
+
+
+def preco_valido(valor: str) -> bool:
+    return RE_PRECO.fullmatch(valor.strip()) is not None
+
+
+def _problemas(perfume: Dict) -> List[str]:
+    """Erros de um registro em relação ao esquema da API"""
+    problemas = []
+    for campo in ("nome", "categoria"):
+        if not isinstance(perfume.get(campo), str) or not perfume[campo].strip():
+            problemas.append(f"{campo} ausente")
+    try:
+        PerfumeBase.model_validate({campo: perfume.get(campo) for campo in CAMPOS_QUENTES})
+    except ValidationError as e:
+        problemas.extend(f"{'.'.join(map(str, erro['loc']))}: {erro['msg']}" for erro in e.errors())
+    for campo in CAMPOS_PRECO:
+        valor = perfume.get(campo)
+        if isinstance(valor, str) and not preco_valido(valor):
+            problemas.append(f"{campo} ilegível: {valor!r}")
+    if not perfume.get("preco") and not perfume.get("preco_pix"):
+        problemas.append("sem preço")
+    return problemas
+
+
+def _completude(perfume: Dict) -> int:
+    return sum(perfume.get(campo) is not None for campo in CAMPOS_QUENTES)
+
+
+def validar(dados) -> Validacao:
+    """Valida os registros e remove nomes repetidos (fica o mais completo)"""
+    resultado = Validacao()
+    if not isinstance(dados, list):
+        resultado.erros.append("o arquivo deve conter uma lista de perfumes")
+        return resultado
+
+    # Nome normalizado -> posição em resultado.perfumes
+    por_nome: Dict[str, int] = {}
+    for i, perfume in enumerate(dados):
+        if not isinstance(perfume, dict):
+            resultado.erros.append(f"#{i}: registro não é um objeto")
+            continue
+        nome = perfume.get("nome")
+        chave = nome.strip().casefold() if isinstance(nome, str) else None
+        anterior = por_nome.get(chave) if chave else None
+        if anterior is not None:
+            existente = resultado.perfumes[anterior]
+            if _completude(perfume) > _completude(existente):
+                resultado.perfumes[anterior] = perfume
+                perfume, existente = existente, perfume
+            resultado.avisos.append(
+                f"#{i}: '{nome}' repetido ({perfume.get('categoria')} descartado, "
+                f"mantido {existente.get('categoria')})"
+            )
+            continue
+        if chave:
+            por_nome[chave] = len(resultado.perfumes)
+        resultado.perfumes.append(perfume)
+
+    # Validação depois da deduplicação: uma cópia incompleta descartada não é erro
+    for i, perfume in enumerate(resultado.perfumes):
+        for problema in _problemas(perfume):
+            resultado.erros.append(f"#{i} '{perfume.get('nome')}': {problema}")
+    return resultado
+
+
+def validar_avaliacoes(dados) -> List[str]:
+    """Erros dos agregados das avaliações (``link_produto`` -> agregados)"""
+    if not isinstance(dados, dict):
+        return ["o arquivo de avaliações deve conter um objeto"]
+    erros = []
+    for link, agregados in dados.items():
+        if not isinstance(agregados, dict):
+            erros.append(f"avaliações de {link}: registro não é um objeto")
+            continue
+        total = agregados.get("total")
+        if not isinstance(total, int) or total < 0:
+            erros.append(f"avaliações de {link}: total inválido ({total!r})")
+        nota = agregados.get("nota_media")
+        if nota is not None and (not isinstance(nota, (int, float)) or not 1 <= nota <= 5):
+            erros.append(f"avaliações de {link}: nota_media fora de 1-5 ({nota!r})")
+        if not isinstance(agregados.get("mencoes", {}), dict):
+            erros.append(f"avaliações de {link}: mencoes não é um objeto")
+    return erros
+
+
+# ============ GRAVAÇÃO ============
+
+def _gravar_atomico(destino: Path, bruto: bytes) -> Path:
+    """Grava em um temporário ao lado do destino (com fsync) e retorna o temporário"""
+    temporario = destino.with_name(destino.name + ".tmp")
+    try:
+        with open(temporario, "wb") as f:
+            f.write(bruto)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+    return temporario
+
+
+def publicar(perfumes: List[Dict], destino: Path, snapshot: Path,
+             avaliacoes: Optional[Dict[str, Dict]] = None) -> Catalogo:
+    """Grava agregados, JSON e snapshot do catálogo com troca atômica; retorna o catálogo montado"""
+    bruto = json.dumps(perfumes, ensure_ascii=False, indent=2).encode("utf-8")
+    destino_avaliacoes = caminho_avaliacoes(destino)
+    for pasta in {destino.parent, snapshot.parent, destino_avaliacoes.parent}:
+        pasta.mkdir(parents=True, exist_ok=True)
+
+    # Agregados primeiro: chaveados por link_produto, valem para o JSON
+    # anterior e para o novo. Sem agregados novos, ficam os já publicados.
+    if avaliacoes is not None:
+        temporario = _gravar_atomico(
+            destino_avaliacoes, json.dumps(avaliacoes, ensure_ascii=False, indent=2).encode("utf-8")
+        )
+        os.replace(temporario, destino_avaliacoes)
+    bruto_avaliacoes, agregados = ler_avaliacoes(destino_avaliacoes)
+
+    temporario = _gravar_atomico(destino, bruto)
+    try:
+        # O snapshot registra tamanho e mtime do JSON, que o rename preserva.
+        # Gravado antes do JSON: entre as duas trocas a API recusa o snapshot
+        # novo (não bate com o JSON antigo) e continua com o conjunto anterior.
+        catalogo = Catalogo(perfumes, temporario, versao_catalogo(bruto, bruto_avaliacoes),
+                            agregados, destino_avaliacoes)
+        catalogo.salvar_snapshot(snapshot)
+        os.replace(temporario, destino)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+    catalogo.caminho = destino
+    return catalogo
+
+
+def notificar(url: str, token: Optional[str]) -> Tuple[bool, str]:
+    """Pede a uma API em execução para recarregar o catálogo"""
+    cabecalhos = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        resposta = httpx.post(f"{url.rstrip('/')}/admin/catalogo/recarregar", headers=cabecalhos, timeout=60)
+    except httpx.HTTPError as e:
+        return False, str(e)
+    if resposta.status_code != 200:
+        return False, f"HTTP {resposta.status_code}: {resposta.text[:200]}"
+    corpo = resposta.json()
+    return True, f"versão {corpo['versao']} ({corpo['perfumes']} perfumes)"
+
+
+def _ler_origem(origem: str):
+    if origem == "-":
+        return json.load(sys.stdin.buffer)
+    with open(origem, "rb") as f:
+        return json.load(f)
+
+
+def main():
+    load_dotenv(Path(__file__).parent.parent / ".env")
+    parser = argparse.ArgumentParser(description="Valida e publica o catálogo gerado pelo scraper")
+    parser.add_argument("origem", help="perfumes.json do scraper ('-' para ler da entrada padrão)")
+    parser.add_argument("--destino", type=Path, help="perfumes.json lido pela API (padrão: PERFUMES_JSON_PATH)")
+    parser.add_argument("--avaliacoes", type=Path,
+                        help="Agregados das avaliações do scraper (padrão: perfumes_avaliacoes.json ao lado da origem)")
+    parser.add_argument("--notificar", action="append", default=[], metavar="URL",
+                        help="API a avisar após a publicação (pode repetir)")
+    parser.add_argument("--verificar", action="store_true", help="Apenas valida, sem gravar")
+    args = parser.parse_args()
+
+    try:
+        dados = _ler_origem(args.origem)
+    except (OSError, ValueError) as e:
+        sys.exit(f"✗ Não foi possível ler {args.origem}: {e}")
+
+    avaliacoes = args.avaliacoes
+    if avaliacoes is None and args.origem != "-":
+        ao_lado = Path(args.origem).with_name(f"{Path(args.origem).stem}_avaliacoes.json")
+        avaliacoes = ao_lado if ao_lado.exists() else None
+    agregados = None
+    if avaliacoes is not None:
+        try:
+            agregados = _ler_origem(str(avaliacoes))
+        except (OSError, ValueError) as e:
+            sys.exit(f"✗ Não foi possível ler {avaliacoes}: {e}")
+
+    validacao = validar(dados)
+    if agregados is not None:
+        validacao.erros.extend(validar_avaliacoes(agregados))
+    for aviso in validacao.avisos:
+        print(f"⚠ {aviso}")
+    for erro in validacao.erros:
+        print(f"✗ {erro}")
+    if validacao.erros:
+        sys.exit(f"✗ {len(validacao.erros)} erro(s) de validação - nada foi publicado")
+    print(f"✓ {len(validacao.perfumes)} perfumes válidos ({len(validacao.avisos)} aviso(s))")
+    if agregados is not None:
+        print(f"✓ Avaliações de {len(agregados)} perfumes em {avaliacoes}")
+    if args.verificar:
+        return
+
+    destino = args.destino or caminho_catalogo()
+    snapshot = caminho_snapshot(destino)
+    catalogo = publicar(validacao.perfumes, destino, snapshot, agregados)
+    com_avaliacoes = sum(p.avaliacoes_total > 0 for p in catalogo)
+    print(f"✓ Publicado em {destino} e {snapshot} (versão {catalogo.versao}, "
+          f"{com_avaliacoes} perfumes com avaliações)")
+
+    token = os.getenv("ADMIN_TOKEN")
+    falhas = 0
+    for url in args.notificar:
+        ok, detalhe = notificar(url, token)
+        falhas += not ok
+        print(f"{'✓' if ok else '✗'} {url}: {detalhe}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
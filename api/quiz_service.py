@@ -1,16 +1,29 @@
 """
 Serviço do Quiz de Perfumes
 """
-from typing import List
 from models import QuizQuestion, QuizQuestionsResponse
+from respostas import RecursoEstatico
 
 
 class QuizService:
     """Serviço para gerenciar as perguntas do quiz"""
     
-    @staticmethod
-    def get_questions() -> QuizQuestionsResponse:
+    def __init__(self):
+        # O questionário é constante: montado e serializado uma única vez
+        self._questions = self._build_questions()
+        self.recurso_perguntas = RecursoEstatico.de_objeto(
+            self._questions.model_dump(),
+            max_age=3600,
+            nome="quiz_questions"
+        )
+    
+    def get_questions(self) -> QuizQuestionsResponse:
         """Retorna todas as perguntas do quiz"""
+        return self._questions
+    
+    @staticmethod
+    def _build_questions() -> QuizQuestionsResponse:
+        """Monta o questionário do quiz"""
         
         perguntas = [
             QuizQuestion(
@@ -0,0 +1,218 @@
+"""
+Respostas HTTP otimizadas
+=========================
+Serialização JSON com orjson, montagem do resultado do quiz a partir dos
+fragmentos pré-serializados do catálogo e respostas estáticas com ETag.
+
+Cada codificação de um recurso estático (br, gzip, original) é uma
+representação diferente e tem ETag forte próprio (``"<hash>-br"``,
+``"<hash>-gz"``, ``"<hash>"``). As respostas condicionais dinâmicas, que o
+``GZipMiddleware`` comprime, seguem a mesma regra com o sufixo ``-gz``.
+
+``CompressaoGZip`` é o ``GZipMiddleware`` do Starlette com o ``Vary`` sem
+repetições: as respostas que negociam a codificação já enviam
+``Vary: Accept-Encoding`` e o middleware acrescenta o mesmo valor de novo.
+"""
+import gzip
+import hashlib
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional - sem ele, apenas gzip
+    brotli = None
+
+from metricas import registrar_cache
+from models import PerfumeRecomendado, QuizResult
+
+
+class RespostaJSON(Response):
+    """Resposta JSON serializada com orjson (aceita bytes já serializados)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+
+def serializar_recomendacao(rec: PerfumeRecomendado) -> bytes:
+    """Serializa uma recomendação, reaproveitando o fragmento do catálogo"""
+    if rec._fragmento is None:
+        return orjson.dumps(rec.model_dump())
+    return b"".join((
+        rec._fragmento,
+        b',"match_score":', orjson.dumps(rec.match_score),
+        b',"motivo_recomendacao":', orjson.dumps(rec.motivo_recomendacao),
+        b"}"
+    ))
+
+
+def serializar_resultado(result: QuizResult) -> bytes:
+    """Serializa o QuizResult sem revalidar as recomendações"""
+    cabecalho = orjson.dumps({
+        "sucesso": result.sucesso,
+        "mensagem": result.mensagem,
+        "perfil_usuario": result.perfil_usuario
+    })[:-1]
+    recomendacoes = b",".join(serializar_recomendacao(r) for r in result.recomendacoes)
+    return b"".join((
+        cabecalho,
+        b',"recomendacoes":[', recomendacoes, b"]",
+        b',"dica_extra":', orjson.dumps(result.dica_extra),
+        b"}"
+    ))
+
+
+# ============ RESPOSTAS ESTÁTICAS ============
+
+# Sufixo do ETag de cada codificação
+SUFIXOS_ETAG = {"br": "-br", "gzip": "-gz"}
+
+def gerar_etag(corpo: bytes) -> str:
+    """ETag forte baseado no hash do conteúdo"""
+    return '"' + hashlib.sha256(corpo).hexdigest()[:32] + '"'
+
+
+def etag_variante(etag: str, codificacao: str) -> str:
+    """ETag da representação do recurso na codificação dada"""
+    return etag[:-1] + SUFIXOS_ETAG[codificacao] + '"'
+
+
+def etag_corresponde(if_none_match: Optional[str], *etags: str) -> bool:
+    """Verifica se o cabeçalho If-None-Match contém algum dos ETags atuais"""
+    if not if_none_match:
+        return False
+    for valor in if_none_match.split(","):
+        valor = valor.strip()
+        if valor == "*":
+            return True
+        if valor.startswith("W/"):
+            valor = valor[2:]
+        if valor in etags:
+            return True
+    return False
+
+
+def codificacoes_aceitas(accept_encoding: Optional[str]) -> Set[str]:
+    """Extrai as codificações aceitas pelo cliente (ignora q=0)"""
+    aceitas = set()
+    for item in (accept_encoding or "").split(","):
+        partes = [p.strip() for p in item.split(";")]
+        if not partes[0]:
+            continue
+        if any(p.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000") for p in partes[1:]):
+            continue
+        aceitas.add(partes[0].lower())
+    return aceitas
+
+
+def resposta_condicional(
+    request: Request,
+    etag: str,
+    gerar_conteudo: Callable[[], Any],
+    cache_control: str,
+    nome_cache: str = "http"
+) -> Response:
+    """Responde 304 se o ETag corresponder; senão, gera e serializa o conteúdo
+
+    O corpo é comprimido pelo ``GZipMiddleware`` quando o cliente aceita
+    gzip, então o ETag enviado é o da variante ``-gz`` nesse caso.
+    """
+    if "gzip" in codificacoes_aceitas(request.headers.get("accept-encoding")):
+        etag = etag_variante(etag, "gzip")
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    hit = etag_corresponde(request.headers.get("if-none-match"), etag)
+    registrar_cache(nome_cache, hit)
+    if hit:
+        return Response(status_code=304, headers=headers)
+    return RespostaJSON(gerar_conteudo(), headers=headers)
+
+
+class RecursoEstatico:
+    """Corpo JSON imutável, serializado e comprimido uma única vez"""
+
+    def __init__(self, corpo: bytes, max_age: int = 3600, nome: str = "estatico"):
+        self.corpo = corpo
+        self.nome = nome
+        self.etag = gerar_etag(corpo)
+        self.cache_control = f"public, max-age={max_age}"
+
+        # Variantes pré-comprimidas (corpo e ETag), em ordem de preferência
+        self.variantes: Dict[str, Tuple[bytes, str]] = {}
+        if brotli is not None:
+            self.variantes["br"] = (brotli.compress(corpo, quality=11), etag_variante(self.etag, "br"))
+        self.variantes["gzip"] = (gzip.compress(corpo, compresslevel=9, mtime=0), etag_variante(self.etag, "gzip"))
+        self.etags = (self.etag,) + tuple(etag for _, etag in self.variantes.values())
+
+    @classmethod
+    def de_objeto(cls, conteudo: Any, max_age: int = 3600, nome: str = "estatico") -> "RecursoEstatico":
+        """Cria o recurso serializando o conteúdo com orjson"""
+        return cls(orjson.dumps(conteudo), max_age=max_age, nome=nome)
+
+    def negociar(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes, str]:
+        """Codificação (None: original), corpo e ETag da representação escolhida"""
+        aceitas = codificacoes_aceitas(accept_encoding)
+        for codificacao, (corpo, etag) in self.variantes.items():
+            if codificacao in aceitas:
+                return codificacao, corpo, etag
+        return None, self.corpo, self.etag
+
+    def responder(self, request: Request) -> Response:
+        """Responde com 304, variante comprimida ou corpo original"""
+        codificacao, corpo, etag = self.negociar(request.headers.get("accept-encoding"))
+        headers = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        # Qualquer representação em cache é do mesmo conteúdo: vale o 304
+        hit = etag_corresponde(request.headers.get("if-none-match"), *self.etags)
+        registrar_cache(self.nome, hit)
+        if hit:
+            return Response(status_code=304, headers=headers)
+
+        if codificacao is not None:
+            headers["Content-Encoding"] = codificacao
+        return RespostaJSON(corpo, headers=headers)
+
+
+# ============ COMPRESSÃO ============
+
+def _vary_sem_repeticoes(message: Message):
+    """Junta os cabeçalhos Vary da resposta em um só, sem valores repetidos"""
+    headers = MutableHeaders(raw=message["headers"])
+    valores = headers.getlist("vary")
+    if not valores:
+        return
+    unicos: Dict[str, str] = {}
+    for valor in ",".join(valores).split(","):
+        valor = valor.strip()
+        if valor:
+            unicos.setdefault(valor.lower(), valor)
+    del headers["vary"]
+    headers["Vary"] = ", ".join(unicos.values())
+
+
+class CompressaoGZip(GZipMiddleware):
+    """GZipMiddleware com um único Vary por resposta"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await super().__call__(scope, receive, send)
+            return
+
+        async def enviar(message: Message):
+            if message["type"] == "http.response.start":
+                _vary_sem_repeticoes(message)
+            await send(message)
+
+        await super().__call__(scope, receive, enviar)
@@ -0,0 +1,127 @@
+"""
+Transporte HTTP do cliente Gemini
+=================================
+Clientes httpx com pool de conexões, keep-alive, HTTP/2 e timeouts
+configuráveis, entregues ao ``genai.Client`` via ``HttpOptions``.
+
+Variáveis de ambiente:
+- ``GEMINI_TIMEOUT_CONEXAO``: timeout de conexão/TLS em segundos (padrão: 5)
+- ``GEMINI_TIMEOUT_LEITURA``: timeout de leitura em segundos (padrão: 60)
+- ``GEMINI_POOL_CONEXOES``: máximo de conexões simultâneas (padrão: 32)
+- ``GEMINI_KEEPALIVE_CONEXOES``: conexões ociosas mantidas (padrão: 32)
+- ``GEMINI_KEEPALIVE_SEGUNDOS``: tempo de vida de conexões ociosas (padrão: 120)
+- ``GEMINI_HTTP2``: ``true`` (padrão) ou ``false``; requer o pacote ``h2``
+- ``GEMINI_BASE_URL``: endpoint alternativo (proxy ou servidor de testes)
+"""
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+import httpx
+from google.genai import types
+
+logger = logging.getLogger("transporte")
+
+
+def _env_float(nome: str, padrao: float) -> float:
+    return float(os.getenv(nome, str(padrao)))
+
+
+def _env_int(nome: str, padrao: int) -> int:
+    return int(os.getenv(nome, str(padrao)))
+
+
+@dataclass
+class ConfigTransporte:
+    """Parâmetros do transporte HTTP do Gemini"""
+    timeout_conexao: float = field(default_factory=lambda: _env_float("GEMINI_TIMEOUT_CONEXAO", 5.0))
+    timeout_leitura: float = field(default_factory=lambda: _env_float("GEMINI_TIMEOUT_LEITURA", 60.0))
+    pool_conexoes: int = field(default_factory=lambda: _env_int("GEMINI_POOL_CONEXOES", 32))
+    keepalive_conexoes: int = field(default_factory=lambda: _env_int("GEMINI_KEEPALIVE_CONEXOES", 32))
+    keepalive_segundos: float = field(default_factory=lambda: _env_float("GEMINI_KEEPALIVE_SEGUNDOS", 120.0))
+    http2: bool = field(default_factory=lambda: os.getenv("GEMINI_HTTP2", "true").lower() == "true")
+    base_url: Optional[str] = field(default_factory=lambda: os.getenv("GEMINI_BASE_URL") or None)
+    verify: Union[bool, str] = True
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.timeout_conexao,
+            read=self.timeout_leitura,
+            write=self.timeout_leitura,
+            pool=self.timeout_conexao
+        )
+
+    @property
+    def limites(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.pool_conexoes,
+            max_keepalive_connections=self.keepalive_conexoes,
+            keepalive_expiry=self.keepalive_segundos
+        )
+
+    @property
+    def http2_disponivel(self) -> bool:
+        return self.http2 and importlib.util.find_spec("h2") is not None
+
+
+class _ClienteAsync(httpx.AsyncClient):
+    """AsyncClient que usa o timeout do cliente quando o SDK envia timeout=None"""
+
+    def build_request(self, *args, timeout=httpx.USE_CLIENT_DEFAULT, **kwargs):
+        if timeout is None:
+            timeout = httpx.USE_CLIENT_DEFAULT
+        return super().build_request(*args, timeout=timeout, **kwargs)
+
+
+class _ClienteSync(httpx.Client):
+    """Client que usa o timeout do cliente quando o SDK envia timeout=None"""
+
+    def build_request(self, *args, timeout=httpx.USE_CLIENT_DEFAULT, **kwargs):
+        if timeout is None:
+            timeout = httpx.USE_CLIENT_DEFAULT
+        return super().build_request(*args, timeout=timeout, **kwargs)
+
+
+class TransporteGemini:
+    """Clientes HTTP (sync e async) compartilhados pelo genai.Client"""
+
+    def __init__(self, config: Optional[ConfigTransporte] = None):
+        self.config = config or ConfigTransporte()
+        if self.config.http2 and not self.config.http2_disponivel:
+            logger.warning("GEMINI_HTTP2=true, mas o pacote h2 não está instalado - usando HTTP/1.1")
+
+        argumentos = {
+            "timeout": self.config.timeout,
+            "limits": self.config.limites,
+            "http2": self.config.http2_disponivel,
+            "verify": self.config.verify,
+        }
+        self.cliente_async = _ClienteAsync(**argumentos)
+        self.cliente_sync = _ClienteSync(**argumentos)
+
+    def http_options(self) -> types.HttpOptions:
+        """HttpOptions para o genai.Client usando os clientes deste transporte"""
+        opcoes = {
+            "httpx_client": self.cliente_sync,
+            "httpx_async_client": self.cliente_async,
+        }
+        if self.config.base_url:
+            opcoes["base_url"] = self.config.base_url
+        return types.HttpOptions(**opcoes)
+
+    def descricao(self) -> str:
+        """Resumo da configuração para os logs de inicialização"""
+        c = self.config
+        return (
+            f"pool={c.pool_conexoes}, keepalive={c.keepalive_conexoes}/{c.keepalive_segundos:g}s, "
+            f"http2={c.http2_disponivel}, timeouts={c.timeout_conexao:g}s/{c.timeout_leitura:g}s"
+            + (f", base_url={c.base_url}" if c.base_url else "")
+        )
+
+    async def fechar(self):
+        """Fecha as conexões do pool"""
+        await self.cliente_async.aclose()
+        self.cliente_sync.close()
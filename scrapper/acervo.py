@@ -0,0 +1,136 @@
+"""
+Acervo de respostas gravadas
+============================
+Grava as respostas do site em um banco SQLite (corpo comprimido com zlib,
+chave = URL) e as reproduz depois sem rede, para rodar o scraping completo
+em segundos ao ajustar a extração e para ter um corpus fixo nos benchmarks
+de parse (``bench/parse.py --acervo``).
+
+Funciona como transporte do httpx (``Coletor(transporte=...)``): tentativas,
+redirecionamentos, cookies e o modo incremental continuam iguais.
+
+- gravação: repassa as requisições ao site (sem os cabeçalhos condicionais,
+  para guardar sempre o corpo completo) e guarda cada resposta, já
+  descomprimida do ``Content-Encoding``;
+- reprodução: responde só com o que foi gravado; URLs ausentes viram ``404``.
+
+Uso:
+    python scraper_perfumes.py --gravar acervo.sqlite
+    python scraper_perfumes.py --reproduzir acervo.sqlite --estado ""
+"""
+import json
+import sqlite3
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import httpx
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    cabecalhos TEXT NOT NULL,
+    corpo BLOB NOT NULL,
+    gravado_em TEXT NOT NULL
+);
+"""
+
+# Não valem mais depois que o corpo é guardado descomprimido
+CABECALHOS_DESCARTADOS = {"content-encoding", "content-length", "transfer-encoding"}
+CABECALHOS_CONDICIONAIS = ("if-none-match", "if-modified-since")
+
+# Respostas que não representam a página (vazias ou falhas momentâneas)
+STATUS_NAO_GRAVADOS = {304, 429, 500, 502, 503, 504}
+
+
+class AcervoRespostas:
+    """Respostas por URL: status, cabeçalhos e corpo comprimido"""
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._conexao = sqlite3.connect(self.caminho)
+        self._conexao.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + ESQUEMA)
+
+    def gravar(self, url: str, status: int, cabecalhos: httpx.Headers, corpo: bytes):
+        guardados = [(nome, valor) for nome, valor in cabecalhos.multi_items()
+                     if nome.lower() not in CABECALHOS_DESCARTADOS]
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?)",
+                (url, status, json.dumps(guardados), zlib.compress(corpo),
+                 datetime.now(timezone.utc).isoformat(timespec="seconds"))
+            )
+
+    def obter(self, url: str) -> Optional[Tuple[int, list, bytes]]:
+        linha = self._conexao.execute(
+            "SELECT status, cabecalhos, corpo FROM respostas WHERE url = ?", (url,)
+        ).fetchone()
+        if linha is None:
+            return None
+        return linha[0], json.loads(linha[1]), zlib.decompress(linha[2])
+
+    def paginas(self) -> Iterator[Tuple[str, bytes]]:
+        """URL e corpo das respostas 200, em ordem de URL"""
+        for url, corpo in self._conexao.execute(
+            "SELECT url, corpo FROM respostas WHERE status = 200 ORDER BY url"
+        ):
+            yield url, zlib.decompress(corpo)
+
+    def resumo(self) -> Tuple[int, int]:
+        """Quantidade de respostas e bytes comprimidos"""
+        return self._conexao.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(corpo)), 0) FROM respostas").fetchone()
+
+    def fechar(self):
+        self._conexao.close()
+
+
+class TransporteGravacao(httpx.AsyncBaseTransport):
+    """Repassa as requisições ao transporte real e grava as respostas"""
+
+    def __init__(self, acervo: AcervoRespostas, transporte: Optional[httpx.AsyncBaseTransport] = None):
+        self.acervo = acervo
+        self.transporte = transporte or httpx.AsyncHTTPTransport()
+        self.estatisticas = Counter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for nome in CABECALHOS_CONDICIONAIS:
+            request.headers.pop(nome, None)
+        resposta = await self.transporte.handle_async_request(request)
+        # Lida pelo Response para sair descomprimida do Content-Encoding
+        original = httpx.Response(resposta.status_code, headers=resposta.headers,
+                                  stream=resposta.stream, request=request)
+        try:
+            corpo = await original.aread()
+        finally:
+            await original.aclose()
+
+        if resposta.status_code not in STATUS_NAO_GRAVADOS:
+            self.acervo.gravar(str(request.url), resposta.status_code, resposta.headers, corpo)
+            self.estatisticas["gravadas"] += 1
+        cabecalhos = [(nome, valor) for nome, valor in resposta.headers.multi_items()
+                      if nome.lower() not in CABECALHOS_DESCARTADOS]
+        return httpx.Response(resposta.status_code, headers=cabecalhos, content=corpo,
+                              extensions=resposta.extensions)
+
+    async def aclose(self):
+        await self.transporte.aclose()
+
+
+class TransporteReproducao(httpx.AsyncBaseTransport):
+    """Responde com as respostas gravadas, sem rede"""
+
+    def __init__(self, acervo: AcervoRespostas):
+        self.acervo = acervo
+        self.estatisticas = Counter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        gravada = self.acervo.obter(str(request.url))
+        if gravada is None:
+            self.estatisticas["ausentes"] += 1
+            return httpx.Response(404, content=b"", request=request)
+        status, cabecalhos, corpo = gravada
+        self.estatisticas["reproduzidas"] += 1
+        return httpx.Response(status, headers=cabecalhos, content=corpo, request=request)
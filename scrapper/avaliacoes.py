@@ -0,0 +1,189 @@
+"""
+Avaliações dos produtos
+=======================
+Todas as avaliações de cada perfume, em um banco SQLite à parte
+(``avaliacoes.sqlite``): o scraper segue o "Carregar mais" de cada produto
+e grava as páginas conforme chegam, sem acumular comentários em memória nem
+no registro do perfume (o catálogo não leva comentários).
+
+O banco persiste entre execuções como o estado incremental: avaliações já
+vistas não se repetem (chave = produto + data + autor + texto) e produtos
+não revisitados mantêm o que foi coletado antes. A tabela ``produtos``
+marca os produtos com todas as páginas percorridas; os demais têm a página
+baixada de novo mesmo sem mudança (primeira execução com avaliações ou
+coleta interrompida no meio).
+
+Ao final da coleta os agregados por perfume vão para
+``perfumes_avaliacoes.json`` (chave = ``link_produto``), pequenos o bastante
+para servir de atributos de pontuação na API (``api/catalogo.py``):
+
+- ``total``, ``primeira`` e ``ultima`` (datas ISO) e ``ultimos_90_dias``;
+- ``notas`` (avaliações com nota em estrelas) e ``nota_media`` (1 a 5, None
+  sem notas);
+- ``mencoes``: quantas avaliações citam cada termo de ``TERMOS`` (fixação,
+  projeção, duração...), sem diferenciar acentos e maiúsculas.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import unicodedata
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS avaliacoes (
+    id TEXT PRIMARY KEY,
+    link_produto TEXT NOT NULL,
+    data TEXT,
+    nota INTEGER,
+    autor TEXT NOT NULL,
+    comentario TEXT NOT NULL,
+    verificado INTEGER NOT NULL,
+    vista_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS avaliacoes_produto ON avaliacoes (link_produto, data);
+CREATE TABLE IF NOT EXISTS produtos (
+    link_produto TEXT PRIMARY KEY,
+    paginas INTEGER NOT NULL,
+    coletado_em TEXT NOT NULL
+);
+"""
+
+# Termo -> expressão sobre o texto sem acentos e em minúsculas
+TERMOS = {
+    "fixacao": re.compile(r"\bfixa|\bfixou|\bgruda"),
+    "projecao": re.compile(r"\bproje[ct]|\brastro"),
+    "duracao": re.compile(r"\bdura|\bhoras\b|\bo dia (todo|inteiro)"),
+    "elogios": re.compile(r"\belogi"),
+    "semelhanca": re.compile(r"\bparecid|\bidentic|\bigualzinh|\bigual ao"),
+    "doce": re.compile(r"\bdoc[ei]"),
+    "forte": re.compile(r"\bfortes?\b|\bintens"),
+    "suave": re.compile(r"\bsuave|\bleve\b|\bfraco"),
+}
+
+# Janela de ``ultimos_90_dias``
+DIAS_RECENTES = 90
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos"""
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def data_iso(data: str) -> Optional[str]:
+    """"14/01/2026" -> "2026-01-14" (None se inválida)"""
+    try:
+        return datetime.strptime(data, "%d/%m/%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+class AvaliacoesProdutos:
+    """Avaliações por produto e agregados por perfume"""
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._conexao = sqlite3.connect(self.caminho)
+        self._conexao.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + ESQUEMA)
+        colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(avaliacoes)")}
+        if "nota" not in colunas:
+            # Banco criado antes da coleta das notas: as avaliações já vistas
+            # recebem a nota quando a página é processada de novo (--completo
+            # reprocessa todas)
+            with self._conexao:
+                self._conexao.execute("ALTER TABLE avaliacoes ADD COLUMN nota INTEGER")
+        self.novas = 0
+        self.paginas = 0
+
+    def gravar(self, link_produto: str, avaliacoes: Iterable[Dict]) -> int:
+        """Grava uma página de avaliações; retorna quantas eram novas"""
+        agora = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        linhas = []
+        for avaliacao in avaliacoes:
+            chave = "\x1f".join((link_produto, avaliacao["data"], avaliacao["autor"], avaliacao["comentario"]))
+            linhas.append((
+                hashlib.blake2b(chave.encode("utf-8"), digest_size=16).hexdigest(),
+                link_produto, data_iso(avaliacao["data"]), avaliacao.get("nota"), avaliacao["autor"],
+                avaliacao["comentario"], int(avaliacao.get("verificado", True)), agora
+            ))
+        with self._conexao:
+            antes = self._conexao.total_changes
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO avaliacoes (id, link_produto, data, nota, autor, comentario, verificado, vista_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", linhas
+            )
+            novas = self._conexao.total_changes - antes
+            self._conexao.executemany(
+                "UPDATE avaliacoes SET nota = ? WHERE id = ? AND nota IS NULL",
+                [(linha[3], linha[0]) for linha in linhas if linha[3] is not None]
+            )
+        self.novas += novas
+        self.paginas += 1
+        return novas
+
+    def concluir(self, link_produto: str, paginas: int):
+        """Marca o produto como percorrido até a última página"""
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO produtos VALUES (?, ?, ?)",
+                (link_produto, paginas, datetime.now(timezone.utc).isoformat(timespec="seconds"))
+            )
+
+    def percorrido(self, link_produto: str) -> bool:
+        return self._conexao.execute(
+            "SELECT 1 FROM produtos WHERE link_produto = ?", (link_produto,)
+        ).fetchone() is not None
+
+    def agregados(self, hoje: Optional[date] = None) -> Iterator[Tuple[str, Dict]]:
+        """Agregados por produto, lendo as avaliações em fluxo (uma por vez)"""
+        limite = ((hoje or date.today()) - timedelta(days=DIAS_RECENTES)).isoformat()
+        linhas = self._conexao.execute(
+            "SELECT link_produto, data, nota, comentario FROM avaliacoes ORDER BY link_produto"
+        )
+        for link, grupo in groupby(linhas, key=lambda linha: linha[0]):
+            total = recentes = notas = soma_notas = 0
+            primeira = ultima = None
+            mencoes = dict.fromkeys(TERMOS, 0)
+            for _, data, nota, comentario in grupo:
+                total += 1
+                if nota is not None:
+                    notas += 1
+                    soma_notas += nota
+                if data:
+                    primeira = min(primeira or data, data)
+                    ultima = max(ultima or data, data)
+                    recentes += data >= limite
+                texto = normalizar(comentario)
+                for termo, expressao in TERMOS.items():
+                    mencoes[termo] += expressao.search(texto) is not None
+            yield link, {
+                "total": total,
+                "primeira": primeira,
+                "ultima": ultima,
+                f"ultimos_{DIAS_RECENTES}_dias": recentes,
+                "notas": notas,
+                "nota_media": round(soma_notas / notas, 2) if notas else None,
+                "mencoes": mencoes,
+            }
+
+    def gravar_agregados(self, destino: Path, links: Optional[Set[str]] = None) -> int:
+        """Grava os agregados (só dos ``links`` informados); retorna quantos perfumes"""
+        agregados = {link: dados for link, dados in self.agregados() if links is None or link in links}
+        temporario = Path(destino).with_name(Path(destino).name + ".tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(agregados, f, ensure_ascii=False, indent=2)
+        temporario.replace(destino)
+        return len(agregados)
+
+    def resumo(self) -> Tuple[int, int]:
+        """Quantidade de avaliações e de produtos"""
+        return self._conexao.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT link_produto) FROM avaliacoes"
+        ).fetchone()
+
+    def fechar(self):
+        self._conexao.close()
@@ -0,0 +1,181 @@
+"""
+Tempo de parse por página
+=========================
+Mede a extração (``extracao.py``) sobre as páginas do site local
+(``site_fake``) ou de um acervo gravado do site real (``--acervo``, ver
+``acervo.py``): páginas de produto e de listagem, sem rede. Os resultados
+podem ser gravados e comparados com uma execução anterior; medições mais
+lentas que a base além da tolerância são sinalizadas.
+
+Uso:
+    python bench/parse.py --saida base.json
+    python bench/parse.py --base base.json --tolerancia 20
+    python bench/parse.py --produtos 1000
+    python bench/parse.py --acervo acervo.sqlite
+    python bench/parse.py --processos 4      # vazão do parse no pool de processos do scraper
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+RAIZ_SCRAPER = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ_SCRAPER))
+
+from acervo import AcervoRespostas  # noqa: E402
+from bench.site_fake import ROTULOS_CATEGORIA, montar_site, produtos_fixture  # noqa: E402
+from extracao import extrair_listagem, extrair_produto  # noqa: E402
+
+BASE_URL = "http://127.0.0.1"
+
+
+def cronometrar(funcao: Callable[[bytes], object], paginas: List[bytes], repeticoes: int) -> Dict:
+    """Tempo por página (ms): mediana e p95 da melhor das repetições"""
+    melhor: Optional[List[float]] = None
+    for _ in range(repeticoes):
+        tempos = []
+        for pagina in paginas:
+            inicio = time.perf_counter()
+            funcao(pagina)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        if melhor is None or sum(tempos) < sum(melhor):
+            melhor = tempos
+    melhor.sort()
+    return {
+        "paginas": len(paginas),
+        "kb_medio": round(sum(map(len, paginas)) / len(paginas) / 1024, 1),
+        "mediana_ms": round(statistics.median(melhor), 3),
+        "p95_ms": round(melhor[math.ceil(len(melhor) * 0.95) - 1], 3),
+        "paginas_por_s": round(len(melhor) / (sum(melhor) / 1000), 1),
+    }
+
+
+def vazao_pool(paginas: List[bytes], processos: int, repeticoes: int) -> Dict:
+    """Páginas de produto/s no pool, uma tarefa por página como no scraper"""
+    with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(extrair_produto, paginas[:processos * 2]))  # sobe os processos
+        melhor = None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            list(pool.map(extrair_produto, paginas))
+            decorrido = time.perf_counter() - inicio
+            melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return {
+        "paginas": len(paginas),
+        "processos": processos,
+        "paginas_por_s": round(len(paginas) / melhor, 1),
+    }
+
+
+def paginas_do_site(produtos: Optional[int]) -> Tuple[List[bytes], List[bytes]]:
+    """Páginas de produto e de listagem do ``site_fake``"""
+    site = montar_site(produtos_fixture(produtos))
+    site.pop("/")
+    listagens = [site.pop(caminho) for caminho in list(site) if caminho.split("?")[0].strip("/") in ROTULOS_CATEGORIA]
+    return list(site.values()), listagens
+
+
+def paginas_do_acervo(caminho: Path) -> Tuple[List[bytes], List[bytes]]:
+    """Páginas de produto e de listagem gravadas (a página inicial fica de fora)"""
+    produtos, listagens = [], []
+    acervo = AcervoRespostas(caminho)
+    try:
+        for url, corpo in acervo.paginas():
+            secao = urlsplit(url).path.strip("/")
+            if not secao:
+                continue
+            (listagens if secao in ROTULOS_CATEGORIA else produtos).append(corpo)
+    finally:
+        acervo.fechar()
+    return produtos, listagens
+
+
+def executar(args) -> Dict[str, Dict]:
+    produtos, listagens = paginas_do_acervo(args.acervo) if args.acervo else paginas_do_site(args.produtos)
+    if not produtos or not listagens:
+        sys.exit("Sem páginas de produto e de listagem para medir")
+    resultados = {
+        "produto": cronometrar(extrair_produto, produtos, args.repeticoes),
+        "listagem": cronometrar(lambda pagina: extrair_listagem(pagina, BASE_URL), listagens, args.repeticoes),
+    }
+    if args.processos:
+        resultados["produto_pool"] = vazao_pool(produtos, args.processos, args.repeticoes)
+    return resultados
+
+
+def comparar(resultados: Dict, base: Dict, tolerancia: float) -> List[str]:
+    """Medições mais lentas que a base além da tolerância (em %)"""
+    regressoes = []
+    print(f"\nComparação com {base.get('commit') or 'base'} ({base.get('gerado_em')}):")
+    for nome, medida in resultados.items():
+        anterior = base.get("resultados", {}).get(nome)
+        if not anterior or "mediana_ms" not in medida:
+            continue
+        delta = (medida["mediana_ms"] / anterior["mediana_ms"] - 1) * 100
+        marca = "✗" if delta > tolerancia else " "
+        print(f" {marca} {nome:<9}: {delta:+7.1f}%")
+        if delta > tolerancia:
+            regressoes.append(f"{nome} {delta:+.1f}%")
+    return regressoes
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ_SCRAPER,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de parse por página")
+    parser.add_argument("--produtos", type=int, help="Catálogo sintético (padrão: os do perfumes.json)")
+    parser.add_argument("--acervo", type=Path, help="Usa as páginas gravadas com --gravar no scraper")
+    parser.add_argument("--processos", type=int, default=0, help="Mede também a vazão no pool com N processos")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", type=Path, help="Grava os resultados em JSON")
+    parser.add_argument("--base", type=Path, help="Resultados anteriores para comparação")
+    parser.add_argument("--tolerancia", type=float, default=20.0, help="Regressão tolerada em %%")
+    args = parser.parse_args()
+
+    resultados = executar(args)
+    for nome, medida in resultados.items():
+        if "processos" in medida:
+            print(f"{nome:<9} {medida['paginas']:>5} páginas em {medida['processos']} processos: "
+                  f"{medida['paginas_por_s']:,.0f} páginas/s")
+            continue
+        print(f"{nome:<9} {medida['paginas']:>5} páginas ({medida['kb_medio']} KB): "
+              f"mediana {medida['mediana_ms']:.2f} ms, p95 {medida['p95_ms']:.2f} ms, "
+              f"{medida['paginas_por_s']:,.0f} páginas/s")
+
+    if args.saida:
+        args.saida.write_text(json.dumps({
+            "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "produtos": args.produtos,
+            "acervo": str(args.acervo) if args.acervo else None,
+            "resultados": resultados,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Resultados gravados em {args.saida}")
+
+    if args.base:
+        regressoes = comparar(resultados, json.loads(args.base.read_text(encoding="utf-8")), args.tolerancia)
+        if regressoes:
+            print("✗ Regressões: " + "; ".join(regressoes))
+            sys.exit(1)
+        print("✓ Sem regressões acima da tolerância")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Site local que imita a loja
+===========================
+Servidor HTTP (biblioteca padrão) com páginas geradas a partir do
+``perfumes.json``: homepage, listagem de cada categoria e página de cada
+produto, com os mesmos textos que o scraper procura (preços, volume, notas,
+"A Experiência", avaliações) e o volume de marcação de uma página real
+(menus, produtos relacionados, scripts). Serve para medir o scraper sem
+rede.
+
+- ``--latencia-ms``: atraso por resposta (simula a rede e o servidor);
+- ``--produtos N``: catálogo sintético replicando os perfumes reais;
+- listagens paginadas como na loja: ``--por-pagina`` produtos por página,
+  demais páginas em ``?offset=N`` e o total em "N itens";
+- ``ETag``/``Last-Modified`` com ``304`` nas requisições condicionais
+  (``--sem-validadores`` desliga, como em servidores que não os enviam);
+- ``--limite-taxa N``: acima de N requisições/s responde ``429`` com
+  ``Retry-After: 1``, como um site que limita a coleta;
+- ``--avaliacoes N``: N avaliações sintéticas (com nota em estrelas) por
+  produto, ``--avaliacoes-por-pagina`` por vez; as seguintes vêm do link
+  "Carregar mais" (``?avaliacoes=2``, ``?avaliacoes=3``...).
+
+``GET /_estatisticas`` retorna as contagens de respostas por status.
+
+Uso:
+    python bench/site_fake.py --porta 8600 --latencia-ms 50
+    python bench/site_fake.py --produtos 2000
+    python bench/site_fake.py --limite-taxa 5
+    python bench/site_fake.py --avaliacoes 40
+"""
+import argparse
+import hashlib
+import html
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+RAIZ_SCRAPER = Path(__file__).resolve().parent.parent
+CATALOGO_PADRAO = RAIZ_SCRAPER / "perfumes.json"
+
+ROTULOS_CATEGORIA = {
+    "compartilhaveis": "Compartilháveis",
+    "masculinos": "Masculinos",
+    "femininos": "Femininos",
+}
+
+# Matéria-prima das avaliações sintéticas: texto e nota (estrelas)
+TEXTOS_AVALIACAO = (
+    ("Fixação excelente, dura o dia todo na pele.", 5),
+    ("Projeção boa nas primeiras horas, depois fica mais suave.", 4),
+    ("Muito parecido com o original, recebi vários elogios.", 5),
+    ("Cheiro doce e marcante, ótimo para a noite.", 5),
+    ("Achei a fixação fraca, some depois de duas horas.", 2),
+    ("Perfume forte, deixa rastro por onde passa.", 4),
+    ("Chegou rápido e bem embalado. Recomendo!", 5),
+    ("Leve e agradável para o dia a dia no trabalho.", 4),
+)
+AUTORES_AVALIACAO = ("Ana Souza", "Bruno Lima", "Carla Mendes", "Diego Rocha", "Elisa Prado", "Fabio Nunes")
+DATA_AVALIACOES = date(2026, 1, 20)
+
+
+# ============ DADOS ============
+
+def avaliacoes_sinteticas(p: Dict, quantidade: int) -> List[Dict]:
+    """Avaliações geradas para o produto, das mais recentes às mais antigas"""
+    semente = int(hashlib.md5(p["nome"].encode()).hexdigest(), 16)
+    avaliacoes = []
+    for i in range(quantidade):
+        texto, nota = TEXTOS_AVALIACAO[(semente // 7 + i) % len(TEXTOS_AVALIACAO)]
+        avaliacoes.append({
+            "data": (DATA_AVALIACOES - timedelta(days=3 * i + semente % 3)).strftime("%d/%m/%Y"),
+            "nota": nota,
+            "autor": AUTORES_AVALIACAO[(semente + i) % len(AUTORES_AVALIACAO)],
+            "comentario": f"{texto} (#{i + 1})",
+        })
+    return avaliacoes
+
+
+def produtos_fixture(quantidade: Optional[int] = None) -> List[Dict]:
+    """Perfumes do ``perfumes.json``, replicados até a quantidade pedida"""
+    base = json.loads(CATALOGO_PADRAO.read_text(encoding="utf-8"))
+    if quantidade is None:
+        quantidade = len(base)
+    produtos = []
+    for i in range(quantidade):
+        p = dict(base[i % len(base)])
+        caminho = urlsplit(p["link_produto"]).path
+        if i >= len(base):
+            p["nome"] = f"{p['nome']} {i}"
+            caminho = f"{caminho.rstrip('/')}-{i}/"
+        p["caminho"] = caminho
+        produtos.append(p)
+    return produtos
+
+
+# ============ PÁGINAS ============
+
+def _e(texto: Optional[str]) -> str:
+    return html.escape(texto or "")
+
+
+def _cabecalho(titulo: str) -> str:
+    menu = "".join(
+        f'<li><a href="/{categoria}/">{rotulo}</a></li>' for categoria, rotulo in ROTULOS_CATEGORIA.items()
+    )
+    institucional = "".join(
+        f'<li><a href="/{caminho}/">{rotulo}</a></li>'
+        for caminho, rotulo in (("login", "Entrar"), ("carrinho", "Carrinho"),
+                                ("politica-de-privacidade", "Política de privacidade"),
+                                ("avaliacoes", "Avaliações da loja"))
+    )
+    return (
+        f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>{_e(titulo)}</title>'
+        '<link rel="stylesheet" href="/assets/loja.css"></head><body>'
+        f'<header class="topo"><a class="logo" href="/">JA Essence de la Vie</a>'
+        f'<nav><ul class="menu">{menu}</ul><ul class="institucional">{institucional}</ul></nav></header>'
+    )
+
+
+def _rodape(dados: Dict) -> str:
+    return (
+        '<footer class="rodape"><p>JA Essence de la Vie - Todos os direitos reservados</p>'
+        '<p>Atendimento de segunda a sexta, das 9h às 18h</p></footer>'
+        f'<script type="application/json" id="dados-loja">{json.dumps(dados, ensure_ascii=False)}</script>'
+        '<script src="/assets/loja.js"></script></body></html>'
+    )
+
+
+def _cartao(p: Dict) -> str:
+    caminho = _e(p["caminho"])
+    return (
+        f'<div class="produto-item"><a href="{caminho}"><img src="{_e(p.get("imagem_url"))}" alt=""></a>'
+        f'<a class="produto-nome" href="{caminho}">{_e(p["nome"])}</a>'
+        f'<span class="produto-preco">{_e(p.get("preco"))}</span></div>'
+    )
+
+
+def _avaliacoes(avaliacoes: List[Dict], mais: Optional[str]) -> str:
+    """Bloco de avaliações com o link "Carregar mais" das seguintes"""
+    partes = [
+        f'<div class="avaliacao"><span class="data">{_e(avaliacao.get("data"))}</span>'
+        f'<span class="nota">{"★" * avaliacao["nota"]}{"☆" * (5 - avaliacao["nota"])}</span>'
+        f'<p>{_e(avaliacao.get("comentario"))}</p>'
+        f'<span class="autor">{_e(avaliacao.get("autor"))}</span><span>Compra verificada</span></div>'
+        for avaliacao in avaliacoes
+    ]
+    if mais:
+        partes.append(f'<a class="carregar-mais" href="{_e(mais)}">Carregar mais</a>')
+    return "".join(partes)
+
+
+def pagina_produto(p: Dict, relacionados: List[Dict], avaliacoes: Optional[List[Dict]] = None,
+                   mais: Optional[str] = None) -> str:
+    """Página de produto com a estrutura de textos da loja"""
+    partes = [_cabecalho(p["nome"]), '<main class="produto-detalhe">', f'<h1>{_e(p["nome"])}</h1>']
+    if p.get("imagem_url"):
+        partes.append(f'<div class="galeria"><img src="{_e(p["imagem_url"])}" alt=""></div>')
+
+    preco = _e(p.get("preco"))
+    if p.get("preco_original"):
+        preco = f'de {_e(p["preco_original"])} por {preco}'
+    partes.append(f'<div class="precos"><span class="preco">{preco}</span>')
+    if p.get("desconto"):
+        partes.append(f'<span class="desconto">({_e(p["desconto"])})</span>')
+    if p.get("preco_pix"):
+        partes.append(f'<span class="pix">{_e(p["preco_pix"])} com PIX</span>')
+    if p.get("parcelamento"):
+        partes.append(f'<span class="parcelas">ou {_e(p["parcelamento"])} sem juros</span>')
+    partes.append("</div>")
+    if p.get("volume"):
+        partes.append(f'<div class="variacoes"><span>{_e(p["volume"].upper())}</span></div>')
+
+    partes.append('<div class="descricao">')
+    if p.get("inspiracao"):
+        partes.append(f'<p>Inspirado em {_e(p["inspiracao"])} - {ROTULOS_CATEGORIA.get(p["categoria"], "")}</p>')
+    for rotulo, campo in (("Notas de Topo", "notas_topo"), ("Notas de Coração", "notas_coracao"),
+                          ("Notas de Fundo", "notas_fundo")):
+        if p.get(campo):
+            partes.append(f"<p><strong>{rotulo}:</strong> {_e(p[campo])}</p>")
+    if p.get("descricao"):
+        partes.append(f'<h3>✦ A Experiência</h3><p>{_e(p["descricao"])}</p>')
+    partes.append("<h3>✦ Dicas de Uso</h3><p>Aplique nos pontos de pulsação.</p></div>")
+
+    partes.append('<section class="avaliacoes"><h2>Avaliações</h2>')
+    partes.append(_avaliacoes(avaliacoes or [], mais))
+    partes.append("</section>")
+
+    partes.append('<section class="relacionados"><h2>Você também pode gostar</h2>')
+    partes.extend(_cartao(r) for r in relacionados)
+    partes.append("</section></main>")
+    partes.append(_rodape({"produto": {k: p.get(k) for k in ("nome", "preco", "categoria", "imagem_url")}}))
+    return "".join(partes)
+
+
+def pagina_categoria(categoria: str, produtos: List[Dict], total: int) -> str:
+    """Uma página da listagem de uma categoria"""
+    rotulo = ROTULOS_CATEGORIA.get(categoria, categoria)
+    return (
+        _cabecalho(rotulo)
+        + f'<main class="listagem"><h1>{rotulo}</h1><p class="total">{total} itens</p>'
+        + "".join(_cartao(p) for p in produtos)
+        + "</main>"
+        + _rodape({"categoria": categoria, "total": total})
+    )
+
+
+def montar_site(produtos: List[Dict], relacionados: int = 8, por_pagina: int = 24,
+                avaliacoes: int = 3, avaliacoes_por_pagina: int = 10) -> Dict[str, bytes]:
+    """Páginas do site por caminho (as da listagem com ``?offset=``, as de avaliações com ``?avaliacoes=``)"""
+    paginas = {"/": (_cabecalho("JA Essence de la Vie") + "<main></main>" + _rodape({})).encode()}
+    for categoria in ROTULOS_CATEGORIA:
+        da_categoria = [p for p in produtos if p["categoria"] == categoria]
+        for offset in range(0, max(len(da_categoria), 1), por_pagina):
+            caminho = f"/{categoria}/" + (f"?offset={offset}" if offset else "")
+            trecho = da_categoria[offset:offset + por_pagina]
+            paginas[caminho] = pagina_categoria(categoria, trecho, len(da_categoria)).encode()
+    for i, p in enumerate(produtos):
+        vizinhos = [produtos[(i + k) % len(produtos)] for k in range(1, relacionados + 1)]
+        if not avaliacoes:
+            paginas[p["caminho"]] = pagina_produto(p, vizinhos).encode()
+            continue
+        todas = avaliacoes_sinteticas(p, avaliacoes)
+        blocos = [todas[k:k + avaliacoes_por_pagina] for k in range(0, len(todas), avaliacoes_por_pagina)]
+        mais = [f"{p['caminho']}?avaliacoes={n + 2}" if n + 1 < len(blocos) else None for n in range(len(blocos))]
+        paginas[p["caminho"]] = pagina_produto(p, vizinhos, blocos[0], mais[0]).encode()
+        for n in range(1, len(blocos)):
+            paginas[f"{p['caminho']}?avaliacoes={n + 1}"] = _avaliacoes(blocos[n], mais[n]).encode()
+    return paginas
+
+
+# ============ SERVIDOR ============
+
+class ServidorSite(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, paginas: Dict[str, bytes], latencia: float = 0.0, validadores: bool = True,
+                 limite_taxa: float = 0.0):
+        super().__init__(endereco, ManipuladorSite)
+        self.paginas = paginas
+        self.latencia = latencia
+        self.validadores = validadores
+        self.limite_taxa = limite_taxa
+        self._janela = (0, 0)  # (segundo, requisições nele)
+        self.etags = {caminho: f'"{hashlib.md5(corpo).hexdigest()}"' for caminho, corpo in paginas.items()}
+        self.ultima_modificacao = formatdate(usegmt=True)
+        self.estatisticas = Counter()
+        self._lock = threading.Lock()
+
+    def contar(self, status: int):
+        with self._lock:
+            self.estatisticas[str(status)] += 1
+
+    def excedeu_taxa(self) -> bool:
+        """Requisição além do limite por segundo (janela fixa)"""
+        if not self.limite_taxa:
+            return False
+        with self._lock:
+            segundo = int(time.monotonic())
+            inicio, contagem = self._janela
+            contagem = contagem + 1 if inicio == segundo else 1
+            self._janela = (segundo, contagem)
+            return contagem > self.limite_taxa
+
+
+class ManipuladorSite(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        servidor: ServidorSite = self.server
+        partes = urlsplit(self.path)
+        caminho = partes.path + (f"?{partes.query}" if partes.query else "")
+        if caminho == "/_estatisticas":
+            self._responder(200, json.dumps(servidor.estatisticas).encode(), "application/json")
+            return
+
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+        if servidor.excedeu_taxa():
+            servidor.contar(429)
+            self._responder(429, b"<html><body>Too Many Requests</body></html>", cabecalhos={"Retry-After": "1"})
+            return
+        corpo = servidor.paginas.get(caminho)
+        if corpo is None:
+            servidor.contar(404)
+            self._responder(404, b"<html><body>Not found</body></html>")
+            return
+        if not servidor.validadores:
+            servidor.contar(200)
+            self._responder(200, corpo)
+            return
+
+        validadores = {"ETag": servidor.etags[caminho], "Last-Modified": servidor.ultima_modificacao}
+        etag = self.headers.get("If-None-Match")
+        if etag == validadores["ETag"] or (
+            etag is None and self.headers.get("If-Modified-Since") == servidor.ultima_modificacao
+        ):
+            servidor.contar(304)
+            self._responder(304, b"", cabecalhos=validadores)
+        else:
+            servidor.contar(200)
+            self._responder(200, corpo, cabecalhos=validadores)
+
+    def _responder(self, status: int, corpo: bytes, tipo: str = "text/html; charset=utf-8",
+                   cabecalhos: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def criar_servidor(host: str, porta: int, produtos: Optional[int] = None, latencia_ms: float = 0.0,
+                   validadores: bool = True, por_pagina: int = 24, limite_taxa: float = 0.0,
+                   avaliacoes: int = 3, avaliacoes_por_pagina: int = 10) -> ServidorSite:
+    paginas = montar_site(produtos_fixture(produtos), por_pagina=por_pagina,
+                          avaliacoes=avaliacoes, avaliacoes_por_pagina=avaliacoes_por_pagina)
+    return ServidorSite((host, porta), paginas, latencia_ms / 1000, validadores, limite_taxa)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site local que imita a loja")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8600)
+    parser.add_argument("--produtos", type=int, help="Quantidade de produtos (padrão: os do perfumes.json)")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Atraso por resposta")
+    parser.add_argument("--sem-validadores", action="store_true", help="Não envia ETag/Last-Modified")
+    parser.add_argument("--por-pagina", type=int, default=24, help="Produtos por página da listagem")
+    parser.add_argument("--limite-taxa", type=float, default=0.0,
+                        help="Requisições/s aceitas antes de responder 429 (0 desabilita)")
+    parser.add_argument("--avaliacoes", type=int, default=3,
+                        help="Avaliações sintéticas por produto (0: sem avaliações)")
+    parser.add_argument("--avaliacoes-por-pagina", type=int, default=10,
+                        help="Avaliações por página (as seguintes via \"Carregar mais\")")
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.host, args.porta, args.produtos, args.latencia_ms,
+                              not args.sem_validadores, args.por_pagina, args.limite_taxa,
+                              args.avaliacoes, args.avaliacoes_por_pagina)
+    print(f"Site com {len(servidor.paginas)} páginas em http://{args.host}:{args.porta}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
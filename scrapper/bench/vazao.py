@@ -0,0 +1,121 @@
+"""
+Vazão do scraper contra o site local
+====================================
+Sobe o ``site_fake`` em outro processo (com latência simulada por resposta)
+e roda o scraping completo em alguns cenários de concorrência e ritmo,
+reportando páginas por segundo. O cenário ``sequencial`` reproduz o
+comportamento anterior (uma página por vez, ~0,5 s entre elas).
+
+Uso:
+    python bench/vazao.py --latencia-ms 80
+    python bench/vazao.py --produtos 1000 --cenarios padrao livre
+    python bench/vazao.py --saida vazao.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+import httpx
+
+RAIZ_SCRAPER = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ_SCRAPER))
+
+from coleta import ConfigColeta  # noqa: E402
+from scraper_perfumes import PerfumeScraper  # noqa: E402
+
+CENARIOS: Dict[str, ConfigColeta] = {
+    "sequencial": ConfigColeta(concorrencia_por_host=1, taxa=2.0, rajada=1.0),
+    "padrao": ConfigColeta(),
+    "livre": ConfigColeta(concorrencia_por_host=16, taxa=0.0),
+}
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_site(args) -> subprocess.Popen:
+    """Site local em um processo separado (não disputa o GIL com o scraper)"""
+    comando = [sys.executable, str(RAIZ_SCRAPER / "bench" / "site_fake.py"),
+               "--porta", str(args.porta), "--latencia-ms", str(args.latencia_ms)]
+    if args.produtos:
+        comando += ["--produtos", str(args.produtos)]
+    processo = subprocess.Popen(comando, stdout=subprocess.DEVNULL)
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("O site local terminou durante a inicialização")
+        try:
+            httpx.get(f"http://127.0.0.1:{args.porta}/_estatisticas")
+            return processo
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("O site local não respondeu em 60 s")
+
+
+async def medir(base_url: str, config: ConfigColeta) -> Dict:
+    scraper = PerfumeScraper(base_url, config)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            await scraper.scrape_all()
+        finally:
+            await scraper.close()
+    duracao = time.perf_counter() - inicio
+    paginas = scraper.coletor.requisicoes
+    return {
+        "paginas": paginas,
+        "produtos": len(scraper.perfumes),
+        "com_preco": sum(1 for p in scraper.perfumes if p.preco),
+        "duracao_s": round(duracao, 2),
+        "paginas_por_s": round(paginas / duracao, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão do scraper contra o site local")
+    parser.add_argument("--cenarios", nargs="*", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--produtos", type=int, help="Catálogo sintético (padrão: os do perfumes.json)")
+    parser.add_argument("--latencia-ms", type=float, default=50.0, help="Atraso por resposta do site")
+    parser.add_argument("--porta", type=int, default=_porta_livre())
+    parser.add_argument("--saida", type=Path, help="Grava os resultados em JSON")
+    args = parser.parse_args()
+
+    site = iniciar_site(args)
+    base_url = f"http://127.0.0.1:{args.porta}"
+    resultados = {}
+    try:
+        for nome in args.cenarios:
+            config = CENARIOS[nome]
+            resultado = asyncio.run(medir(base_url, config))
+            resultados[nome] = {"config": vars(config), **resultado}
+            print(f"{nome:<11} concorrência {config.concorrencia_por_host:>2}, taxa {config.taxa or '∞':>4}/s: "
+                  f"{resultado['paginas']} páginas em {resultado['duracao_s']:.1f} s "
+                  f"= {resultado['paginas_por_s']:.1f} páginas/s "
+                  f"({resultado['com_preco']}/{resultado['produtos']} produtos com preço)")
+    finally:
+        site.terminate()
+        site.wait()
+
+    if args.saida:
+        args.saida.write_text(json.dumps({
+            "latencia_ms": args.latencia_ms,
+            "produtos": args.produtos,
+            "resultados": resultados,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"✓ Resultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Coleta HTTP do scraper
+======================
+Cliente httpx assíncrono compartilhado por todo o scraping (pool de
+conexões com keep-alive e cookies da sessão), com cortesia por host:
+
+- no máximo ``concorrencia_por_host`` requisições simultâneas por host;
+- ritmo por host controlado por token bucket (``taxa`` requisições/s com
+  rajadas de até ``rajada``), no lugar de pausas fixas entre páginas;
+- novas tentativas com espera exponencial; em 429/503 respeita o
+  ``Retry-After`` do servidor.
+
+Requisições condicionais recebem o ``304 Not Modified`` como resposta
+válida (sem corpo).
+
+Um transporte alternativo do httpx pode substituir a rede, como a gravação
+e a reprodução de respostas do ``acervo.py``.
+
+Cada tentativa alimenta as métricas da execução (``metricas.py``): espera
+pelo host, fases da requisição, status, bytes, erros e ``Retry-After``.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from metricas import MetricasExecucao
+
+# Respostas que valem nova tentativa (além de falhas de rede)
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class ConfigColeta:
+    """Parâmetros de concorrência e ritmo da coleta"""
+    concorrencia_por_host: int = 4
+    taxa: float = 4.0        # requisições/s por host (0 desabilita)
+    rajada: float = 4.0
+    tentativas: int = 3
+    espera_tentativa: float = 1.0  # dobra a cada nova tentativa
+    timeout: float = 30.0
+
+
+class BaldeTokens:
+    """Token bucket assíncrono: quem chega primeiro é servido primeiro"""
+
+    def __init__(self, taxa: float, rajada: float):
+        self.taxa = taxa
+        self.rajada = max(rajada, 1.0)
+        self.tokens = self.rajada
+        self.atualizado = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consumir(self):
+        if self.taxa <= 0:
+            return
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self.tokens = min(self.rajada, self.tokens + (agora - self.atualizado) * self.taxa)
+                self.atualizado = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.taxa)
+
+    def adiar(self, segundos: float):
+        """Esvazia o balde por ``segundos`` (servidor pediu para esperar)"""
+        self.tokens = min(self.tokens, 0.0) - segundos * self.taxa
+
+
+class LimitesHost:
+    """Vagas simultâneas e ritmo de um host"""
+
+    def __init__(self, config: ConfigColeta):
+        self.vagas = asyncio.Semaphore(config.concorrencia_por_host)
+        self.balde = BaldeTokens(config.taxa, config.rajada)
+
+
+def _retry_after(resposta: httpx.Response) -> Optional[float]:
+    """Segundos pedidos pelo servidor no Retry-After (segundos ou data HTTP)"""
+    valor = resposta.headers.get("retry-after")
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Coletor:
+    """Requisições GET concorrentes com limites por host"""
+
+    def __init__(self, config: Optional[ConfigColeta] = None, headers: Optional[Dict[str, str]] = None,
+                 transporte: Optional[httpx.AsyncBaseTransport] = None,
+                 metricas: Optional[MetricasExecucao] = None):
+        self.config = config or ConfigColeta()
+        self.headers = headers or {}
+        self.transporte = transporte
+        self.metricas = metricas or MetricasExecucao()
+        self._cliente: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, LimitesHost] = {}
+        self.requisicoes = 0
+
+    def _obter_cliente(self) -> httpx.AsyncClient:
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.config.timeout,
+                follow_redirects=True,
+                transport=self.transporte,
+                limits=httpx.Limits(
+                    max_connections=None,
+                    max_keepalive_connections=self.config.concorrencia_por_host * 4
+                )
+            )
+        return self._cliente
+
+    def _limites(self, url: str) -> LimitesHost:
+        host = urlsplit(url).netloc
+        limites = self._hosts.get(host)
+        if limites is None:
+            limites = self._hosts[host] = LimitesHost(self.config)
+        return limites
+
+    async def obter(self, url: str, cabecalhos: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """GET com vaga e token do host; levanta httpx.HTTPError após as tentativas"""
+        cliente = self._obter_cliente()
+        limites = self._limites(url)
+        for tentativa in range(max(1, self.config.tentativas)):
+            espera = self.config.espera_tentativa * 2 ** tentativa
+            try:
+                espera_host = time.perf_counter()
+                async with limites.vagas:
+                    await limites.balde.consumir()
+                    inicio = time.perf_counter()
+                    self.metricas.registrar("espera_host", inicio - espera_host)
+                    self.requisicoes += 1
+                    resposta = await cliente.get(url, headers=cabecalhos,
+                                                 extensions={"trace": self.metricas.rastreador()})
+                    self.metricas.resposta(resposta, time.perf_counter() - inicio)
+                if resposta.status_code in STATUS_TRANSITORIOS and tentativa < self.config.tentativas - 1:
+                    self.metricas.contadores["novas_tentativas"] += 1
+                    pedido = _retry_after(resposta)
+                    if pedido is not None:
+                        self.metricas.contadores["retry_after"] += 1
+                        self.metricas.contadores["retry_after_ms"] += round(min(pedido, 60.0) * 1000)
+                    if pedido is not None and self.config.taxa > 0:
+                        # A pausa vale para todo o host: o balde segura as próximas
+                        limites.balde.adiar(min(pedido, 60.0))
+                    else:
+                        await asyncio.sleep(espera if pedido is None else min(pedido, 60.0))
+                    continue
+                if resposta.status_code != 304:
+                    resposta.raise_for_status()
+                return resposta
+            except httpx.HTTPStatusError:
+                raise
+            except httpx.HTTPError as e:
+                self.metricas.erro(e)
+                if tentativa >= self.config.tentativas - 1:
+                    raise
+                self.metricas.contadores["novas_tentativas"] += 1
+                await asyncio.sleep(espera)
+
+    async def fechar(self):
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
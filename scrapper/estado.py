@@ -0,0 +1,170 @@
+"""
+Estado persistente do crawl
+===========================
+Banco SQLite com o que foi visto na última execução, para que uma
+atualização de rotina só processe o que mudou:
+
+- ``paginas``: validadores HTTP (``ETag``/``Last-Modified``), hash do corpo
+  e o resultado já extraído de cada URL. As requisições seguintes são
+  condicionais (``If-None-Match``/``If-Modified-Since``); com ``304`` ou com
+  o mesmo hash, o resultado anterior é reaproveitado sem novo parse;
+- ``produtos``: os produtos da última execução completa, base do diff
+  (adicionados, alterados e removidos), calculado em fluxo.
+"""
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import httpx
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS paginas (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    hash TEXT NOT NULL,
+    resultado TEXT NOT NULL,
+    atualizado_em TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS produtos (
+    link_produto TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    dados TEXT NOT NULL,
+    PRIMARY KEY (link_produto, categoria)
+);
+"""
+
+ChaveProduto = Tuple[str, str]
+
+
+def hash_conteudo(conteudo: bytes) -> str:
+    return hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def chave_produto(produto: Dict) -> ChaveProduto:
+    return produto.get("link_produto") or produto["nome"], produto["categoria"]
+
+
+@dataclass
+class Registro:
+    """Última versão conhecida de uma URL"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    hash: str
+    resultado: Any
+
+    def condicionais(self) -> Dict[str, str]:
+        """Cabeçalhos da requisição condicional"""
+        cabecalhos = {}
+        if self.etag:
+            cabecalhos["If-None-Match"] = self.etag
+        if self.last_modified:
+            cabecalhos["If-Modified-Since"] = self.last_modified
+        return cabecalhos
+
+
+class EstadoCrawl:
+    """Validadores, hashes e resultados por URL, e os produtos da última execução"""
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._conexao = sqlite3.connect(self.caminho)
+        self._conexao.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + ESQUEMA)
+
+    def registro(self, url: str) -> Optional[Registro]:
+        linha = self._conexao.execute(
+            "SELECT url, etag, last_modified, hash, resultado FROM paginas WHERE url = ?", (url,)
+        ).fetchone()
+        if linha is None:
+            return None
+        return Registro(*linha[:4], json.loads(linha[4]))
+
+    def gravar(self, url: str, resposta: httpx.Response, resultado: Any):
+        """Guarda o resultado extraído de um corpo novo ou alterado"""
+        with self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?)",
+                (url, resposta.headers.get("etag"), resposta.headers.get("last-modified"),
+                 hash_conteudo(resposta.content), json.dumps(resultado, ensure_ascii=False), _agora())
+            )
+
+    def renovar(self, url: str, resposta: httpx.Response):
+        """Página sem mudanças: atualiza só os validadores enviados pelo servidor"""
+        with self._conexao:
+            self._conexao.execute(
+                "UPDATE paginas SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                "atualizado_em = ? WHERE url = ?",
+                (resposta.headers.get("etag"), resposta.headers.get("last-modified"), _agora(), url)
+            )
+
+    def atualizar_produtos(self, produtos: Iterable[Dict]) -> Dict:
+        """Compara os produtos desta execução com os da anterior e os torna a nova base.
+
+        Os produtos são consumidos em fluxo; só o diff fica em memória.
+        """
+        adicionados, alterados = [], []
+        total = 0
+        with self._conexao:
+            self._conexao.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS produtos_novos "
+                "(link_produto TEXT, categoria TEXT, dados TEXT, PRIMARY KEY (link_produto, categoria))"
+            )
+            self._conexao.execute("DELETE FROM produtos_novos")
+            for produto in produtos:
+                total += 1
+                chave = chave_produto(produto)
+                linha = self._conexao.execute(
+                    "SELECT dados FROM produtos WHERE link_produto = ? AND categoria = ?", chave
+                ).fetchone()
+                if linha is None:
+                    adicionados.append(produto)
+                else:
+                    antes = json.loads(linha[0])
+                    if antes != produto:
+                        alterados.append(_alteracao(chave, antes, produto))
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO produtos_novos VALUES (?, ?, ?)",
+                    (*chave, json.dumps(produto, ensure_ascii=False))
+                )
+
+            removidos = [json.loads(dados) for (dados,) in self._conexao.execute(
+                "SELECT dados FROM produtos p WHERE NOT EXISTS (SELECT 1 FROM produtos_novos n "
+                "WHERE n.link_produto = p.link_produto AND n.categoria = p.categoria)"
+            )]
+            self._conexao.execute("DELETE FROM produtos")
+            self._conexao.execute("INSERT INTO produtos SELECT * FROM produtos_novos")
+            self._conexao.execute("DELETE FROM produtos_novos")
+
+        return {
+            "gerado_em": _agora(),
+            "resumo": {
+                "adicionados": len(adicionados),
+                "alterados": len(alterados),
+                "removidos": len(removidos),
+                "inalterados": total - len(adicionados) - len(alterados),
+            },
+            "adicionados": adicionados,
+            "alterados": alterados,
+            "removidos": removidos,
+        }
+
+    def fechar(self):
+        self._conexao.close()
+
+
+def _alteracao(chave: ChaveProduto, antes: Dict, depois: Dict) -> Dict:
+    """Produto alterado, com os valores anterior e atual dos campos que mudaram"""
+    campos = {
+        campo: {"antes": antes.get(campo), "depois": valor}
+        for campo, valor in depois.items() if antes.get(campo) != valor
+    }
+    return {"link_produto": chave[0], "categoria": chave[1], "campos": campos}
@@ -0,0 +1,268 @@
+"""
+Extração dos dados das páginas da loja
+======================================
+Parse com ``lxml`` em uma única passada: a árvore é montada uma vez, os
+textos são percorridos uma vez (o texto normalizado, usado nos preços,
+notas e descrição, e o texto bruto, usado nas avaliações, saem da mesma
+lista) e todos os padrões são pré-compilados.
+
+As funções recebem os bytes da resposta e devolvem dicionários simples,
+para poderem rodar em outro processo.
+
+O texto equivale ao ``get_text()`` do BeautifulSoup: conteúdo de
+``script``, ``style``, ``template`` e comentários fica de fora.
+
+A página do produto devolve, à parte dos campos do perfume, as avaliações
+que exibe (com a nota em estrelas, quando houver) e o link "Carregar mais"
+das seguintes; ``extrair_avaliacoes`` lê essas páginas adicionais.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import lxml.etree
+import lxml.html
+
+# Elementos cujo conteúdo não faz parte do texto da página
+SEM_TEXTO = ("script", "style", "template")
+
+# ============ PADRÕES ============
+
+# Preço com desconto: "de R$165,90 por R$134,90"
+RE_PROMOCAO = re.compile(r"de\s*R\$\s*([\d.,]+)\s*por\s*R\$\s*([\d.,]+)")
+# Preço normal: "R$179,90"
+RE_PRECO = re.compile(r"R\$\s*([\d.,]+)")
+# Preço PIX: "R$170,90 com PIX"
+RE_PIX = re.compile(r"R\$\s*([\d.,]+)\s*com\s*PIX")
+# Parcelamento: "6x de R$29,98"
+RE_PARCELAMENTO = re.compile(r"(\d+)x\s*de\s*R\$\s*([\d.,]+)")
+# Desconto: "-19%" ou "(-5%)"
+RE_DESCONTO = re.compile(r"-?\s*(\d+)\s*%")
+
+RE_VOLUME = re.compile(r"(\d+)\s*ML\b", re.IGNORECASE)
+RE_INSPIRACAO = re.compile(
+    r"[Ii]nspirado\s+em\s+([^-–\n]+?)(?:\s*[-–]|\s*Compartilhável|\s*Masculino|\s*Feminino|\s*PROMOÇÃO|$)"
+)
+RE_INSPIRACAO_PROMOCAO = re.compile(r"\s*PROMOÇÃO.*$", re.IGNORECASE)
+RE_INSPIRACAO_PARCELAS = re.compile(r"\s*Até\s*\d+x.*$", re.IGNORECASE)
+
+RE_NOTAS_TOPO = re.compile(r"Notas?\s+de\s+Topo[:\s]+([^N]+?)(?:Notas?\s+de\s+Cora|$)", re.IGNORECASE)
+RE_NOTAS_CORACAO = re.compile(r"Notas?\s+de\s+Cora[çc][ãa]o[:\s]+([^N]+?)(?:Notas?\s+de\s+Fundo|$)", re.IGNORECASE)
+RE_NOTAS_FUNDO = re.compile(r"Notas?\s+de\s+Fundo[:\s]+([^\n✦]+)", re.IGNORECASE)
+
+# Seção "A Experiência", que descreve a fragrância
+RE_EXPERIENCIA = re.compile(r"A Experiência\s*(.+?)(?:✦|Dicas de Uso|Disclaimer|$)", re.IGNORECASE | re.DOTALL)
+# Fallback: frase descritiva da fragrância
+RE_DESCRICAO = re.compile(r"([OUÉé][\w\s]+(?:fragrância|frescor|elegância|intensidade|sofisticação)[^\n✦]+)")
+RE_ESPACOS = re.compile(r"\s+")
+
+# Avaliações: "DD/MM/YYYY" seguido do texto e de "Compra verificada"
+RE_AVALIACOES = re.compile(r"Avaliações(.+?)(?:Você também pode gostar|Carregar mais|$)", re.DOTALL)
+RE_AVALIACAO = re.compile(r"(\d{2}/\d{2}/\d{4})\s*(.+?)(?:Compra verificada|(?=\d{2}/\d{2}/\d{4})|$)", re.DOTALL)
+# Nota em estrelas logo após a data: "★★★★☆"
+RE_NOTA = re.compile(r"[★☆]{5}")
+RE_AUTOR = re.compile(r"^[A-Z][a-záàâãéèêíïóôõúüç]+(?:\s+[A-Z][a-záàâãéèêíïóôõúüç]+)*$")
+
+RE_TOTAL_ITENS = re.compile(r"(\d+)\s*itens?")
+
+# Imagem do produto na página
+XPATH_IMAGEM = lxml.etree.XPath("//img[contains(@src, 'produtos')]")
+# Botão/link que carrega mais avaliações
+XPATH_CARREGAR_MAIS = lxml.etree.XPath(
+    "//*[self::a or self::button][contains(normalize-space(.), 'Carregar mais')]"
+)
+
+
+# ============ ÁRVORE E TEXTO ============
+
+def _arvore(conteudo: bytes, codificacao: Optional[str] = None):
+    parser = lxml.html.HTMLParser(encoding=codificacao or "utf-8")
+    raiz = lxml.html.document_fromstring(conteudo, parser=parser)
+    lxml.etree.strip_elements(raiz, *SEM_TEXTO, lxml.etree.Comment, with_tail=False)
+    return raiz
+
+
+def textos_da_pagina(raiz) -> Tuple[str, str]:
+    """Texto normalizado (trechos sem bordas, separados por espaço) e texto bruto"""
+    trechos = list(raiz.itertext())
+    normalizado = " ".join(t for t in (trecho.strip() for trecho in trechos) if t)
+    return normalizado, "".join(trechos)
+
+
+# ============ PRODUTO ============
+
+def extrair_precos(texto: str) -> Dict[str, Optional[str]]:
+    """Extrai informações de preço do texto."""
+    resultado = {
+        "preco": None,
+        "preco_original": None,
+        "preco_pix": None,
+        "parcelamento": None,
+        "desconto": None
+    }
+
+    promocao = RE_PROMOCAO.search(texto)
+    if promocao:
+        resultado["preco_original"] = f"R${promocao.group(1)}"
+        resultado["preco"] = f"R${promocao.group(2)}"
+
+    if not resultado["preco"]:
+        preco = RE_PRECO.search(texto)
+        if preco:
+            resultado["preco"] = f"R${preco.group(1)}"
+
+    pix = RE_PIX.search(texto)
+    if pix:
+        resultado["preco_pix"] = f"R${pix.group(1)}"
+
+    parcelamento = RE_PARCELAMENTO.search(texto)
+    if parcelamento:
+        resultado["parcelamento"] = f"{parcelamento.group(1)}x de R${parcelamento.group(2)}"
+
+    desconto = RE_DESCONTO.search(texto)
+    if desconto:
+        resultado["desconto"] = f"-{desconto.group(1)}%"
+
+    return resultado
+
+
+def _descricao(texto: str) -> Optional[str]:
+    experiencia = RE_EXPERIENCIA.search(texto)
+    if experiencia:
+        desc = RE_ESPACOS.sub(" ", experiencia.group(1).strip()).strip()
+        if 20 < len(desc) < 500 and "Ver tudo" not in desc:
+            return desc[:400]
+
+    frase = RE_DESCRICAO.search(texto)
+    if frase:
+        desc = RE_ESPACOS.sub(" ", frase.group(1).strip()).strip()
+        if len(desc) > 30 and "Ver tudo" not in desc:
+            return desc[:400]
+    return None
+
+
+def _avaliacoes(secao: str) -> List[Dict]:
+    """Avaliações de um trecho de texto bruto"""
+    avaliacoes = []
+    for data, conteudo in RE_AVALIACAO.findall(secao):
+        conteudo = conteudo.strip()
+        nota = RE_NOTA.match(conteudo)
+        if nota:
+            conteudo = conteudo[nota.end():].strip()
+        if len(conteudo) < 5 or len(conteudo) > 500:
+            continue
+
+        # O autor geralmente é um nome próprio no final
+        partes = conteudo.rsplit(" ", 2)
+        autor, comentario = "Cliente verificado", conteudo
+        if len(partes) >= 2:
+            possivel_autor = " ".join(partes[-2:])
+            if RE_AUTOR.match(possivel_autor):
+                autor = possivel_autor
+                comentario = " ".join(partes[:-2]) if len(partes) > 2 else conteudo
+
+        comentario = RE_ESPACOS.sub(" ", comentario).strip()
+        if len(comentario) > 3:
+            avaliacoes.append({
+                "data": data,
+                "nota": nota.group().count("★") if nota else None,
+                "autor": autor,
+                "comentario": comentario,
+                "verificado": True
+            })
+    return avaliacoes
+
+
+def _carregar_mais(raiz) -> Optional[str]:
+    """Endereço (como está na página) das próximas avaliações"""
+    for elemento in XPATH_CARREGAR_MAIS(raiz):
+        for atributo in ("href", "data-url", "data-href"):
+            valor = elemento.get(atributo)
+            if valor and not valor.startswith(("#", "javascript:")):
+                return valor
+    return None
+
+
+def extrair_avaliacoes(conteudo: bytes, codificacao: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Avaliações de uma página de "Carregar mais" e o endereço da seguinte.
+
+    A resposta pode ser a página inteira ou só o trecho com as avaliações.
+    """
+    raiz = _arvore(conteudo, codificacao)
+    _, bruto = textos_da_pagina(raiz)
+    secao = RE_AVALIACOES.search(bruto)
+    return _avaliacoes(secao.group(1) if secao else bruto), _carregar_mais(raiz)
+
+
+def extrair_produto(conteudo: bytes, codificacao: Optional[str] = None) -> Dict:
+    """Campos da página de um produto.
+
+    ``imagem_url`` é a imagem encontrada na página (o scraper só a usa quando
+    a listagem não trouxe uma); ``avaliacoes`` traz todas as avaliações da
+    página e ``avaliacoes_mais`` o link "Carregar mais", se houver.
+    """
+    raiz = _arvore(conteudo, codificacao)
+    texto, bruto = textos_da_pagina(raiz)
+
+    campos = extrair_precos(texto)
+
+    volume = RE_VOLUME.search(texto)
+    campos["volume"] = f"{volume.group(1)}ml" if volume else None
+
+    inspiracao = RE_INSPIRACAO.search(texto)
+    campos["inspiracao"] = None
+    if inspiracao:
+        valor = RE_INSPIRACAO_PROMOCAO.sub("", inspiracao.group(1).strip())
+        campos["inspiracao"] = RE_INSPIRACAO_PARCELAS.sub("", valor).strip()
+
+    for campo, padrao in (("notas_topo", RE_NOTAS_TOPO), ("notas_coracao", RE_NOTAS_CORACAO),
+                          ("notas_fundo", RE_NOTAS_FUNDO)):
+        notas = padrao.search(texto)
+        campos[campo] = notas.group(1).strip() if notas else None
+
+    campos["descricao"] = _descricao(texto)
+
+    campos["imagem_url"] = None
+    for img in XPATH_IMAGEM(raiz):
+        campos["imagem_url"] = img.get("src") or img.get("data-src")
+        break
+
+    secao = RE_AVALIACOES.search(bruto)
+    campos["avaliacoes"] = _avaliacoes(secao.group(1)) if secao else []
+    campos["avaliacoes_mais"] = _carregar_mais(raiz)
+    return campos
+
+
+# ============ LISTAGEM ============
+
+def extrair_listagem(conteudo: bytes, base_url: str, codificacao: Optional[str] = None) -> Tuple[Optional[int], List[Dict]]:
+    """Total de itens informado e links de produtos de uma página de categoria"""
+    raiz = _arvore(conteudo, codificacao)
+    _, bruto = textos_da_pagina(raiz)
+    total = RE_TOTAL_ITENS.search(bruto)
+
+    produtos = []
+    vistos = set()
+    for link in raiz.iter("a"):
+        href = link.get("href")
+        if href is None:
+            continue
+        texto = "".join(t for t in (trecho.strip() for trecho in link.itertext()) if t)
+
+        # Link de produto: o texto contém "inspirado" ou "perfume"
+        minusculo = texto.lower()
+        if ("inspirado" not in minusculo and "perfume" not in minusculo) or len(texto) <= 10:
+            continue
+        url = href if href.startswith("http") else urljoin(base_url, href)
+        if url in vistos:
+            continue
+        vistos.add(url)
+
+        imagem = None
+        pai = link.getparent()
+        img = pai.find(".//img") if pai is not None else None
+        if img is not None:
+            imagem = img.get("src") or img.get("data-src")
+        produtos.append({"nome": texto, "link_produto": url, "imagem_url": imagem})
+
+    return (int(total.group(1)) if total else None), produtos
@@ -0,0 +1,131 @@
+"""
+Métricas da execução do scraper
+===============================
+Tempos por etapa e contadores da coleta e do parse, agregados em um
+relatório JSON gravado ao lado das saídas (``perfumes_relatorio.json``):
+
+- ``espera_host``: fila pelas vagas e pelo token bucket do host (o ritmo
+  imposto por nós);
+- ``conexao`` (DNS + TCP), ``tls``, ``ttfb`` (do envio da requisição ao
+  cabeçalho da resposta) e ``download`` (corpo), via extensão ``trace`` do
+  httpx; conexões reaproveitadas não têm ``conexao``/``tls``;
+- ``requisicao``: cada tentativa completa;
+- ``espera_parse`` e ``parse_*``: fila do pool de parse e extração;
+- status HTTP, novas tentativas, ``Retry-After`` recebidos, erros e bytes.
+
+Respostas 429/503 e ``Retry-After`` indicam que o site está limitando a
+coleta; ``espera_host`` alto indica que o limite é o nosso (``--taxa``).
+"""
+import json
+import math
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+# Evento do httpcore (sem o prefixo "http11."/"http2."/"connection.") -> etapa
+ETAPAS_TRACE = {
+    "connect_tcp": "conexao",
+    "start_tls": "tls",
+    "receive_response_body": "download",
+}
+
+# Status que indicam limitação pelo servidor
+STATUS_LIMITACAO = {"429", "503"}
+
+
+def resumir(tempos: List[float]) -> Dict:
+    """Quantidade, soma (s) e média/p50/p95/máximo (ms)"""
+    ordenados = sorted(tempos)
+    n = len(ordenados)
+
+    def percentil(p: float) -> float:
+        return round(ordenados[max(0, math.ceil(n * p) - 1)] * 1000, 2)
+
+    return {
+        "n": n,
+        "soma_s": round(sum(ordenados), 3),
+        "media_ms": round(sum(ordenados) / n * 1000, 2),
+        "p50_ms": percentil(0.50),
+        "p95_ms": percentil(0.95),
+        "max_ms": round(ordenados[-1] * 1000, 2),
+    }
+
+
+class MetricasExecucao:
+    """Tempos por etapa e contadores de uma execução"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.tempos: Dict[str, List[float]] = defaultdict(list)
+        self.status = Counter()
+        self.erros = Counter()
+        self.contadores = Counter()
+
+    def registrar(self, etapa: str, segundos: float):
+        self.tempos[etapa].append(segundos)
+
+    def rastreador(self) -> Callable:
+        """Callback ``trace`` do httpx para uma requisição"""
+        iniciados: Dict[str, float] = {}
+
+        async def rastrear(evento: str, info: Dict):
+            nome, _, fase = evento.rpartition(".")
+            nome = nome.rpartition(".")[2]
+            agora = time.perf_counter()
+            if fase == "started":
+                iniciados[nome] = agora
+            elif fase == "complete":
+                if nome in ETAPAS_TRACE and nome in iniciados:
+                    self.registrar(ETAPAS_TRACE[nome], agora - iniciados[nome])
+                    if nome == "connect_tcp":
+                        self.contadores["conexoes_novas"] += 1
+                elif nome == "receive_response_headers" and "send_request_headers" in iniciados:
+                    self.registrar("ttfb", agora - iniciados["send_request_headers"])
+
+        return rastrear
+
+    def resposta(self, resposta: httpx.Response, segundos: float):
+        self.registrar("requisicao", segundos)
+        self.status[str(resposta.status_code)] += 1
+        self.contadores["bytes_rede"] += resposta.num_bytes_downloaded
+        self.contadores["bytes_conteudo"] += len(resposta.content)
+
+    def erro(self, erro: Exception):
+        self.erros[type(erro).__name__] += 1
+
+    def relatorio(self, extras: Optional[Dict] = None) -> Dict:
+        duracao = time.perf_counter() - self.inicio
+        etapas = {etapa: resumir(tempos) for etapa, tempos in sorted(self.tempos.items()) if tempos}
+        limitacao = {status: n for status, n in self.status.items() if status in STATUS_LIMITACAO}
+        relatorio = {
+            "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "duracao_s": round(duracao, 3),
+            "requisicoes": {
+                "tentativas": sum(self.status.values()) + sum(self.erros.values()),
+                "novas_tentativas": self.contadores["novas_tentativas"],
+                "status": dict(sorted(self.status.items())),
+                "erros": dict(self.erros),
+                "conexoes_novas": self.contadores["conexoes_novas"],
+                "bytes_rede": self.contadores["bytes_rede"],
+                "bytes_conteudo": self.contadores["bytes_conteudo"],
+                "por_s": round(sum(self.status.values()) / duracao, 2) if duracao else None,
+            },
+            "limitacao_servidor": {
+                "respostas": limitacao,
+                "retry_after_recebidos": self.contadores["retry_after"],
+                "retry_after_s": round(self.contadores["retry_after_ms"] / 1000, 3),
+            },
+            "etapas": etapas,
+        }
+        relatorio.update(extras or {})
+        return relatorio
+
+    def gravar(self, destino: Path, extras: Optional[Dict] = None) -> Dict:
+        relatorio = self.relatorio(extras)
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        return relatorio
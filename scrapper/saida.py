@@ -0,0 +1,123 @@
+"""
+Saída incremental do scraper
+============================
+Cada produto concluído é acrescentado ao ``perfumes.jsonl`` assim que
+termina (uma linha por produto, com flush): uma interrupção perde no máximo
+os produtos em andamento. O próprio JSONL é o checkpoint das URLs já
+visitadas: com ``--resume`` os produtos gravados não são baixados de novo
+(uma última linha incompleta é descartada).
+
+Ao final, o JSONL é compactado no ``perfumes.json`` consumido pela API e no
+``perfumes.csv``, na ordem das listagens, sem duplicatas (vale a última
+linha de cada produto) e com troca atômica dos arquivos. Em memória fica só
+um índice pequeno por produto (chave, posição e deslocamento no arquivo); os
+registros são lidos do disco um a um.
+"""
+import csv
+import json
+import os
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from estado import ChaveProduto, chave_produto
+
+# (índice da categoria, posição na listagem)
+Ordem = Tuple[int, int]
+
+
+class SaidaProdutos:
+    """JSONL de produtos concluídos, com retomada e compactação"""
+
+    def __init__(self, caminho: Path, retomar: bool = False):
+        self.caminho = Path(caminho)
+        self.concluidos: Set[ChaveProduto] = set()
+        self.gravados = 0
+        if retomar and self.caminho.exists():
+            self._retomar()
+            self._arquivo = open(self.caminho, "ab")
+        else:
+            self._arquivo = open(self.caminho, "wb")
+
+    def _retomar(self):
+        """Carrega as chaves já gravadas e descarta uma linha final incompleta"""
+        completo = 0
+        with open(self.caminho, "rb+") as f:
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break
+                completo += len(linha)
+                try:
+                    self.concluidos.add(chave_produto(json.loads(linha)["produto"]))
+                except (ValueError, KeyError):
+                    continue
+            f.truncate(completo)
+
+    def gravar(self, produto: Dict, ordem: Ordem):
+        linha = json.dumps({"ordem": list(ordem), "produto": produto}, ensure_ascii=False)
+        self._arquivo.write(linha.encode("utf-8") + b"\n")
+        self._arquivo.flush()
+        self.concluidos.add(chave_produto(produto))
+        self.gravados += 1
+
+    def fechar(self):
+        self._arquivo.close()
+
+    def produtos(self) -> Iterator[Dict]:
+        """Produtos na ordem das listagens, sem duplicatas, lidos um a um do disco"""
+        self._arquivo.flush()
+        indice: Dict[ChaveProduto, Tuple[Ordem, int]] = {}
+        with open(self.caminho, "rb") as f:
+            deslocamento = 0
+            for linha in f:
+                if linha.endswith(b"\n"):
+                    try:
+                        registro = json.loads(linha)
+                        indice[chave_produto(registro["produto"])] = (tuple(registro["ordem"]), deslocamento)
+                    except (ValueError, KeyError):
+                        pass
+                deslocamento += len(linha)
+
+            for _, posicao in sorted(indice.values()):
+                f.seek(posicao)
+                yield json.loads(f.readline())["produto"]
+
+
+# ============ ARQUIVOS FINAIS ============
+
+def _gravar_atomico(destino: Path, escrever: Callable[[IO[str]], None], encoding: str = "utf-8",
+                    newline: Optional[str] = None):
+    """Escreve em um temporário ao lado do destino e troca de uma vez"""
+    temporario = destino.with_name(destino.name + ".tmp")
+    try:
+        with open(temporario, "w", encoding=encoding, newline=newline) as f:
+            escrever(f)
+        os.replace(temporario, destino)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+
+
+def gravar_json(destino: Path, produtos: Iterable[Dict]):
+    """Lista JSON (mesmo formato do ``json.dump(..., indent=2)``) gravada em fluxo"""
+    def escrever(f: IO[str]):
+        separador = "[\n"
+        for produto in produtos:
+            bloco = json.dumps(produto, ensure_ascii=False, indent=2)
+            f.write(separador + "  " + bloco.replace("\n", "\n  "))
+            separador = ",\n"
+        f.write("[]" if separador == "[\n" else "\n]")
+
+    _gravar_atomico(Path(destino), escrever)
+
+
+def gravar_csv(destino: Path, produtos: Iterable[Dict]):
+    """CSV com uma linha por produto"""
+    def escrever(f: IO[str]):
+        escritor = None
+        for produto in produtos:
+            if escritor is None:
+                escritor = csv.DictWriter(f, fieldnames=list(produto))
+                escritor.writeheader()
+            escritor.writerow(produto)
+
+    _gravar_atomico(Path(destino), escrever, encoding="utf-8-sig", newline="")
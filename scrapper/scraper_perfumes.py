@@ -7,18 +7,71 @@ Script para extrair informações de perfumes das páginas:
 - Femininos
 
 Site: wBuy Platform (sistemawbuy.com.br)
+
+As páginas são baixadas de forma assíncrona (ver ``coleta.py``), com limite
+de requisições simultâneas e ritmo (token bucket) por host.
+
+A execução é incremental (ver ``estado.py``): páginas que não mudaram desde
+a execução anterior (``304`` ou mesmo conteúdo) não são processadas de novo,
+e além do ``perfumes.json`` completo é gravado o ``perfumes_diff.json`` com
+os produtos adicionados, alterados e removidos.
+
+A extração (CPU) pode rodar em um pool de processos (``--processos``),
+separada da coleta (I/O): as páginas baixadas esperam o parse em uma fila
+limitada, e a coleta só para quando essa fila enche.
+
+Ao final (ou na interrupção) é gravado o ``perfumes_relatorio.json`` com
+tempos por etapa da coleta e do parse, status HTTP, novas tentativas e
+bytes (ver ``metricas.py``).
+
+Com ``--gravar`` as respostas do site são guardadas em um acervo local, e
+com ``--reproduzir`` o scraping roda a partir dele, sem rede (ver
+``acervo.py``).
+
+Cada produto concluído vai direto para o ``perfumes.jsonl`` (ver
+``saida.py``); ao final ele é compactado no ``perfumes.json`` e no
+``perfumes.csv``. Uma execução interrompida continua com ``--resume``.
+
+O catálogo não leva comentários: as avaliações (seguindo o "Carregar mais")
+vão para o ``avaliacoes.sqlite`` e os agregados por perfume (quantidade,
+nota média, menções) para o ``perfumes_avaliacoes.json``, que a API usa na
+pontuação (ver ``avaliacoes.py``). Como as avaliações vêm das mais recentes para as mais
+antigas, uma página de produto que não mudou não tem avaliações novas e as
+páginas seguintes não são visitadas.
+
+Uso:
+    python scraper_perfumes.py
+    python scraper_perfumes.py --concorrencia 8 --taxa 6
+    python scraper_perfumes.py --processos 4        # parse em 4 processos (0: no processo principal)
+    python scraper_perfumes.py --completo        # reprocessa todas as páginas
+    python scraper_perfumes.py --resume          # continua uma execução interrompida
+    python scraper_perfumes.py --gravar acervo.sqlite
+    python scraper_perfumes.py --reproduzir acervo.sqlite --estado ""   # sem rede
+    python scraper_perfumes.py --avaliacoes ""   # sem coletar avaliações
+    python scraper_perfumes.py --base-url http://127.0.0.1:8600   # site local de testes
 """
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
+import httpx
 import json
-import csv
+import multiprocessing
+import os
 import time
-import re
-from dataclasses import dataclass, asdict, field
-from typing import Optional, List, Dict
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, fields
+from typing import AsyncIterator, Callable, Iterable, Optional, List, Dict, Tuple
 from urllib.parse import urljoin
 
+from acervo import AcervoRespostas, TransporteGravacao, TransporteReproducao
+from avaliacoes import AvaliacoesProdutos
+from coleta import Coletor, ConfigColeta
+from estado import EstadoCrawl, Registro, chave_produto, hash_conteudo
+from extracao import extrair_avaliacoes, extrair_listagem, extrair_precos, extrair_produto
+from metricas import MetricasExecucao
+from saida import SaidaProdutos, gravar_csv, gravar_json
+
 
 @dataclass
 class Perfume:
@@ -37,21 +90,25 @@ class Perfume:
     inspiracao: Optional[str] = None
     volume: Optional[str] = None
     desconto: Optional[str] = None
-    top_3_comentarios: List[Dict] = field(default_factory=list)
+
+
+CAMPOS_PERFUME = {campo.name for campo in fields(Perfume)}
 
 
 class PerfumeScraper:
     BASE_URL = "https://www.jaessencedelavie.com.br"
     
-    # URLs das categorias
-    URLS = {
-        "compartilhaveis": f"{BASE_URL}/compartilhaveis/",
-        "masculinos": f"{BASE_URL}/masculinos/",
-        "femininos": f"{BASE_URL}/femininos/"
+    # Caminhos das categorias
+    CATEGORIAS = {
+        "compartilhaveis": "/compartilhaveis/",
+        "masculinos": "/masculinos/",
+        "femininos": "/femininos/"
     }
     
-    # API wBuy para paginação (descoberta via análise do site)
-    API_URL = f"{BASE_URL}/busca"
+    # Limite de segurança da paginação por categoria
+    MAX_PRODUTOS_CATEGORIA = 20000
+    # Limite de páginas de "Carregar mais" por produto
+    MAX_PAGINAS_AVALIACOES = 200
     
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -67,126 +124,143 @@ class PerfumeScraper:
         "Cache-Control": "max-age=0",
     }
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(self.HEADERS)
+    def __init__(self, base_url: Optional[str] = None, config: Optional[ConfigColeta] = None,
+                 estado: Optional[EstadoCrawl] = None, reaproveitar: bool = True,
+                 saida: Optional[SaidaProdutos] = None,
+                 transporte: Optional[httpx.AsyncBaseTransport] = None, processos: int = 0,
+                 avaliacoes: Optional[AvaliacoesProdutos] = None):
+        self.BASE_URL = (base_url or self.BASE_URL).rstrip("/")
+        # URLs das categorias
+        self.URLS = {categoria: f"{self.BASE_URL}{caminho}" for categoria, caminho in self.CATEGORIAS.items()}
+        # Tempos e contadores da execução (coleta e parse)
+        self.metricas = MetricasExecucao()
+        # Cliente HTTP compartilhado (pool de conexões, cookies e limites por host)
+        self.coletor = Coletor(config, self.HEADERS, transporte, self.metricas)
+        # Estado da execução anterior (None desabilita o modo incremental)
+        self.estado = estado
+        self.reaproveitar = reaproveitar
+        self.estatisticas = Counter()
+        # Pool de parse (0: extração no próprio event loop) e a fila entre
+        # coleta e parse: páginas que podem aguardar extração
+        self.processos = processos
+        self.fila_parse = processos * 2
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._vagas_parse: Optional[asyncio.Semaphore] = None
+        # Com saída em JSONL, os produtos concluídos não ficam em memória
+        self.saida = saida
         self.perfumes: List[Perfume] = []
+        self.total_coletados = 0
+        # Todas as avaliações (None: só os três primeiros comentários)
+        self.avaliacoes = avaliacoes
         self.seen_links = set()  # Evitar duplicatas
-        self._init_session()
-    
-    def _init_session(self):
+        if saida:
+            # Na retomada, os links já detalhados continuam contando como vistos
+            self.seen_links.update(link for link, _ in saida.concluidos)
+
+    async def _init_session(self):
         """Inicializa a sessão visitando a homepage para obter cookies."""
         try:
             print("  Inicializando sessão...")
-            self.session.get(self.BASE_URL, timeout=30)
-        except:
+            await self.coletor.obter(self.BASE_URL)
+        except httpx.HTTPError:
             pass
 
-    def get_page(self, url: str, retry: int = 3) -> Optional[BeautifulSoup]:
-        """Faz requisição e retorna o BeautifulSoup da página."""
-        for attempt in range(retry):
-            try:
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                return BeautifulSoup(response.content, "html.parser")
-            except requests.RequestException as e:
-                if attempt < retry - 1:
-                    time.sleep(2)
-                    continue
-                print(f"  ✗ Erro ao acessar {url}: {e}")
-                return None
-        return None
-
-    def get_page_with_offset(self, category_url: str, offset: int = 0) -> Optional[BeautifulSoup]:
-        """Obtém página com offset para paginação via scroll infinito."""
-        # wBuy usa AJAX para carregar mais produtos
-        url = f"{category_url}?offset={offset}"
-        return self.get_page(url)
-
-    def extract_products_from_listing(self, soup: BeautifulSoup, categoria: str) -> List[Perfume]:
-        """Extrai produtos da página de listagem wBuy."""
-        products = []
-        
-        # wBuy usa estrutura específica para produtos
-        # Procurar por links de produtos e seus containers
-        product_links = soup.find_all("a", href=re.compile(r"\.com\.br/[a-z0-9\-]+/$"))
-        
-        # Extrair blocos de produtos únicos
-        processed_urls = set()
-        
-        # Procurar containers de produtos (estrutura wBuy)
-        product_containers = soup.select("div[class*='product'], div[class*='item'], article")
-        
-        if not product_containers:
-            # Fallback: processar links diretamente
-            for link in product_links:
-                href = link.get("href", "")
-                if href and href not in processed_urls:
-                    # Verificar se é um link de produto válido (não categoria, não página)
-                    if any(x in href for x in ["/compartilhave", "/masculin", "/feminin", 
-                                                "/login", "/carrinho", "/politica", "/avaliacoes"]):
-                        if href in [self.URLS["compartilhaveis"], self.URLS["masculinos"], self.URLS["femininos"]]:
-                            continue
-                    
-                    nome = link.get_text(strip=True)
-                    if nome and len(nome) > 5 and "inspirado" in nome.lower():
-                        processed_urls.add(href)
-                        
-                        perfume = Perfume(
-                            nome=nome,
-                            categoria=categoria,
-                            link_produto=href if href.startswith("http") else urljoin(self.BASE_URL, href)
-                        )
-                        
-                        # Tentar extrair imagem próxima
-                        img = link.find("img")
-                        if img:
-                            perfume.imagem_url = img.get("src") or img.get("data-src")
-                        
-                        products.append(perfume)
-        
-        return products
+    async def close(self):
+        """Encerra as conexões abertas e o pool de parse."""
+        await self.coletor.fechar()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def _extrair(self, funcao: Callable, *args):
+        """Executa a extração no pool de processos (ou aqui mesmo, sem pool).
+
+        Recebe os bytes da página; no máximo ``fila_parse`` páginas ficam
+        aguardando ou em parse, o que segura a coleta quando o parse atrasa.
+        """
+        etapa = "parse_" + funcao.__name__.removeprefix("extrair_")
+        if self.processos <= 0:
+            inicio = time.perf_counter()
+            resultado = funcao(*args)
+            self.metricas.registrar(etapa, time.perf_counter() - inicio)
+            return resultado
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processos,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._vagas_parse = asyncio.Semaphore(self.fila_parse)
+        espera = time.perf_counter()
+        async with self._vagas_parse:
+            inicio = time.perf_counter()
+            self.metricas.registrar("espera_parse", inicio - espera)
+            # No pool, o tempo inclui a passagem dos dados entre processos
+            resultado = await asyncio.get_running_loop().run_in_executor(self._pool, funcao, *args)
+            self.metricas.registrar(etapa, time.perf_counter() - inicio)
+            return resultado
+
+    def save_report(self, filename: str = "perfumes_relatorio.json", modo: str = "rede") -> Dict:
+        """Grava o relatório de tempos e contadores da execução."""
+        config = self.coletor.config
+        relatorio = self.metricas.gravar(filename, {
+            "modo": modo,
+            "config": {
+                "concorrencia_por_host": config.concorrencia_por_host,
+                "taxa": config.taxa,
+                "rajada": config.rajada,
+                "tentativas": config.tentativas,
+                "processos": self.processos,
+            },
+            "paginas": dict(self.estatisticas),
+            "produtos": self.total_coletados,
+            "avaliacoes": {
+                "paginas": self.avaliacoes.paginas,
+                "novas": self.avaliacoes.novas,
+            } if self.avaliacoes else None,
+        })
+        etapas = relatorio["etapas"]
+        tempos = ", ".join(
+            f"{etapa} p50 {etapas[etapa]['p50_ms']:.0f} ms"
+            for etapa in ("espera_host", "ttfb", "parse_produto") if etapa in etapas
+        )
+        limitacao = relatorio["limitacao_servidor"]["respostas"]
+        print(f"📈 Relatório salvo em: {filename} ({relatorio['requisicoes']['por_s']} req/s; {tempos}"
+              f"{'; limitado pelo site: ' + str(limitacao) if limitacao else ''})")
+        return relatorio
+
+    async def fetch_page(self, url: str, reaproveitar: bool = True) -> Tuple[Optional[httpx.Response], Optional[Registro]]:
+        """Baixa a página para processamento.
+
+        Se ela não mudou desde a última execução (304 ou mesmo conteúdo),
+        devolve ``(None, registro anterior)``; em caso de erro, ``(None, None)``.
+        """
+        reaproveitar = reaproveitar and self.reaproveitar
+        anterior = self.estado.registro(url) if self.estado and reaproveitar else None
+        try:
+            response = await self.coletor.obter(url, anterior.condicionais() if anterior else None)
+        except httpx.HTTPError as e:
+            print(f"  ✗ Erro ao acessar {url}: {e}")
+            return None, None
+
+        if anterior is not None and (
+            response.status_code == 304 or hash_conteudo(response.content) == anterior.hash
+        ):
+            self.estado.renovar(url, response)
+            self.estatisticas["inalteradas"] += 1
+            return None, anterior
+        self.estatisticas["processadas"] += 1
+        return response, None
+
+    def _registrar(self, url: str, response: httpx.Response, resultado):
+        """Guarda o que foi extraído da página para as próximas execuções"""
+        if self.estado:
+            self.estado.gravar(url, response, resultado)
 
     def extract_price_from_text(self, text: str) -> Dict[str, Optional[str]]:
         """Extrai informações de preço do texto."""
-        result = {
-            "preco": None,
-            "preco_original": None,
-            "preco_pix": None,
-            "parcelamento": None,
-            "desconto": None
-        }
-        
-        # Preço com desconto: "de R$165,90 por R$134,90"
-        promo_match = re.search(r"de\s*R\$\s*([\d.,]+)\s*por\s*R\$\s*([\d.,]+)", text)
-        if promo_match:
-            result["preco_original"] = f"R${promo_match.group(1)}"
-            result["preco"] = f"R${promo_match.group(2)}"
-        
-        # Preço normal: "R$179,90"
-        if not result["preco"]:
-            price_match = re.search(r"R\$\s*([\d.,]+)", text)
-            if price_match:
-                result["preco"] = f"R${price_match.group(1)}"
-        
-        # Preço PIX: "R$170,90 com PIX"
-        pix_match = re.search(r"R\$\s*([\d.,]+)\s*com\s*PIX", text)
-        if pix_match:
-            result["preco_pix"] = f"R${pix_match.group(1)}"
-        
-        # Parcelamento: "6x de R$29,98"
-        parcel_match = re.search(r"(\d+)x\s*de\s*R\$\s*([\d.,]+)", text)
-        if parcel_match:
-            result["parcelamento"] = f"{parcel_match.group(1)}x de R${parcel_match.group(2)}"
-        
-        # Desconto: "-19%" ou "(-5%)"
-        discount_match = re.search(r"-?\s*(\d+)\s*%", text)
-        if discount_match:
-            result["desconto"] = f"-{discount_match.group(1)}%"
-        
-        return result
+        return extrair_precos(text)
 
-    def get_product_details(self, perfume: Perfume) -> Perfume:
+    async def get_product_details(self, perfume: Perfume) -> Perfume:
         """Acessa a página do produto para obter mais detalhes."""
         if not perfume.link_produto:
             return perfume
@@ -195,315 +269,373 @@ class PerfumeScraper:
             return perfume
         self.seen_links.add(perfume.link_produto)
         
-        soup = self.get_page(perfume.link_produto)
-        if not soup:
+        # Sem as avaliações completas do produto, a página é processada mesmo sem mudança
+        response, anterior = await self.fetch_page(
+            perfume.link_produto,
+            reaproveitar=self.avaliacoes is None or self.avaliacoes.percorrido(perfume.link_produto)
+        )
+        if anterior is not None:
+            for campo, valor in anterior.resultado.items():
+                if campo in CAMPOS_PERFUME:  # estado anterior pode ter campos removidos
+                    setattr(perfume, campo, valor)
+            return perfume
+        if response is None:
             return perfume
         
-        # Extrair todo o texto da página para processamento
-        page_text = soup.get_text(separator=" ", strip=True)
-        
-        # ===== PREÇOS =====
-        price_info = self.extract_price_from_text(page_text)
-        perfume.preco = price_info["preco"]
-        perfume.preco_original = price_info["preco_original"]
-        perfume.preco_pix = price_info["preco_pix"]
-        perfume.parcelamento = price_info["parcelamento"]
-        perfume.desconto = price_info["desconto"]
-        
-        # ===== VOLUME =====
-        volume_match = re.search(r"(\d+)\s*ML\b", page_text, re.IGNORECASE)
-        if volume_match:
-            perfume.volume = f"{volume_match.group(1)}ml"
-        
-        # ===== INSPIRAÇÃO =====
-        # Buscar no título ou texto: "Inspirado em X"
-        insp_match = re.search(r"[Ii]nspirado\s+em\s+([^-–\n]+?)(?:\s*[-–]|\s*Compartilhável|\s*Masculino|\s*Feminino|\s*PROMOÇÃO|$)", page_text)
-        if insp_match:
-            inspiracao = insp_match.group(1).strip()
-            # Limpar texto de promoção
-            inspiracao = re.sub(r"\s*PROMOÇÃO.*$", "", inspiracao, flags=re.IGNORECASE)
-            inspiracao = re.sub(r"\s*Até\s*\d+x.*$", "", inspiracao, flags=re.IGNORECASE)
-            perfume.inspiracao = inspiracao.strip()
-        
-        # ===== NOTAS OLFATIVAS =====
-        # Notas de Topo
-        topo_match = re.search(r"Notas?\s+de\s+Topo[:\s]+([^N]+?)(?:Notas?\s+de\s+Cora|$)", page_text, re.IGNORECASE)
-        if topo_match:
-            perfume.notas_topo = topo_match.group(1).strip()
-        
-        # Notas de Coração
-        coracao_match = re.search(r"Notas?\s+de\s+Cora[çc][ãa]o[:\s]+([^N]+?)(?:Notas?\s+de\s+Fundo|$)", page_text, re.IGNORECASE)
-        if coracao_match:
-            perfume.notas_coracao = coracao_match.group(1).strip()
-        
-        # Notas de Fundo
-        fundo_match = re.search(r"Notas?\s+de\s+Fundo[:\s]+([^\n✦]+)", page_text, re.IGNORECASE)
-        if fundo_match:
-            perfume.notas_fundo = fundo_match.group(1).strip()
-        
-        # ===== DESCRIÇÃO =====
-        # Procurar texto descritivo na página - "A Experiência" section
-        perfume.descricao = None
-        
-        # Melhor fonte: seção "A Experiência" que descreve a fragrância
-        exp_match = re.search(r"A Experiência\s*(.+?)(?:✦|Dicas de Uso|Disclaimer|$)", page_text, re.IGNORECASE | re.DOTALL)
-        if exp_match:
-            desc = exp_match.group(1).strip()
-            desc = re.sub(r"\s+", " ", desc).strip()
-            if len(desc) > 20 and len(desc) < 500 and "Ver tudo" not in desc:
-                perfume.descricao = desc[:400]
-        
-        # Fallback: texto após "Inspirado em X"
-        if not perfume.descricao:
-            desc_match = re.search(r"([OUÉé][\w\s]+(?:fragrância|frescor|elegância|intensidade|sofisticação)[^\n✦]+)", page_text)
-            if desc_match:
-                desc = desc_match.group(1).strip()
-                desc = re.sub(r"\s+", " ", desc).strip()
-                if len(desc) > 30 and "Ver tudo" not in desc:
-                    perfume.descricao = desc[:400]
-        
-        # ===== IMAGEM =====
-        if not perfume.imagem_url:
-            img_elem = soup.select_one("img[src*='produtos']")
-            if img_elem:
-                perfume.imagem_url = img_elem.get("src") or img_elem.get("data-src")
-        
-        # ===== TOP 3 COMENTÁRIOS =====
-        perfume.top_3_comentarios = self.extract_reviews(soup)
-        
+        # Preços, volume, inspiração, notas, descrição e avaliações
+        campos = await self._extrair(extrair_produto, response.content, response.encoding)
+        imagem_pagina = campos.pop("imagem_url")
+        avaliacoes, mais = campos.pop("avaliacoes"), campos.pop("avaliacoes_mais")
+        for campo, valor in campos.items():
+            setattr(perfume, campo, valor)
+        
+        resultado = dict(campos)
+        if not perfume.imagem_url and imagem_pagina:
+            perfume.imagem_url = resultado["imagem_url"] = imagem_pagina
+        if self.avaliacoes:
+            await self.get_reviews(perfume.link_produto, avaliacoes, mais)
+        self._registrar(perfume.link_produto, response, resultado)
         return perfume
 
-    def extract_reviews(self, soup: BeautifulSoup) -> List[Dict]:
-        """Extrai os top 3 comentários da página do produto."""
-        reviews = []
-        
-        page_text = soup.get_text()
-        
-        # Padrão melhorado para wBuy: "DD/MM/YYYY" seguido de texto e "Compra verificada"
-        # Os comentários aparecem após a seção "Avaliações"
-        
-        # Encontrar a seção de avaliações
-        avaliacoes_match = re.search(r"Avaliações(.+?)(?:Você também pode gostar|Carregar mais|$)", page_text, re.DOTALL)
-        
-        if avaliacoes_match:
-            avaliacoes_text = avaliacoes_match.group(1)
-            
-            # Padrão: data + texto + autor + "Compra verificada"
-            # Ex: "03/02/2026 Magnífico Katia Martins Compra verificada"
-            review_pattern = r"(\d{2}/\d{2}/\d{4})\s*(.+?)(?:Compra verificada|(?=\d{2}/\d{2}/\d{4})|$)"
-            matches = re.findall(review_pattern, avaliacoes_text, re.DOTALL)
-            
-            for date, content in matches[:5]:
-                content = content.strip()
-                if len(content) < 5 or len(content) > 500:
-                    continue
-                
-                # Tentar separar comentário do autor
-                # O autor geralmente é um nome próprio no final
-                parts = content.rsplit(' ', 2)
-                if len(parts) >= 2:
-                    # Verificar se últimas palavras parecem nome
-                    potential_author = ' '.join(parts[-2:]) if len(parts) >= 2 else parts[-1]
-                    if re.match(r'^[A-Z][a-záàâãéèêíïóôõúüç]+(?:\s+[A-Z][a-záàâãéèêíïóôõúüç]+)*$', potential_author):
-                        autor = potential_author
-                        comentario = ' '.join(parts[:-2]) if len(parts) > 2 else content
-                    else:
-                        autor = "Cliente verificado"
-                        comentario = content
-                else:
-                    autor = "Cliente verificado"
-                    comentario = content
-                
-                # Limpar comentário
-                comentario = re.sub(r'\s+', ' ', comentario).strip()
-                
-                if len(comentario) > 3:
-                    review = {
-                        "data": date,
-                        "autor": autor,
-                        "comentario": comentario[:300],
-                        "verificado": True
-                    }
-                    reviews.append(review)
-        
-        return reviews[:3]
+    async def get_reviews(self, link_produto: str, avaliacoes: List[Dict], mais: Optional[str]):
+        """Grava as avaliações da página do produto e das páginas de "Carregar mais"."""
+        self.avaliacoes.gravar(link_produto, avaliacoes)
+        paginas, url, visitadas = 1, link_produto, {link_produto}
+        while mais and paginas < self.MAX_PAGINAS_AVALIACOES:
+            url = urljoin(url, mais)
+            if url in visitadas:
+                break
+            visitadas.add(url)
+            response, anterior = await self.fetch_page(url)
+            if anterior is not None:
+                # Já gravadas na execução anterior; só falta o endereço da próxima
+                mais = anterior.resultado["mais"]
+            elif response is None:
+                return  # Produto fica sem a marca de concluído e é refeito na próxima execução
+            else:
+                avaliacoes, mais = await self._extrair(extrair_avaliacoes, response.content, response.encoding)
+                if not avaliacoes:
+                    mais = None
+                self.avaliacoes.gravar(link_produto, avaliacoes)
+                self._registrar(url, response, {"mais": mais})
+            paginas += 1
+        self.avaliacoes.concluir(link_produto, paginas)
 
-    def get_all_products_from_category(self, category_url: str, categoria: str) -> List[Perfume]:
-        """Obtém todos os produtos de uma categoria, tratando paginação."""
-        all_products = []
-        processed_links = set()
-        
-        # Primeira página
+    async def get_listing_page(self, category_url: str, offset: int = 0) -> Optional[Tuple[Optional[int], List[Dict]]]:
+        """Total informado e produtos de uma página da listagem (None em caso de erro)."""
+        # wBuy carrega mais produtos (scroll infinito) com ?offset=
+        url = category_url if offset == 0 else f"{category_url}?offset={offset}"
+        response, anterior = await self.fetch_page(url)
+        if anterior is not None:
+            return anterior.resultado["total"], anterior.resultado["itens"]
+        if response is None:
+            return None
+        total, itens = await self._extrair(extrair_listagem, response.content, self.BASE_URL, response.encoding)
+        self._registrar(url, response, {"total": total, "itens": itens})
+        return total, itens
+
+    async def iter_category_products(self, category_url: str, categoria: str) -> AsyncIterator[Tuple[int, Perfume]]:
+        """Produtos da categoria à medida que as páginas da listagem chegam.
+
+        Gera ``(posição na listagem, perfume)``. Com o total informado na
+        primeira página, as demais são pedidas em paralelo; sem ele, as
+        páginas são seguidas até uma não trazer produtos novos.
+        """
         print(f"  Acessando: {category_url}")
-        soup = self.get_page(category_url)
-        if not soup:
-            return all_products
-        
-        # Encontrar total de produtos
-        total_match = re.search(r"(\d+)\s*itens?", soup.get_text())
-        total_products = int(total_match.group(1)) if total_match else 24
-        print(f"  Total de itens na categoria: {total_products}")
-        
-        # Extrair todos os links de produtos da página
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '')
-            text = link.get_text(strip=True)
-            
-            # Verificar se parece link de produto (contém "inspirado" ou "perfume")
-            if ('inspirado' in text.lower() or 'perfume' in text.lower()) and len(text) > 10:
-                # Construir URL completa
-                if not href.startswith('http'):
-                    full_url = urljoin(self.BASE_URL, href)
-                else:
-                    full_url = href
-                
-                # Evitar duplicatas
-                if full_url in processed_links:
-                    continue
-                processed_links.add(full_url)
-                
-                perfume = Perfume(
-                    nome=text,
-                    categoria=categoria,
-                    link_produto=full_url
-                )
-                
-                # Tentar extrair imagem próxima
-                parent = link.find_parent()
-                if parent:
-                    img = parent.find('img')
-                    if img:
-                        perfume.imagem_url = img.get('src') or img.get('data-src')
-                
-                all_products.append(perfume)
-        
-        print(f"  Produtos encontrados: {len(all_products)}")
-        return all_products
+        primeira = await self.get_listing_page(category_url)
+        if primeira is None:
+            return
+        total, itens = primeira
+        print(f"  Total de itens na categoria: {total if total is not None else 'não informado'}")
+        vistos = set()
+
+        def novos(offset: int, itens: List[Dict]) -> List[Tuple[int, Perfume]]:
+            encontrados = []
+            for i, item in enumerate(itens):
+                if item["link_produto"] not in vistos:
+                    vistos.add(item["link_produto"])
+                    encontrados.append((offset + i, Perfume(categoria=categoria, **item)))
+            return encontrados
+
+        for encontrado in novos(0, itens):
+            yield encontrado
+        por_pagina = len(itens)
+        if not por_pagina:
+            return
+
+        if total is None:
+            # Sem total: segue as páginas (scroll infinito) até não haver novidades
+            offset = por_pagina
+            while offset < self.MAX_PRODUTOS_CATEGORIA:
+                pagina = await self.get_listing_page(category_url, offset)
+                encontrados = novos(offset, pagina[1]) if pagina else []
+                if not encontrados:
+                    return
+                for encontrado in encontrados:
+                    yield encontrado
+                offset += len(pagina[1])
+            return
+
+        async def pagina(offset: int):
+            return offset, await self.get_listing_page(category_url, offset)
+
+        offsets = range(por_pagina, min(total, self.MAX_PRODUTOS_CATEGORIA), por_pagina)
+        tarefas = [asyncio.ensure_future(pagina(offset)) for offset in offsets]
+        try:
+            for proxima in asyncio.as_completed(tarefas):
+                offset, resultado = await proxima
+                if resultado is not None:
+                    for encontrado in novos(offset, resultado[1]):
+                        yield encontrado
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+    async def get_all_products_from_category(self, category_url: str, categoria: str) -> List[Perfume]:
+        """Obtém todos os produtos de uma categoria, tratando paginação."""
+        encontrados = [item async for item in self.iter_category_products(category_url, categoria)]
+        return [perfume for _, perfume in sorted(encontrados, key=lambda item: item[0])]
+
+    async def scrape_category(self, categoria: str, url: str, get_details: bool = True, indice: int = 0):
+        """Faz scraping de uma categoria completa.
 
-    def scrape_category(self, categoria: str, url: str, get_details: bool = True):
-        """Faz scraping de uma categoria completa."""
+        Os produtos seguem para a página de detalhes assim que aparecem na
+        listagem, sem esperar as demais páginas. Com ``saida``, cada produto
+        concluído é gravado e descartado (o retorno fica vazio); os já
+        gravados em uma execução anterior são pulados.
+        """
         print(f"\n{'='*60}")
         print(f"📦 Scraping categoria: {categoria.upper()}")
         print(f"{'='*60}")
         
-        # Obter todos os produtos
-        category_products = self.get_all_products_from_category(url, categoria)
-        
-        # Obter detalhes de cada produto
-        if get_details and category_products:
-            print(f"  Obtendo detalhes dos produtos...")
-            for i, perfume in enumerate(category_products):
-                print(f"    [{i+1}/{len(category_products)}] {perfume.nome[:50]}...")
-                self.get_product_details(perfume)
-                time.sleep(0.5)  # Delay entre requisições
+        encontrados: Dict[int, Perfume] = {}
+        fila: asyncio.Queue = asyncio.Queue(maxsize=self.coletor.config.concorrencia_por_host * 4)
+        # Além dos que ocupam as vagas de coleta, trabalhadores para as páginas
+        # que aguardam o parse: a coleta continua enquanto a fila não enche
+        trabalhadores = self.coletor.config.concorrencia_por_host + self.fila_parse if get_details else 0
+        progresso = Counter()
+
+        def concluir(posicao: int, perfume: Perfume):
+            progresso["concluidos"] += 1
+            self.total_coletados += 1
+            if self.saida:
+                self.saida.gravar(asdict(perfume), (indice, posicao))
+            else:
+                encontrados[posicao] = perfume
+
+        async def listar():
+            try:
+                async for posicao, perfume in self.iter_category_products(url, categoria):
+                    progresso["descobertos"] += 1
+                    if self.saida and chave_produto(asdict(perfume)) in self.saida.concluidos:
+                        progresso["pulados"] += 1
+                    elif get_details:
+                        await fila.put((posicao, perfume))
+                    else:
+                        concluir(posicao, perfume)
+            finally:
+                for _ in range(trabalhadores):
+                    await fila.put(None)
+
+        # Obter detalhes dos produtos em paralelo (limitado pelo coletor)
+        async def detalhar():
+            while (item := await fila.get()) is not None:
+                posicao, perfume = item
+                await self.get_product_details(perfume)
+                concluir(posicao, perfume)
+                print(f"    [{progresso['concluidos']}/{progresso['descobertos'] - progresso['pulados']}] "
+                      f"{perfume.nome[:50]}...")
+
+        await asyncio.gather(listar(), *(detalhar() for _ in range(trabalhadores)))
         
+        category_products = [encontrados[posicao] for posicao in sorted(encontrados)]
         self.perfumes.extend(category_products)
-        print(f"  ✓ {len(category_products)} produtos processados")
+        pulados = f" ({progresso['pulados']} já gravados, pulados)" if progresso["pulados"] else ""
+        print(f"  ✓ {progresso['concluidos']} produtos processados{pulados}")
         return category_products
 
-    def scrape_all(self, get_details: bool = True):
+    async def scrape_all(self, get_details: bool = True):
         """Faz scraping de todas as categorias."""
         print("\n" + "="*60)
         print("🚀 INICIANDO SCRAPING DE PERFUMES - JA ESSENCE DE LA VIE")
         print("="*60)
         
-        for categoria, url in self.URLS.items():
-            self.scrape_category(categoria, url, get_details)
-            time.sleep(1)
+        await self._init_session()
+        for indice, (categoria, url) in enumerate(self.URLS.items()):
+            await self.scrape_category(categoria, url, get_details, indice)
         
         print(f"\n{'='*60}")
-        print(f"✅ TOTAL DE PERFUMES COLETADOS: {len(self.perfumes)}")
+        print(f"✅ TOTAL DE PERFUMES COLETADOS: {self.total_coletados}")
+        if self.estado:
+            print(f"   Páginas processadas: {self.estatisticas['processadas']}, "
+                  f"sem alterações: {self.estatisticas['inalteradas']}")
         print(f"{'='*60}")
         
         return self.perfumes
 
-    def save_to_json(self, filename: str = "perfumes.json"):
-        """Salva os dados em formato JSON."""
-        data = [asdict(p) for p in self.perfumes]
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def save_to_json(self, filename: str = "perfumes.json", produtos: Optional[Iterable[Dict]] = None):
+        """Salva os dados em formato JSON (troca atômica do arquivo)."""
+        gravar_json(filename, produtos if produtos is not None else (asdict(p) for p in self.perfumes))
         print(f"\n💾 Dados salvos em: {filename}")
 
-    def save_to_csv(self, filename: str = "perfumes.csv"):
-        """Salva os dados em formato CSV."""
-        if not self.perfumes:
-            print("Nenhum perfume para salvar.")
-            return
-        
-        # Converter comentários para string
-        data = []
-        for p in self.perfumes:
-            row = asdict(p)
-            row["top_3_comentarios"] = json.dumps(row["top_3_comentarios"], ensure_ascii=False)
-            data.append(row)
-        
-        fieldnames = list(data[0].keys())
-        
-        with open(filename, "w", encoding="utf-8-sig", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
-        
+    def save_diff(self, filename: str = "perfumes_diff.json", produtos: Optional[Iterable[Dict]] = None):
+        """Salva o diff em relação à execução anterior e a torna a nova base."""
+        atuais = produtos if produtos is not None else (asdict(p) for p in self.perfumes)
+        diff = self.estado.atualizar_produtos(atuais)
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(diff, f, ensure_ascii=False, indent=2)
+        resumo = diff["resumo"]
+        print(f"💾 Diff salvo em: {filename} ({resumo['adicionados']} adicionados, "
+              f"{resumo['alterados']} alterados, {resumo['removidos']} removidos)")
+
+    def save_review_aggregates(self, filename: str = "perfumes_avaliacoes.json", produtos: Optional[Iterable[Dict]] = None):
+        """Salva os agregados das avaliações dos produtos do catálogo."""
+        atuais = produtos if produtos is not None else (asdict(p) for p in self.perfumes)
+        links = {produto["link_produto"] for produto in atuais if produto.get("link_produto")}
+        perfumes = self.avaliacoes.gravar_agregados(filename, links)
+        total, _ = self.avaliacoes.resumo()
+        print(f"💾 Agregados das avaliações salvos em: {filename} ({perfumes} perfumes; "
+              f"{self.avaliacoes.novas} avaliações novas, {total} no total)")
+
+    def save_to_csv(self, filename: str = "perfumes.csv", produtos: Optional[Iterable[Dict]] = None):
+        """Salva os dados em formato CSV (troca atômica do arquivo)."""
+        if produtos is None:
+            if not self.perfumes:
+                print("Nenhum perfume para salvar.")
+                return
+            produtos = (asdict(p) for p in self.perfumes)
+        
+        gravar_csv(filename, produtos)
         print(f"💾 Dados salvos em: {filename}")
 
-    def print_summary(self):
+    def print_summary(self, produtos: Optional[Iterable[Dict]] = None):
         """Imprime um resumo dos dados coletados."""
         print("\n" + "="*60)
         print("📊 RESUMO DOS PERFUMES COLETADOS")
         print("="*60)
         
-        categorias = {}
-        for p in self.perfumes:
-            if p.categoria not in categorias:
-                categorias[p.categoria] = []
-            categorias[p.categoria].append(p)
-        
-        for cat, perfumes in categorias.items():
-            print(f"\n{cat.upper()} ({len(perfumes)} produtos):")
+        # Contagem e primeiros 5 produtos de cada categoria
+        totais = Counter()
+        exemplos: Dict[str, List[Dict]] = {}
+        for p in (produtos if produtos is not None else (asdict(p) for p in self.perfumes)):
+            totais[p["categoria"]] += 1
+            primeiros = exemplos.setdefault(p["categoria"], [])
+            if len(primeiros) < 5:
+                primeiros.append(p)
+        
+        for cat, perfumes in exemplos.items():
+            print(f"\n{cat.upper()} ({totais[cat]} produtos):")
             print("-"*50)
-            for p in perfumes[:5]:  # Mostrar primeiros 5
-                preco_str = p.preco_pix or p.preco or "Preço não disponível"
-                print(f"  • {p.nome[:50]}")
+            for p in perfumes:
+                preco_str = p["preco_pix"] or p["preco"] or "Preço não disponível"
+                print(f"  • {p['nome'][:50]}")
                 print(f"    💰 Preço: {preco_str}")
-                if p.inspiracao:
-                    print(f"    🎯 Inspirado em: {p.inspiracao[:40]}")
-                if p.top_3_comentarios:
-                    print(f"    💬 Comentários: {len(p.top_3_comentarios)}")
-            if len(perfumes) > 5:
-                print(f"  ... e mais {len(perfumes) - 5} produtos")
+                if p["inspiracao"]:
+                    print(f"    🎯 Inspirado em: {p['inspiracao'][:40]}")
+            if totais[cat] > 5:
+                print(f"  ... e mais {totais[cat] - 5} produtos")
+
+
+def parse_args():
+    padrao = ConfigColeta()
+    parser = argparse.ArgumentParser(description="Scraper de perfumes - JA Essence de la Vie")
+    parser.add_argument("--base-url", help="Site alternativo (ex.: servidor local de testes)")
+    parser.add_argument("--concorrencia", type=int, default=padrao.concorrencia_por_host,
+                        help="Requisições simultâneas por host")
+    parser.add_argument("--taxa", type=float, default=padrao.taxa,
+                        help="Requisições por segundo por host (0 desabilita)")
+    parser.add_argument("--rajada", type=float, default=padrao.rajada,
+                        help="Requisições permitidas em rajada")
+    parser.add_argument("--sem-detalhes", action="store_true",
+                        help="Apenas lista os produtos (sem abrir as páginas)")
+    parser.add_argument("--estado", default="crawl_estado.sqlite",
+                        help="Banco com o estado da execução anterior (vazio desabilita o modo incremental)")
+    parser.add_argument("--completo", action="store_true",
+                        help="Reprocessa todas as páginas (o estado e o diff continuam sendo gravados)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continua uma execução interrompida, pulando os produtos já gravados no JSONL")
+    acervo = parser.add_mutually_exclusive_group()
+    acervo.add_argument("--gravar", metavar="ACERVO",
+                        help="Grava as respostas do site neste acervo (SQLite, corpo comprimido)")
+    acervo.add_argument("--reproduzir", metavar="ACERVO",
+                        help="Usa as respostas gravadas no acervo, sem rede e sem limite de ritmo")
+    parser.add_argument("--processos", type=int, default=max(0, (os.cpu_count() or 1) - 1),
+                        help="Processos de parse (padrão: nº de CPUs - 1; 0 faz o parse no processo principal)")
+    parser.add_argument("--avaliacoes", default="avaliacoes.sqlite",
+                        help="Banco com todas as avaliações dos produtos (vazio: não coleta avaliações)")
+    return parser.parse_args()
+
+
+async def executar(scraper: PerfumeScraper, get_details: bool):
+    try:
+        await scraper.scrape_all(get_details=get_details)
+    finally:
+        await scraper.close()
 
 
 def main():
     """Função principal."""
-    scraper = PerfumeScraper()
+    args = parse_args()
+    if args.reproduzir and not os.path.exists(args.reproduzir):
+        raise SystemExit(f"Acervo não encontrado: {args.reproduzir} (grave antes com --gravar)")
+    estado = EstadoCrawl(args.estado) if args.estado else None
+    saida = SaidaProdutos("perfumes.jsonl", retomar=args.resume)
+    if saida.concluidos:
+        print(f"↩️  Retomando: {len(saida.concluidos)} produtos já gravados em perfumes.jsonl")
+    acervo = AcervoRespostas(args.gravar or args.reproduzir) if args.gravar or args.reproduzir else None
+    avaliacoes = AvaliacoesProdutos(args.avaliacoes) if args.avaliacoes and not args.sem_detalhes else None
+    transporte = None
+    if args.gravar:
+        transporte = TransporteGravacao(acervo)
+    elif args.reproduzir:
+        transporte = TransporteReproducao(acervo)
+    scraper = PerfumeScraper(args.base_url, ConfigColeta(
+        concorrencia_por_host=args.concorrencia,
+        # Reproduzindo não há servidor a poupar
+        taxa=0 if args.reproduzir else args.taxa,
+        rajada=args.rajada
+    ), estado=estado, reaproveitar=not args.completo, saida=saida, transporte=transporte,
+        processos=args.processos, avaliacoes=avaliacoes)
     
     try:
         # Fazer scraping de todas as categorias
-        # Set get_details=True para obter informações detalhadas de cada produto
-        # Set get_details=False para apenas listar os produtos (mais rápido)
-        scraper.scrape_all(get_details=True)
+        # --sem-detalhes apenas lista os produtos (mais rápido)
+        asyncio.run(executar(scraper, get_details=not args.sem_detalhes))
         
-        # Salvar resultados
-        scraper.save_to_json("perfumes.json")
-        scraper.save_to_csv("perfumes.csv")
+        # Compactar o JSONL nos arquivos finais (lidos do disco em fluxo)
+        scraper.save_to_json("perfumes.json", saida.produtos())
+        scraper.save_to_csv("perfumes.csv", saida.produtos())
+        if estado:
+            scraper.save_diff("perfumes_diff.json", saida.produtos())
+        if avaliacoes:
+            scraper.save_review_aggregates("perfumes_avaliacoes.json", saida.produtos())
         
         # Mostrar resumo
-        scraper.print_summary()
+        scraper.print_summary(saida.produtos())
         
     except KeyboardInterrupt:
         print("\n\n⚠️ Scraping interrompido pelo usuário.")
-        if scraper.perfumes:
-            print("Salvando dados coletados até agora...")
-            scraper.save_to_json("perfumes_parcial.json")
-            scraper.save_to_csv("perfumes_parcial.csv")
+        print(f"{saida.gravados} produtos gravados em perfumes.jsonl nesta execução; continue com --resume")
     
     except Exception as e:
         print(f"\n❌ Erro durante o scraping: {e}")
         import traceback
         traceback.print_exc()
-        if scraper.perfumes:
-            print("Salvando dados coletados até agora...")
-            scraper.save_to_json("perfumes_erro.json")
+        print(f"{saida.gravados} produtos gravados em perfumes.jsonl nesta execução; continue com --resume")
+
+    finally:
+        scraper.save_report("perfumes_relatorio.json",
+                            "gravacao" if args.gravar else "reproducao" if args.reproduzir else "rede")
+        saida.fechar()
+        if estado:
+            estado.fechar()
+        if avaliacoes:
+            avaliacoes.fechar()
+        if acervo:
+            respostas, tamanho = acervo.resumo()
+            print(f"📼 Acervo {acervo.caminho}: {dict(transporte.estatisticas)}; "
+                  f"{respostas} respostas, {tamanho / 1024 / 1024:.1f} MB comprimidos")
+            acervo.fechar()
 
 
 if __name__ == "__main__":